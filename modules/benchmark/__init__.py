@@ -0,0 +1,3 @@
+"""
+Benchmark Package - Contains performance benchmarks for the data driven generator
+"""
@@ -0,0 +1,295 @@
+"""End-to-end benchmark: synthetic v_ctr/v_var projects through render()
+
+Generates a synthetic project (see synth.py), runs DataDrivenGenerator.render
+on it and writes a JSON report with wall time, peak RSS and per-phase timings
+collected through the tracing hooks. Reports from two commits can be compared
+with --compare, which prints the relative change of every metric.
+
+Usage:
+    python -m modules.benchmark.bench_e2e --files 2000 --depth 3 --fan-out 10 \\
+        --output before.json
+    python -m modules.benchmark.bench_e2e --files 2000 --depth 3 --fan-out 10 \\
+        --output after.json --compare before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.benchmark.synth import SyntheticProjectConfig, create_synthetic_project
+from modules.core.data_driven_generator import (
+    DataDrivenGenerator,
+    DataDrivenGeneratorConfig,
+)
+from modules.core.tracing import TraceHook
+from modules.core.types import DataHandlerType, TemplateHandlerType
+from modules.node.data_node import DataNode
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class PhaseTimer(TraceHook):
+    """按阶段名累计耗时和次数的追踪钩子"""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.node_count = 0
+        self._starts: Dict[str, List[float]] = {}
+
+    def on_node_start(self, node: DataNode) -> None:
+        self.node_count += 1
+
+    def on_phase_start(self, phase: str, detail: str) -> None:
+        self._starts.setdefault(phase, []).append(time.perf_counter())
+
+    def on_phase_end(self, phase: str, detail: str) -> None:
+        elapsed = time.perf_counter() - self._starts[phase].pop()
+        self.totals[phase] = self.totals.get(phase, 0.0) + elapsed
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            phase: {"total_s": round(total, 6), "count": self.counts[phase]}
+            for phase, total in sorted(self.totals.items())
+        }
+
+
+def peak_rss_mb(who: str = "self") -> Optional[float]:
+    """峰值常驻内存(MB), who为"children"时取已结束子进程中的最大值
+
+    平台不支持时返回None
+    """
+    if resource is None:
+        return None
+    target = resource.RUSAGE_CHILDREN if who == "children" else resource.RUSAGE_SELF
+    peak = resource.getrusage(target).ru_maxrss
+    # Linux 单位为KB, macOS 单位为字节
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 2)
+    return round(peak / 1024, 2)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class _CountingSink(io.StringIO):
+    """流水线模式的内存输出, 关闭时累计写入的字符数"""
+
+    def __init__(self, totals: List[int]) -> None:
+        super().__init__()
+        self.totals = totals
+
+    def close(self) -> None:
+        self.totals.append(len(self.getvalue()))
+        super().close()
+
+
+def _render_once(generator: DataDrivenGenerator, pattern: str, mode: str) -> int:
+    """按mode渲染一次, 返回输出的总字符数"""
+    if mode == "pipeline":
+        totals: List[int] = []
+        generator.render_pipeline(pattern, lambda name: _CountingSink(totals))
+        return sum(totals)
+    if mode == "sharded":
+        jobs = generator.config.max_workers or os.cpu_count() or 1
+        return sum(len(text) for _, text in generator.render_sharded(pattern, jobs))
+    results = generator.render(pattern)
+    return sum(len(text) for text in results.values())
+
+
+def run_benchmark(
+    project_config: SyntheticProjectConfig,
+    repeat: int = 1,
+    project_dir: Optional[str] = None,
+    mode: str = "render",
+    prefetch_workers: Optional[int] = None,
+    **generator_options: Any,
+) -> Dict[str, Any]:
+    """生成合成项目并运行端到端渲染, 返回报告字典
+
+    mode 为 "render" (DataDrivenGenerator.render), "pipeline" (render_pipeline)
+    或 "sharded" (render_sharded, 进程数取 max_workers)。
+    repeat 大于1时取墙钟时间最短的一轮的阶段耗时。
+    prefetch_workers 为数据处理器预解析数据文件的进程数。
+    generator_options 直接传给 DataDrivenGeneratorConfig (如 max_workers)。
+    """
+    keep_project = project_dir is not None
+    if project_dir is None:
+        project_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    try:
+        project = create_synthetic_project(project_dir, project_config)
+        config = DataDrivenGeneratorConfig(
+            data_type=DataHandlerType.YAML_HANDLER,
+            data_config={
+                "root_path": project.data_dir,
+                "file_pattern": ["*.yaml"],
+                "max_depth": project_config.depth + 1,
+                "prefetch_workers": prefetch_workers,
+            },
+            template_type=TemplateHandlerType.JINJA_HANDLER,
+            template_config={"template_dir": project.template_dir},
+            **generator_options,
+        )
+
+        best: Optional[Dict[str, Any]] = None
+        for _ in range(repeat):
+            timer = PhaseTimer()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator = DataDrivenGenerator(config)
+                generator.add_hook(timer)
+                start = time.perf_counter()
+                try:
+                    output_bytes = _render_once(generator, project.pattern, mode)
+                    wall_time = time.perf_counter() - start
+                finally:
+                    generator.data_handler.close()
+            if best is None or wall_time < best["wall_time_s"]:
+                best = {
+                    "wall_time_s": round(wall_time, 6),
+                    "nodes_rendered": timer.node_count,
+                    "output_bytes": output_bytes,
+                    "phases": timer.report(),
+                }
+
+        # 在调用git之前读取子进程峰值, 只统计渲染进程池
+        rss = {
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_children_mb": peak_rss_mb("children"),
+        }
+        report: Dict[str, Any] = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "project": asdict(project_config),
+            "mode": mode,
+            "generator": dict(generator_options),
+            "prefetch_workers": prefetch_workers,
+            "file_count": project.file_count,
+            "root_count": project.root_count,
+            "repeat": repeat,
+        }
+        report.update(best or {})
+        report.update(rss)
+        return report
+    finally:
+        if not keep_project:
+            shutil.rmtree(project_dir)
+
+
+def _flatten(report: Dict[str, Any]) -> Dict[str, float]:
+    metrics = {
+        "wall_time_s": report.get("wall_time_s"),
+        "peak_rss_mb": report.get("peak_rss_mb"),
+        "peak_rss_children_mb": report.get("peak_rss_children_mb"),
+    }
+    for phase, values in report.get("phases", {}).items():
+        metrics[f"phase.{phase}"] = values["total_s"]
+    return {key: value for key, value in metrics.items() if value is not None}
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """返回两份报告各指标的对比表"""
+    old_metrics, new_metrics = _flatten(baseline), _flatten(current)
+    lines = [
+        f"{'metric':<28}{baseline.get('revision') or 'baseline':>14}"
+        f"{current.get('revision') or 'current':>14}{'change':>10}"
+    ]
+    for key in sorted(set(old_metrics) | set(new_metrics)):
+        old, new = old_metrics.get(key), new_metrics.get(key)
+        if old is None or new is None:
+            change = "n/a"
+        elif old == 0:
+            change = "0.0%" if new == 0 else "inf"
+        else:
+            change = f"{(new - old) / old * 100:+.1f}%"
+        lines.append(
+            f"{key:<28}{'-' if old is None else f'{old:.4f}':>14}"
+            f"{'-' if new is None else f'{new:.4f}':>14}{change:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end render benchmark")
+    parser.add_argument("--files", type=int, default=1000, help="YAML文件总数")
+    parser.add_argument("--depth", type=int, default=3, help="每棵树的层数")
+    parser.add_argument("--fan-out", type=int, default=10, help="每个容器的子节点数")
+    parser.add_argument("--data-size", type=int, default=8, help="每个节点的属性条目数")
+    parser.add_argument("--expr-density", type=float, default=0.25, help="表达式属性比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=1, help="重复次数, 取最快一轮")
+    parser.add_argument(
+        "--mode", choices=("render", "pipeline", "sharded"), default="render", help="渲染方式"
+    )
+    parser.add_argument("--max-workers", type=int, default=None, help="渲染进程数")
+    parser.add_argument(
+        "--memory-budget", type=int, default=None, help="子节点结果的内存预算(字符数)"
+    )
+    parser.add_argument(
+        "--prefetch-workers", type=int, default=None, help="预解析数据文件的进程数"
+    )
+    parser.add_argument("--project-dir", help="保留生成的项目到此目录")
+    parser.add_argument("--output", "-o", help="JSON报告输出路径")
+    parser.add_argument("--compare", help="与之对比的基准JSON报告")
+    args = parser.parse_args()
+
+    generator_options = {}
+    if args.max_workers is not None:
+        generator_options["max_workers"] = args.max_workers
+    if args.memory_budget is not None:
+        generator_options["memory_budget"] = args.memory_budget
+
+    report = run_benchmark(
+        SyntheticProjectConfig(
+            file_count=args.files,
+            depth=args.depth,
+            fan_out=args.fan_out,
+            data_size=args.data_size,
+            expr_density=args.expr_density,
+            seed=args.seed,
+        ),
+        repeat=args.repeat,
+        project_dir=args.project_dir,
+        mode=args.mode,
+        prefetch_workers=args.prefetch_workers,
+        **generator_options,
+    )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(compare_reports(baseline, report))
+
+
+if __name__ == "__main__":
+    main()
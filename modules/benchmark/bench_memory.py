@@ -0,0 +1,116 @@
+"""Memory benchmark: per-node overhead of file and data trees (tracemalloc)
+
+Measures with tracemalloc:
+- bare node objects: N leaf DataNodes linked under one parent, all sharing
+  one name string and one data dict, which isolates the per-instance
+  overhead of the node classes;
+- a full tree: YamlDataTreeHandler.create_data_tree on a synthetic project
+  (see synth.py), split into the file tree built at handler construction
+  and the data tree built from the parsed files.
+
+Usage:
+    python -m modules.benchmark.bench_memory --nodes 100000 --files 5000
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.benchmark.synth import SyntheticProjectConfig, create_synthetic_project
+from modules.node.data_node import DataNode
+from modules.yaml.yaml_handler import YamlDataTreeHandler
+
+
+def traced(func: Callable[[], Any]) -> Tuple[Any, int]:
+    """运行func, 返回 (结果, 结果仍占用的字节数)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def measure_bare_nodes(count: int) -> Dict[str, float]:
+    """count个叶子DataNode挂在同一个父节点下时每个节点的字节数
+
+    所有节点共用同一个名称和数据字典, 只统计节点对象本身的开销。
+    """
+    name = "node.yaml"
+    data: Dict[str, Any] = {}
+
+    def build() -> DataNode:
+        root = DataNode(data=data, name="root")
+        for _ in range(count):
+            root.add_child(DataNode(data=data, name=name))
+        return root
+
+    _, size = traced(build)
+    return {"nodes": count, "bytes": size, "bytes_per_node": round(size / count, 1)}
+
+
+def measure_tree(config: SyntheticProjectConfig) -> Dict[str, Any]:
+    """合成项目的文件树和数据树各自占用的字节数"""
+    project_dir = tempfile.mkdtemp(prefix="bench_memory_")
+    try:
+        project = create_synthetic_project(project_dir, config)
+        data_config = {
+            "root_path": project.data_dir,
+            "file_pattern": ["*.yaml"],
+            "max_depth": config.depth + 1,
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+            handler, file_tree_size = traced(lambda: YamlDataTreeHandler(data_config))
+            trees, data_tree_size = traced(
+                lambda: handler.create_data_tree(project.pattern)
+            )
+        node_count = sum(len(list(tree.iter_data_nodes())) for tree in trees)
+        return {
+            "files": project.file_count,
+            "data_nodes": node_count,
+            "file_tree_bytes": file_tree_size,
+            "data_tree_bytes": data_tree_size,
+            "data_tree_bytes_per_node": round(data_tree_size / max(node_count, 1), 1),
+        }
+    finally:
+        shutil.rmtree(project_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Node memory benchmark")
+    parser.add_argument("--nodes", type=int, default=100000, help="裸节点数量")
+    parser.add_argument("--files", type=int, default=2000, help="合成项目的YAML文件数")
+    parser.add_argument("--data-size", type=int, default=8, help="每个节点的属性条目数")
+    parser.add_argument("--output", "-o", help="JSON报告输出路径")
+    args = parser.parse_args()
+
+    report = {
+        "bare_nodes": measure_bare_nodes(args.nodes),
+        "tree": measure_tree(
+            SyntheticProjectConfig(
+                file_count=args.files, depth=3, fan_out=10, data_size=args.data_size
+            )
+        ),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
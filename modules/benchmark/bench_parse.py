@@ -0,0 +1,225 @@
+"""Parser backend benchmark: pure-Python YAML vs libyaml vs JSON fast path
+
+Times _YamlFileHandler._load_yaml_file with every parser backend on the
+repository's IPC/DIO fixtures and on synthetic large files. Each synthetic
+file is also written as .json to time the JSON fast path. The vars_* cases
+compare many small variable files (one file per variable, like
+IPC/chc/vars) with the same variables in one multi-document bundle
+("<backend>+bundle" rows). The libyaml rows are skipped when PyYAML was
+built without libyaml.
+
+Usage:
+    python -m modules.benchmark.bench_parse --entries 1000 10000 --vars 1000 --repeat 5
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import yaml
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.yaml.yaml_handler import (
+    PARSER_BACKENDS,
+    _LibyamlLoader,
+    _YamlFileHandler,
+    resolve_loader,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 仓库中的IPC/DIO数据文件
+FIXTURE_DIRS = ("IPC", "DIO", os.path.join("Xdm", "IPC"))
+
+
+def fixture_files() -> List[str]:
+    files: List[str] = []
+    for directory in FIXTURE_DIRS:
+        files.extend(
+            glob.glob(os.path.join(REPO_ROOT, directory, "**", "*.yaml"), recursive=True)
+        )
+    return sorted(files)
+
+
+def create_synthetic_file(directory: str, entries: int, seed: int = 0) -> Dict[str, str]:
+    """写入含entries个容器条目的数据文件, 返回 {"yaml": 路径, "json": 路径}"""
+    rng = random.Random(seed)
+    data = {
+        "TEMPLATE_PATH": "ctr.j2",
+        "CHILDREN_PATH": [],
+        "name": "synthetic",
+        "containers": [
+            {
+                "name": f"Ctr{i}",
+                "type": rng.choice(["INTEGER", "BOOLEAN", "ENUMERATION", "STRING"]),
+                "value": rng.randint(0, 1 << 16),
+                "enabled": rng.random() < 0.5,
+                "description": f"Parameter {i} of the synthetic module",
+                "range": [0, rng.randint(1, 255)],
+            }
+            for i in range(entries)
+        ],
+    }
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "yaml": os.path.join(directory, f"synthetic_{entries}.yaml"),
+        "json": os.path.join(directory, f"synthetic_{entries}.json"),
+    }
+    with open(paths["yaml"], "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return paths
+
+
+def create_variable_files(directory: str, count: int) -> Dict[str, List[str]]:
+    """写入count个单变量文件和包含相同变量的多文档文件
+
+    Returns:
+        {"split": 单变量文件路径列表, "bundle": [多文档文件路径]}
+    """
+    documents = [
+        {
+            "TEMPLATE_PATH": "var.j2",
+            "CHILDREN_PATH": [],
+            "name": f"Var{i}",
+            "type": "UINT8",
+            "init": i % 256,
+        }
+        for i in range(count)
+    ]
+    split_dir = os.path.join(directory, f"vars_{count}")
+    os.makedirs(split_dir, exist_ok=True)
+    split: List[str] = []
+    for document in documents:
+        path = os.path.join(split_dir, f"{document['name']}.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(document, f, sort_keys=False)
+        split.append(path)
+    bundle = os.path.join(directory, f"vars_{count}.yaml")
+    with open(bundle, "w", encoding="utf-8") as f:
+        yaml.safe_dump_all(documents, f, sort_keys=False)
+    return {"split": split, "bundle": [bundle]}
+
+
+def time_load(
+    files: List[str], backend: str, json_fast_path: bool, repeat: int
+) -> float:
+    """返回加载全部文件一轮的最短耗时(秒)"""
+    loader = resolve_loader(backend)
+    best: Optional[float] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in files:
+            _YamlFileHandler._load_yaml_file(path, loader, json_fast_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best or 0.0
+
+
+def run_benchmark(
+    entries: List[int], repeat: int = 3, variables: Optional[List[int]] = None
+) -> List[Dict[str, object]]:
+    """对每组输入和每个可用后端计时, 返回结果行"""
+    backends = [b for b in PARSER_BACKENDS if b != "libyaml" or _LibyamlLoader is not None]
+    rows: List[Dict[str, object]] = []
+    work_dir = tempfile.mkdtemp(prefix="bench_parse_")
+    try:
+        cases = [("fixtures", fixture_files(), None)]
+        for count in entries:
+            paths = create_synthetic_file(work_dir, count)
+            cases.append((f"synthetic_{count}", [paths["yaml"]], paths["json"]))
+
+        for case, files, json_file in cases:
+            if not files:
+                continue
+            size = sum(os.path.getsize(path) for path in files)
+            for backend in backends:
+                rows.append(
+                    {
+                        "case": case,
+                        "files": len(files),
+                        "bytes": size,
+                        "backend": backend,
+                        "seconds": round(time_load(files, backend, False, repeat), 6),
+                    }
+                )
+            if json_file is not None:
+                rows.append(
+                    {
+                        "case": case,
+                        "files": 1,
+                        "bytes": os.path.getsize(json_file),
+                        "backend": "json",
+                        "seconds": round(time_load([json_file], "python", True, repeat), 6),
+                    }
+                )
+
+        for count in variables or []:
+            paths = create_variable_files(work_dir, count)
+            for layout, suffix in (("split", ""), ("bundle", "+bundle")):
+                files = paths[layout]
+                for backend in backends:
+                    rows.append(
+                        {
+                            "case": f"vars_{count}",
+                            "files": len(files),
+                            "bytes": sum(os.path.getsize(path) for path in files),
+                            "backend": backend + suffix,
+                            "seconds": round(time_load(files, backend, False, repeat), 6),
+                        }
+                    )
+    finally:
+        shutil.rmtree(work_dir)
+    return rows
+
+
+def format_rows(rows: List[Dict[str, object]]) -> str:
+    """以每组输入中纯Python后端为基准的对比表"""
+    baseline = {row["case"]: row["seconds"] for row in rows if row["backend"] == "python"}
+    lines = [f"{'case':<20}{'files':>7}{'bytes':>12}{'backend':>16}{'seconds':>12}{'speedup':>9}"]
+    for row in rows:
+        base = baseline.get(row["case"])
+        speedup = f"{base / row['seconds']:.1f}x" if base and row["seconds"] else "n/a"
+        lines.append(
+            f"{row['case']:<20}{row['files']:>7}{row['bytes']:>12}{row['backend']:>16}"
+            f"{row['seconds']:>12.4f}{speedup:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="YAML parser backend benchmark")
+    parser.add_argument(
+        "--entries",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="合成文件的条目数, 可指定多个",
+    )
+    parser.add_argument(
+        "--vars",
+        type=int,
+        nargs="*",
+        default=[1000],
+        help="单变量文件与多文档文件对比的变量数, 可指定多个",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数, 取最快一轮")
+    parser.add_argument("--output", "-o", help="JSON结果输出路径")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.entries, args.repeat, args.vars)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Path lookup benchmark: find_nodes_by_path on a large in-memory file tree
+
+Builds a DirectoryNode tree of --files files (d<i>/s<j>/f<k>.yaml, 100
+files per subdirectory) without touching the disk, then times
+find_nodes_by_path for literal, ".", "..", wildcard and "**" patterns. The
+warm column reuses the compiled pattern from the compile_pattern LRU; the
+cold column clears the LRU before every call, so it includes normalizing,
+splitting and translating the pattern.
+
+The absolute_path and relative_path rows time get_absolute_path for every
+file and get_relative_path between each file and a fixed directory
+(whole-tree totals). Their cold column clears the cached node paths first.
+
+Usage:
+    python -m modules.benchmark.bench_paths --files 100000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.node.file_node import DirectoryNode, compile_pattern
+
+# 每个子目录中的文件数和每个顶层目录中的子目录数
+FILES_PER_DIRECTORY = 100
+SUBDIRECTORIES = 10
+
+# (名称, 起点目录, 模式); 起点目录为相对根目录的路径
+CASES: List[Tuple[str, str, str]] = [
+    ("literal", "", "d5/s5/f50.yaml"),
+    ("dot", "d5", "./s5/f5*.yaml"),
+    ("dotdot", "d5/s5", "../s6/f1?.yaml"),
+    ("wildcard", "", "d*/s*/f99.yaml"),
+    ("recursive_subtree", "d5", "**/f7.yaml"),
+    ("recursive_tree", "", "**/s5/f99.yaml"),
+    ("recursive_last", "", "d5/**"),
+]
+
+
+def build_tree(file_count: int) -> DirectoryNode:
+    """在内存中构建约file_count个文件的目录树"""
+    root: DirectoryNode = DirectoryNode("")
+    per_top = FILES_PER_DIRECTORY * SUBDIRECTORIES
+    for top_index in range(max(1, file_count // per_top)):
+        top = root.create_directory(f"d{top_index}")
+        for sub_index in range(SUBDIRECTORIES):
+            sub = top.create_directory(f"s{sub_index}")
+            for file_index in range(FILES_PER_DIRECTORY):
+                sub.create_file(f"f{file_index}.yaml")
+    return root
+
+
+def time_call(func: Callable[[], object], repeat: int, before: Optional[Callable[[], None]] = None) -> float:
+    """返回单次调用的最短耗时(秒)"""
+    best: Optional[float] = None
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best or 0.0
+
+
+def run_benchmark(file_count: int, repeat: int = 10) -> List[Dict[str, object]]:
+    """对每个模式计时, 返回结果行"""
+    root = build_tree(file_count)
+    rows: List[Dict[str, object]] = []
+    for name, base_path, pattern in CASES:
+        base = root.find_nodes_by_path(base_path)[0] if base_path else root
+        assert isinstance(base, DirectoryNode)
+        matches = len(base.find_nodes_by_path(pattern))  # 同时建立索引
+        rows.append(
+            {
+                "case": name,
+                "pattern": pattern,
+                "matches": matches,
+                "warm_us": round(
+                    time_call(lambda: base.find_nodes_by_path(pattern), repeat) * 1e6, 1
+                ),
+                "cold_us": round(
+                    time_call(
+                        lambda: base.find_nodes_by_path(pattern),
+                        repeat,
+                        compile_pattern.cache_clear,
+                    )
+                    * 1e6,
+                    1,
+                ),
+            }
+        )
+
+    files = [node for node in root._iter_all_nodes() if not isinstance(node, DirectoryNode)]
+    anchor = root.find_nodes_by_path("d1/s1")[0]
+    path_cases: List[Tuple[str, Callable[[], object]]] = [
+        ("absolute_path", lambda: [node.get_absolute_path() for node in files]),
+        ("relative_path", lambda: [node.get_relative_path(anchor) for node in files]),
+    ]
+    for name, func in path_cases:
+        func()
+        rows.append(
+            {
+                "case": name,
+                "pattern": "-",
+                "matches": len(files),
+                "warm_us": round(time_call(func, repeat) * 1e6, 1),
+                "cold_us": round(time_call(func, repeat, root._invalidate_path) * 1e6, 1),
+            }
+        )
+    return rows
+
+
+def format_rows(rows: List[Dict[str, object]]) -> str:
+    lines = [f"{'case':<20}{'pattern':<18}{'matches':>8}{'warm_us':>12}{'cold_us':>12}"]
+    for row in rows:
+        lines.append(
+            f"{row['case']:<20}{row['pattern']:<18}{row['matches']:>8}"
+            f"{row['warm_us']:>12.1f}{row['cold_us']:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="File tree path lookup benchmark")
+    parser.add_argument("--files", type=int, default=100000, help="文件数")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数, 取最快一次")
+    parser.add_argument("--output", "-o", help="JSON结果输出路径")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.files, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Traversal benchmark: deep chains and wide fan-outs
+
+Builds synthetic YAML projects shaped as a single deep CHILDREN chain and as
+one root with a wide fan-out, then times tree construction, rendering and
+iteration at several sizes. Per-node times that stay flat as the size grows
+show that traversal is linear. The render column times a full render() call,
+which rebuilds the data tree before rendering it.
+
+Usage:
+    python -m modules.benchmark.bench_traversal --size 5000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.core.data_driven_generator import (
+    DataDrivenGenerator,
+    DataDrivenGeneratorConfig,
+)
+from modules.core.types import DataHandlerType, TemplateHandlerType
+
+# 深链按目录分桶, 避免单个目录下文件过多
+CHAIN_BUCKET_SIZE = 100
+
+
+def _write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def create_chain_project(project_dir: str, depth: int) -> str:
+    """创建深度为depth的单链项目, 返回根文件的匹配模式"""
+    for index in range(depth):
+        bucket = index // CHAIN_BUCKET_SIZE
+        children = "[]"
+        if index + 1 < depth:
+            next_bucket = (index + 1) // CHAIN_BUCKET_SIZE
+            children = f'["../b{next_bucket}/n{index + 1}.yaml"]'
+        _write(
+            os.path.join(project_dir, "data", f"b{bucket}", f"n{index}.yaml"),
+            f'TEMPLATE_PATH: "node.j2"\nCHILDREN_PATH: {children}\nname: "n{index}"\n',
+        )
+    _write(os.path.join(project_dir, "template", "node.j2"), "<n>{{ name }}</n>\n")
+    return "b0/n0.yaml"
+
+
+def create_fanout_project(project_dir: str, width: int) -> str:
+    """创建一个根节点下有width个叶子节点的项目, 返回根文件的匹配模式"""
+    _write(
+        os.path.join(project_dir, "data", "root.yaml"),
+        'TEMPLATE_PATH: "root.j2"\nCHILDREN_PATH: ["vars/*.yaml"]\nname: "root"\n',
+    )
+    for index in range(width):
+        _write(
+            os.path.join(project_dir, "data", "vars", f"var{index}.yaml"),
+            f'TEMPLATE_PATH: "node.j2"\nCHILDREN_PATH: []\nname: "var{index}"\n',
+        )
+    _write(
+        os.path.join(project_dir, "template", "root.j2"),
+        "<root>\n{{ CHILDREN_CONTEXT0 }}\n</root>\n",
+    )
+    _write(os.path.join(project_dir, "template", "node.j2"), "<n>{{ name }}</n>\n")
+    return "root.yaml"
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    return time.perf_counter() - start
+
+
+def run_case(shape: str, size: int) -> Dict[str, float]:
+    """运行单个用例, 返回各阶段耗时(秒)"""
+    project_dir = tempfile.mkdtemp(prefix=f"bench_{shape}_")
+    try:
+        if shape == "chain":
+            pattern = create_chain_project(project_dir, size)
+        else:
+            pattern = create_fanout_project(project_dir, size)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = DataDrivenGenerator(
+                DataDrivenGeneratorConfig(
+                    data_type=DataHandlerType.YAML_HANDLER,
+                    data_config={
+                        "root_path": os.path.join(project_dir, "data"),
+                        "file_pattern": ["*.yaml"],
+                        "max_depth": size + 1,
+                    },
+                    template_type=TemplateHandlerType.JINJA_HANDLER,
+                    template_config={
+                        "template_dir": os.path.join(project_dir, "template")
+                    },
+                )
+            )
+
+        trees: List = []
+        timings = {
+            "build": _timed(
+                lambda: trees.extend(generator.data_handler.create_data_tree(pattern))
+            ),
+            "iterate": _timed(lambda: sum(1 for _ in trees[0].iter_data_nodes())),
+            "list_files": _timed(
+                lambda: generator.data_handler.file_tree._get_all_nodes()
+            ),
+            "render": _timed(lambda: generator.render(pattern)),
+        }
+        return timings
+    finally:
+        shutil.rmtree(project_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deep chain / wide fan-out benchmark")
+    parser.add_argument("--size", type=int, default=5000, help="最大节点数")
+    parser.add_argument("--steps", type=int, default=3, help="规模档位数")
+    args = parser.parse_args()
+
+    sizes = [args.size * (step + 1) // args.steps for step in range(args.steps)]
+    print(f"{'shape':<8}{'nodes':>8}" + "".join(
+        f"{phase + ' us/node':>22}" for phase in ("build", "iterate", "list_files", "render")
+    ))
+    for shape in ("chain", "fanout"):
+        for size in sizes:
+            timings = run_case(shape, size)
+            print(f"{shape:<8}{size:>8}" + "".join(
+                f"{timings[phase] / size * 1e6:>22.2f}"
+                for phase in ("build", "iterate", "list_files", "render")
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""File tree build benchmark: DirectoryNode.build_tree on a large directory
+
+Creates --entries files on disk (d<i>/s<j>/f<k>.yaml, 100 files per
+subdirectory) plus an "output" directory of the same shape holding
+--entries / 4 generated files, then times build_tree:
+- all: every file, including the output directory;
+- pattern: only *.yaml files (the output directory holds .txt files);
+- exclude: all files with the output directory pruned;
+- workers_<n>: "exclude" with the top-level directories scanned on n threads.
+
+Usage:
+    python -m modules.benchmark.bench_tree --entries 200000 --workers 4 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.node.file_node import DirectoryNode
+
+# 每个子目录中的文件数和每个顶层目录中的子目录数
+FILES_PER_DIRECTORY = 100
+SUBDIRECTORIES = 10
+
+
+def create_files(directory: str, count: int, suffix: str) -> int:
+    """在directory下写入约count个空文件, 返回实际的文件数"""
+    per_top = FILES_PER_DIRECTORY * SUBDIRECTORIES
+    created = 0
+    for top_index in range(max(1, count // per_top)):
+        for sub_index in range(SUBDIRECTORIES):
+            sub_dir = os.path.join(directory, f"d{top_index}", f"s{sub_index}")
+            os.makedirs(sub_dir)
+            for file_index in range(FILES_PER_DIRECTORY):
+                open(os.path.join(sub_dir, f"f{file_index}{suffix}"), "w").close()
+                created += 1
+    return created
+
+
+def time_build(tree_path: str, repeat: int, **kwargs) -> Dict[str, object]:
+    """返回最快一次构建的耗时和节点数"""
+    best: Optional[float] = None
+    nodes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        root: DirectoryNode = DirectoryNode("").build_tree(tree_path, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        nodes = sum(1 for _ in root._iter_all_nodes()) - 1
+    return {"nodes": nodes, "seconds": round(best or 0.0, 4)}
+
+
+def run_benchmark(entries: int, workers: List[int], repeat: int = 3) -> List[Dict[str, object]]:
+    """在临时目录中创建文件并对每种构建方式计时, 返回结果行"""
+    work_dir = tempfile.mkdtemp(prefix="bench_tree_")
+    try:
+        create_files(work_dir, entries, ".yaml")
+        create_files(os.path.join(work_dir, "output"), entries // 4, ".txt")
+        cases: List[tuple] = [
+            ("all", {}),
+            ("pattern", {"patterns": ["*.yaml"]}),
+            ("exclude", {"exclude": ["output"]}),
+        ]
+        cases.extend(
+            (f"workers_{n}", {"exclude": ["output"], "workers": n}) for n in workers
+        )
+        rows: List[Dict[str, object]] = []
+        for name, kwargs in cases:
+            row: Dict[str, object] = {"case": name}
+            row.update(time_build(work_dir, repeat, **kwargs))
+            rows.append(row)
+        return rows
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def format_rows(rows: List[Dict[str, object]]) -> str:
+    lines = [f"{'case':<14}{'nodes':>10}{'seconds':>10}"]
+    for row in rows:
+        lines.append(f"{row['case']:<14}{row['nodes']:>10}{row['seconds']:>10.4f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="File tree build benchmark")
+    parser.add_argument("--entries", type=int, default=200000, help="数据文件数")
+    parser.add_argument(
+        "--workers", type=int, nargs="*", default=[4], help="并行扫描的线程数, 可指定多个"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数, 取最快一次")
+    parser.add_argument("--output", "-o", help="JSON结果输出路径")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.entries, args.workers, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main()
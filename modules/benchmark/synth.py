@@ -0,0 +1,180 @@
+"""Synthetic project generator for end-to-end benchmarks
+
+Creates YAML/template projects shaped like the v_ctr/v_var configuration
+trees: containers (ctr) carry identity fields and nest further containers or
+variables (var), variables carry attribute rows whose values are either plain
+strings or expression dicts evaluated by expr_filter.
+
+Layout of a generated project:
+    data/root<R>.yaml            一棵树的根容器
+    data/n/p<id>/n<cid>.yaml     节点<id>的子节点(有子节点的为ctr, 否则为var)
+    template/v_ctr.j2, template/v_var.j2
+"""
+
+import os
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import yaml
+
+V_CTR_TEMPLATE = """\
+<ctr name="{{ name }}" type="{{ type }}" uuid="{{ UUID }}">
+    <desc>{{ description }}</desc>
+{%- for attr in attributes %}
+    <attr name="{{ attr.name }}">{% if attr.value is mapping %}{{ attr.value | expr_filter }}{% else %}{{ attr.value }}{% endif %}</attr>
+{%- endfor %}
+    {{ CHILDREN_CONTEXT0 | indent(4) }}
+</ctr>
+"""
+
+V_VAR_TEMPLATE = """\
+<var name="{{ name }}" type="{{ type }}" uuid="{{ UUID }}" origin="{{ origin }}">
+    <desc>{{ description }}</desc>
+{%- for attr in attributes %}
+    <attr name="{{ attr.name }}">{% if attr.value is mapping %}{{ attr.value | expr_filter }}{% else %}{{ attr.value }}{% endif %}</attr>
+{%- endfor %}
+</var>
+"""
+
+
+@dataclass
+class SyntheticProjectConfig:
+    """合成项目参数
+
+    file_count:   生成的YAML文件总数(超过单棵树容量时生成多棵树)
+    depth:        每棵树的层数(根为第0层, 第depth层为变量叶子)
+    fan_out:      每个容器的子节点数
+    data_size:    每个节点的属性条目数
+    expr_density: 属性值为表达式的比例(0~1)
+    seed:         随机种子, 相同参数生成相同项目
+    """
+
+    file_count: int = 1000
+    depth: int = 3
+    fan_out: int = 10
+    data_size: int = 8
+    expr_density: float = 0.25
+    seed: int = 0
+
+    def validate(self) -> None:
+        if self.file_count < 1:
+            raise ValueError("file_count must be positive")
+        if self.depth < 1 or self.fan_out < 1:
+            raise ValueError("depth and fan_out must be positive")
+        if self.data_size < 0:
+            raise ValueError("data_size must not be negative")
+        if not 0.0 <= self.expr_density <= 1.0:
+            raise ValueError("expr_density must be between 0 and 1")
+
+
+@dataclass
+class SyntheticProject:
+    """生成结果, 用于构造DataDrivenGenerator"""
+
+    data_dir: str
+    template_dir: str
+    pattern: str
+    file_count: int
+    root_count: int
+
+
+def _make_attribute(rng: random.Random, index: int, expr_density: float) -> Dict[str, Any]:
+    if rng.random() < expr_density:
+        value: Any = {
+            "type": "function",
+            "args": ["math:square", rng.randint(0, 99)],
+        }
+    else:
+        value = "".join(rng.choice("abcdefghijklmnop") for _ in range(16))
+    return {"name": f"attr{index}", "value": value}
+
+
+def _make_node_data(
+    config: SyntheticProjectConfig,
+    rng: random.Random,
+    node_id: int,
+    children_path: List[str],
+) -> Dict[str, Any]:
+    kind = "ctr" if children_path else "var"
+    data: Dict[str, Any] = {
+        "TEMPLATE_PATH": f"v_{kind}.j2",
+        "CHILDREN_PATH": children_path,
+        "name": f"{kind}{node_id}",
+        "type": "IDENTIFIABLE" if kind == "ctr" else "INTEGER",
+        "UUID": "%032x" % rng.getrandbits(128),
+        "description": f"Synthetic {kind} {node_id}",
+        "attributes": [
+            _make_attribute(rng, index, config.expr_density)
+            for index in range(config.data_size)
+        ],
+    }
+    if kind == "var":
+        data["origin"] = "synthetic"
+    return data
+
+
+def _write_yaml(path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+
+
+def create_synthetic_project(
+    project_dir: str, config: SyntheticProjectConfig
+) -> SyntheticProject:
+    """在project_dir下生成合成项目"""
+    config.validate()
+    rng = random.Random(config.seed)
+    data_dir = os.path.join(project_dir, "data")
+    template_dir = os.path.join(project_dir, "template")
+
+    # 先按层序分配树形结构: children[id] 为该节点的子节点id列表
+    children: Dict[int, List[int]] = {}
+    file_paths: Dict[int, str] = {}
+    roots: List[int] = []
+    next_id = 0
+    while next_id < config.file_count:
+        root_id = next_id
+        next_id += 1
+        roots.append(root_id)
+        file_paths[root_id] = os.path.join(data_dir, f"root{len(roots) - 1}.yaml")
+        queue = deque([(root_id, 0)])
+        while queue and next_id < config.file_count:
+            node_id, level = queue.popleft()
+            if level >= config.depth:
+                continue
+            child_ids = []
+            for _ in range(config.fan_out):
+                if next_id >= config.file_count:
+                    break
+                child_ids.append(next_id)
+                file_paths[next_id] = os.path.join(
+                    data_dir, "n", f"p{node_id}", f"n{next_id}.yaml"
+                )
+                queue.append((next_id, level + 1))
+                next_id += 1
+            children[node_id] = child_ids
+
+    for node_id, file_path in file_paths.items():
+        children_path = []
+        if children.get(node_id):
+            child_dir = os.path.join(data_dir, "n", f"p{node_id}")
+            relative_dir = os.path.relpath(child_dir, os.path.dirname(file_path))
+            children_path.append(relative_dir.replace(os.sep, "/") + "/*.yaml")
+        _write_yaml(file_path, _make_node_data(config, rng, node_id, children_path))
+
+    os.makedirs(template_dir, exist_ok=True)
+    for name, content in (("v_ctr.j2", V_CTR_TEMPLATE), ("v_var.j2", V_VAR_TEMPLATE)):
+        with open(os.path.join(template_dir, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    return SyntheticProject(
+        data_dir=data_dir,
+        template_dir=template_dir,
+        pattern="root*.yaml",
+        file_count=len(file_paths),
+        root_count=len(roots),
+    )
+
@@ -6,7 +6,7 @@ import argparse
 import json
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 
 # 获取当前文件所在目录（modules目录）
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,6 +21,8 @@ sys.path.insert(0, code_dir)
 from modules.core.data_driven_generator import DataDrivenGenerator, DataDrivenGeneratorConfig
 from modules.core.types import DataHandlerType, TemplateHandlerType
 from modules.core import GeneratorError
+from modules.core.tracing import ChromeTraceExporter
+from modules.core.output_writer import OutputWriter
 
 def load_config(file_path: str) -> Dict[str, Any]:
     """加载配置文件并处理路径
@@ -57,6 +59,10 @@ def load_config(file_path: str) -> Dict[str, Any]:
                 root_path = Path(config['data_config']['root_path'])
                 if not root_path.is_absolute():
                     config['data_config']['root_path'] = str(config_dir / root_path)
+            if config['data_config'].get('parse_cache_dir'):
+                parse_cache_dir = Path(config['data_config']['parse_cache_dir'])
+                if not parse_cache_dir.is_absolute():
+                    config['data_config']['parse_cache_dir'] = str(config_dir / parse_cache_dir)
                     
         if 'template_config' in config:
             if 'template_dir' in config['template_config']:
@@ -68,27 +74,114 @@ def load_config(file_path: str) -> Dict[str, Any]:
             output_dir = Path(config['output_dir'])
             if not output_dir.is_absolute():
                 config['output_dir'] = str(config_dir / output_dir)
+
+        if 'render_cache_dir' in config:
+            render_cache_dir = Path(config['render_cache_dir'])
+            if not render_cache_dir.is_absolute():
+                config['render_cache_dir'] = str(config_dir / render_cache_dir)
+
+        if 'plan_cache_dir' in config:
+            plan_cache_dir = Path(config['plan_cache_dir'])
+            if not plan_cache_dir.is_absolute():
+                config['plan_cache_dir'] = str(config_dir / plan_cache_dir)
                 
         return config
         
     except Exception as e:
         raise ValueError(f"Failed to parse config file: {str(e)}")
 
-def save_output(output_dir: str, results: Dict[str, str], file_extension: str='txt') -> None:
-    """保存渲染结果到文件
+def _report_output(writer: OutputWriter, name: str) -> None:
+    """打印一个输出文件是否写入"""
+    file_path = writer.path_for(name)
+    if writer.written and writer.written[-1] == file_path:
+        print(f"Generated: {file_path}")
+    else:
+        print(f"Unchanged: {file_path}")
+
+def save_output(output_dir: str, results: Dict[str, str], file_extension: str='txt', writer: Optional[OutputWriter]=None) -> OutputWriter:
+    """保存渲染结果到文件, 内容未变化的文件不重写
     
     Args:
         output_dir: 输出目录
         results: 渲染结果字典，键为文件名，值为内容
+        writer: 可复用的输出写入器, 用于汇总多个模式的写入/跳过统计
     """
-    out_path = Path(output_dir)
-    out_path.mkdir(parents=True, exist_ok=True)
+    writer = writer or OutputWriter(output_dir, file_extension)
     
     for name, content in results.items():
-        file_path = out_path / f"{name}.{file_extension}"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"Generated: {file_path}")
+        writer.write(name, content)
+        _report_output(writer, name)
+    return writer
+
+def save_output_stream(output_dir: str, generator: DataDrivenGenerator, pattern: str, file_extension: str='txt', writer: Optional[OutputWriter]=None) -> OutputWriter:
+    """流式渲染并直接写入文件, 不在内存中保留完整的渲染结果
+    
+    Args:
+        output_dir: 输出目录
+        generator: 数据驱动生成器
+        pattern: 用于查找数据文件的模式
+        writer: 可复用的输出写入器
+    """
+    writer = writer or OutputWriter(output_dir, file_extension)
+    
+    for name in generator.render_to(pattern, writer.open_sink):
+        _report_output(writer, name)
+    return writer
+
+def save_output_pipeline(output_dir: str, generator: DataDrivenGenerator, pattern: str, file_extension: str='txt', writer: Optional[OutputWriter]=None) -> OutputWriter:
+    """以 加载 -> 渲染 -> 写入 流水线渲染并写入文件, 三个阶段相互重叠
+    
+    Args:
+        output_dir: 输出目录
+        generator: 数据驱动生成器
+        pattern: 用于查找数据文件的模式
+        writer: 可复用的输出写入器
+    """
+    writer = writer or OutputWriter(output_dir, file_extension)
+    
+    names = generator.render_pipeline(pattern, writer.open_sink)
+    # 写入线程已结束, 按名称查找每个文件的结果
+    written = set(writer.written)
+    for name in names:
+        file_path = writer.path_for(name)
+        print(f"{'Generated' if file_path in written else 'Unchanged'}: {file_path}")
+    return writer
+
+def save_output_sharded(output_dir: str, generator: DataDrivenGenerator, pattern: str, jobs: int, executor=None, file_extension: str='txt', writer: Optional[OutputWriter]=None) -> OutputWriter:
+    """在多个worker进程中渲染根节点, 主进程按完成顺序写入文件
+    
+    Args:
+        output_dir: 输出目录
+        generator: 数据驱动生成器
+        pattern: 用于查找数据文件的模式
+        jobs: worker进程数
+        executor: 可复用的进程池, 由 generator.create_worker_pool 创建
+        writer: 可复用的输出写入器
+    """
+    writer = writer or OutputWriter(output_dir, file_extension)
+    
+    for name, content in generator.render_sharded(pattern, jobs, executor):
+        with generator.tracer.phase("write", name):
+            writer.write(name, content)
+        _report_output(writer, name)
+    return writer
+
+def save_plans(output_path: str, generator: DataDrivenGenerator, patterns) -> None:
+    """编译每个模式的渲染计划并写入JSON文件(不渲染)
+    
+    Args:
+        output_path: 输出文件路径
+        generator: 数据驱动生成器
+        patterns: 数据文件查找模式列表
+    """
+    plans = []
+    for pattern in patterns:
+        plan = generator.compile_plan(pattern)
+        print(f"Plan for {pattern}: {len(plan.nodes)} nodes, {len(plan.roots)} roots")
+        plans.append(plan.to_dict())
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"plans": plans}, f, ensure_ascii=False, indent=2)
+    print(f"Plan written: {output_path}")
 
 def main():
     """命令行入口函数"""
@@ -116,20 +209,73 @@ data_type: yaml
 data_config:
     root_path: path/to/yaml/files
     file_pattern: ["*.yaml"]
+    parse_cache_dir: path/to/parsed  # 可选, 数据文件解析结果缓存目录
+    exclude_pattern: [".git", "output"]  # 可选, 构建文件树时跳过的文件和目录
 template_type: jinja
 template_config:
     template_dir: path/to/templates
 patterns: ["root.yaml", "**/*.yaml"]
 output_dir: path/to/output
+render_cache_dir: path/to/cache  # 可选, 渲染结果缓存目录
+render_cache_max_entries: 10000  # 可选, 渲染结果缓存保留的最大条目数
+plan_cache_dir: path/to/plans  # 可选, 渲染计划缓存目录
 """)
     
     parser.add_argument(
         'config',
         help='配置文件路径 (支持.json或.yaml/.yml)'
     )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='流式渲染, 根节点的输出边渲染边写入文件'
+    )
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='流水线渲染, 加载/渲染/写入三个阶段重叠执行'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        metavar='N',
+        help='将根节点分配到N个worker进程渲染, 结果在主进程中写入'
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        metavar='CHARS',
+        help='子节点渲染结果在内存中保留的最大字符数, 超出部分写入临时文件'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不读写任何缓存 (解析结果, 渲染结果和渲染计划缓存)'
+    )
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='渲染前清空渲染结果缓存'
+    )
+    parser.add_argument(
+        '--plan',
+        metavar='OUT_JSON',
+        help='只编译各模式的渲染计划并写入JSON文件, 不渲染'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='OUT_JSON',
+        help='将各阶段耗时写入Chrome trace-event JSON文件 (chrome://tracing)'
+    )
     
     args = parser.parse_args()
+    if args.jobs > 1 and (args.stream or args.pipeline):
+        parser.error('--jobs N (N > 1) cannot be combined with --stream or --pipeline')
     
+    generator = None
+    worker_pool = None
+    trace_exporter = None
     try:
         # 1. 加载配置
         config = load_config(args.config)
@@ -144,25 +290,60 @@ output_dir: path/to/output
         if missing:
             raise ValueError(f"Missing required fields: {', '.join(missing)}")
         
+        if args.no_cache:
+            config['data_config'].pop('parse_cache_dir', None)
+            config.pop('render_cache_dir', None)
+            config.pop('plan_cache_dir', None)
+        
         # 3. 创建生成器配置
         gen_config = DataDrivenGeneratorConfig(
             data_type=DataHandlerType(config['data_type']),
             data_config=config['data_config'],
             template_type=TemplateHandlerType(config['template_type']),
-            template_config=config['template_config']
+            template_config=config['template_config'],
+            cache_dir=config.get('render_cache_dir'),
+            cache_max_entries=config.get('render_cache_max_entries'),
+            memory_budget=args.memory_budget,
+            plan_cache_dir=config.get('plan_cache_dir')
         )
         
         # 4. 初始化生成器
         generator = DataDrivenGenerator(gen_config)
+        if args.clear_cache and generator.render_cache is not None:
+            removed = generator.render_cache.clear()
+            print(f"Render cache cleared: {removed} entries")
+        if args.trace:
+            trace_exporter = ChromeTraceExporter()
+            generator.add_hook(trace_exporter)
         print("\n==============Serialized File Tree==============")
         print(generator.data_handler.file_tree.serialize_tree())
+        if args.plan:
+            save_plans(args.plan, generator, config['patterns'])
+            return
+        # worker进程池在所有模式之间复用, 每个worker只初始化一次
+        worker_pool = generator.create_worker_pool(args.jobs) if args.jobs > 1 else None
+        # 所有模式共用一个写入器, 最后汇总写入/跳过的文件数
+        file_extension = config.get('output_file_extension', 'txt')
+        writer = OutputWriter(config['output_dir'], file_extension)
         # 5. 处理每个模式
         for pattern in config['patterns']:
             print(f"\nProcessing pattern: {pattern}")
+            if worker_pool is not None:
+                save_output_sharded(config['output_dir'], generator, pattern, args.jobs, worker_pool, file_extension=file_extension, writer=writer)
+                continue
+            if args.stream:
+                save_output_stream(config['output_dir'], generator, pattern, file_extension=file_extension, writer=writer)
+                continue
+            if args.pipeline:
+                save_output_pipeline(config['output_dir'], generator, pattern, file_extension=file_extension, writer=writer)
+                continue
             results = generator.render(pattern)
             
             # 6. 保存结果
-            save_output(config['output_dir'], results, file_extension=config.get('output_file_extension', 'txt'))
+            with generator.tracer.phase("write", pattern):
+                save_output(config['output_dir'], results, file_extension=file_extension, writer=writer)
+        
+        print(f"\nOutput: {writer.summary()}")
             
     except (ValueError, GeneratorError) as e:
         print(f"Error: {str(e)}", file=sys.stderr)
@@ -170,6 +351,18 @@ output_dir: path/to/output
     except Exception as e:
         print(f"Unexpected error: {str(e)}", file=sys.stderr)
         sys.exit(2)
+    finally:
+        if worker_pool is not None:
+            worker_pool.shutdown()
+        if generator is not None:
+            generator.data_handler.close()
+        # 失败的运行同样写出追踪, 便于定位出错前的各阶段
+        if trace_exporter is not None:
+            try:
+                trace_exporter.write(args.trace)
+                print(f"Trace written: {args.trace}")
+            except OSError as e:
+                print(f"Failed to write trace: {str(e)}", file=sys.stderr)
 
 if __name__ == '__main__':
     main()
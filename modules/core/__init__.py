@@ -16,6 +16,8 @@ from pathlib import Path
 from ..node.data_node import DataNode
 from ..jinja.user_func.func_handler import UserFunctionResolver
 from modules.node.file_node import DirectoryNode
+from .render_plan import RenderPlan
+from .tracing import Tracer
 
 
 @runtime_checkable
@@ -35,12 +37,14 @@ class DataHandler(Protocol):
 
     所有的数据处理器必须实现以下方法:
     - create_data_tree: 从指定模式创建数据树
+    - iter_data_trees: 逐个构建并产出数据树
     - get_data_nodes: 根据文件路径模式查找数据节点
     - get_absolute_path: 获取节点的绝对路径
     """
 
     file_tree: DirectoryNode  # 文件树
     config: Dict[str, Any]  # 配置
+    tracer: Tracer  # 追踪器
 
     @property
     def preserved_template_key(self) -> str:
@@ -74,6 +78,20 @@ class DataHandler(Protocol):
         """
         ...
 
+    def iter_data_trees(self, pattern: str) -> Iterator[DataNode]:
+        """逐个构建并产出匹配模式的数据树
+
+        与 create_data_tree 结果相同, 但每棵树构建完成后立即产出,
+        调用方可以在构建下一棵树的同时处理当前树。
+
+        Args:
+            pattern: 文件路径模式，如 "root.yaml" 或 "**/root/*.yaml"
+
+        Yields:
+            DataNode: 构建完成的数据树
+        """
+        ...
+
     def find_by_file_path(self, node: DataNode, pattern: str) -> List[DataNode]:
         """根据 文件 路径模式查找数据节点
 
@@ -96,11 +114,43 @@ class DataHandler(Protocol):
         """
         ...
 
+    def get_source_path(self, node: DataNode) -> str:
+        """获取节点对应的数据文件相对于数据根目录的路径
+
+        Args:
+            node: 数据节点
+
+        Returns:
+            str: 以"/"分隔的相对路径
+        """
+        ...
+
+    def get_input_stats(self) -> Dict[str, List[int]]:
+        """获取数据根目录下所有目录和数据文件的 [mtime_ns, size], 用于判断渲染计划是否失效"""
+        ...
+
+    def create_data_tree_from_plan(self, plan: RenderPlan) -> List[DataNode]:
+        """按渲染计划创建数据树, 不再解析子节点模式
+
+        Args:
+            plan: 仍然有效的渲染计划
+
+        Returns:
+            List[DataNode]: 与 create_data_tree 相同的数据树列表
+        """
+        ...
+
+    def close(self) -> None:
+        """释放处理器持有的资源(如预解析进程池)"""
+        ...
+
 
 @runtime_checkable
 class TemplateHandler(Protocol):
     """Protocol for template handlers"""
 
+    tracer: Tracer  # 追踪器
+
     # @property
     # def preserved_children_key_prefix(self) -> str:
     #     """子节点的键名前缀, 用于在模板中所使用的标记子节点内容位置
@@ -119,6 +169,26 @@ class TemplateHandler(Protocol):
         """
         ...
         
+    def get_template_fingerprint(self, template_path: str) -> str:
+        """Fingerprint of a template and every template it references
+
+        Args:
+            template_path: Path to the template file
+        Returns:
+            str: Digest that changes whenever the template sources change
+        """
+        ...
+
+    def get_template_dependencies(self, template_path: str) -> List[str]:
+        """Templates a template depends on, starting with the template itself
+
+        Args:
+            template_path: Path to the template file
+        Returns:
+            List[str]: The template and every template it references
+        """
+        ...
+
     def render_template(
         self, template_path: str, node: DataNode, data_handler: DataHandler
     ) -> str:
@@ -133,6 +203,20 @@ class TemplateHandler(Protocol):
         """
         ...
 
+    def generate_template(
+        self, template_path: str, node: DataNode, data_handler: DataHandler
+    ) -> Iterator[str]:
+        """Render a template with data chunk by chunk
+
+        Args:
+            template_path: Path to the template file
+            node: Data node to render the template with
+            data_handler: Data handler of the node
+        Returns:
+            Iterator[str]: Chunks of the rendered template
+        """
+        ...
+
 
 class GeneratorErrorType(Enum):
     """Error types for generator"""
@@ -151,6 +235,10 @@ class GeneratorError(Exception):
         self.message = message
         super().__init__(f"{error_type.value}: {message}")
 
+    def __reduce__(self) -> Any:
+        # 保证异常能在渲染子进程与主进程之间传递
+        return (self.__class__, (self.error_type, self.message))
+
 
 def validate_data_handler(handler: Any) -> None:
     """验证数据处理器是否实现了所有必要的方法
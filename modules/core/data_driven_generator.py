@@ -1,7 +1,34 @@
 """Data-driven generator module for Jinja Template"""
 
-from typing import Dict, Any, List, Tuple, Union
-from dataclasses import dataclass
+from typing import (
+    Dict,
+    Any,
+    List,
+    Tuple,
+    Union,
+    Optional,
+    Iterator,
+    AsyncIterator,
+    Callable,
+    IO,
+    Set,
+    cast,
+)
+from dataclasses import dataclass, replace
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import uuid
+import weakref
 from . import (
     GeneratorError,
     GeneratorErrorType,
@@ -11,6 +38,11 @@ from . import (
     validate_render_result,
 )
 from .handler_factory import HandlerFactory
+from .pipeline import END, Pipeline
+from .render_cache import RenderCache
+from .render_plan import PlanNode, RenderPlan, RENDER_PLAN_VERSION
+from .spill import SpilledOutput, SpillStore
+from .tracing import Tracer, TraceHook
 from .types import DataHandlerType, TemplateHandlerType
 from ..node.data_node import DataNode
 from ..jinja.user_func.func_handler import UserFunctionInfo, UserFunctionResolver
@@ -24,6 +56,91 @@ class DataDrivenGeneratorConfig:
     data_config: Dict[str, Any]
     template_type: TemplateHandlerType
     template_config: Dict[str, Any]
+    max_workers: Optional[int] = None  # 并行渲染子树的进程数, None或1表示串行渲染
+    cache_dir: Optional[str] = None  # 渲染结果缓存目录, None表示不使用缓存
+    # 渲染结果缓存保留的最大条目数, 每次渲染结束时删除最久未使用的条目; None表示不限制
+    cache_max_entries: Optional[int] = None
+    # 子节点渲染结果在内存中保留的最大字符数, 超出部分写入临时文件; None表示不限制
+    memory_budget: Optional[int] = None
+    # 渲染计划缓存目录, 输入文件未变化时按缓存的计划创建数据树; None表示不使用
+    plan_cache_dir: Optional[str] = None
+
+# 缓存键格式版本, 键的计算方式变化时递增以使旧缓存失效
+RENDER_CACHE_VERSION = "1"
+
+# 等待进程池中的子树时检查取消请求的间隔(秒)
+CANCEL_POLL_INTERVAL = 0.05
+
+
+# 进程池中每个worker持有的生成器, 以及为当前渲染批次构建的数据树
+_worker_generator: Optional["DataDrivenGenerator"] = None
+# 当前数据树所属的 (批次标识, pattern); 标识由每次 render_sharded / 并行子树渲染生成
+_worker_batch: Optional[Tuple[str, str]] = None
+_worker_trees: List[DataNode] = []
+
+
+def _init_worker(config: DataDrivenGeneratorConfig) -> None:
+    """进程池worker初始化: 每个worker只创建一次处理器(Jinja环境, 插件等)"""
+    global _worker_generator, _worker_batch
+    # worker各自构建数据树, 不再启动预解析进程池
+    _worker_generator = DataDrivenGenerator(
+        replace(
+            config,
+            max_workers=None,
+            data_config={**config.data_config, "prefetch_workers": None},
+        )
+    )
+    _worker_batch = None
+    _worker_trees.clear()
+
+
+def _build_worker_trees(pattern: str, batch: str) -> None:
+    """在worker中构建pattern的数据树, 同一批次内只构建一次
+
+    批次或pattern变化时丢弃之前的数据树和渲染结果重新构建: 数据文件可能已被修改,
+    而且数据处理器的节点映射只对应最近一次构建的数据树。
+    """
+    global _worker_batch
+    generator = _worker_generator
+    if generator is None:
+        raise GeneratorError(
+            GeneratorErrorType.RENDER_ERROR, "Render worker is not initialized"
+        )
+    if _worker_batch != (batch, pattern):
+        _worker_batch = None
+        _worker_trees.clear()
+        generator._reset_outputs()
+        _worker_trees.extend(generator._build_trees(pattern))
+        if generator.render_cache is not None:
+            generator._cache_keys = generator._compute_cache_keys(_worker_trees)
+        _worker_batch = (batch, pattern)
+
+
+def _render_subtree(pattern: str, batch: str, index_path: Tuple[int, ...]) -> str:
+    """在worker中渲染一棵子树并返回其根节点的渲染结果
+
+    worker按pattern重建完整的数据树(保证跨文件引用与串行渲染一致),
+    然后通过index_path(根索引, 子节点索引...)定位子树根节点。
+    结果返回后即释放, worker的内存不随已渲染的子树增长。
+    """
+    generator = _worker_generator
+    if generator is None:
+        raise GeneratorError(
+            GeneratorErrorType.RENDER_ERROR, "Render worker is not initialized"
+        )
+    _build_worker_trees(pattern, batch)
+
+    node = _worker_trees[index_path[0]]
+    for child_index in index_path[1:]:
+        node = node.children[child_index]
+
+    try:
+        if generator.render_cache is not None:
+            generator._load_cached_outputs([node])
+        generator._process_node(node)
+        return generator._get_output(node)
+    finally:
+        generator._rendered_contents.clear()
 
 
 class DataDrivenGenerator:
@@ -40,6 +157,7 @@ class DataDrivenGenerator:
         Args:
             config: Configuration for data and template handlers
         """
+        self.config = config
         self.data_handler = HandlerFactory.create_data_handler(
             config.data_type, config.data_config
         )
@@ -47,8 +165,51 @@ class DataDrivenGenerator:
             config.template_type, config.template_config
         )
 
+        # 追踪器, 与数据处理器和模板处理器共享
+        self.tracer = Tracer()
+        self.data_handler.tracer = self.tracer
+        self.template_handler.tracer = self.tracer
+
         # 存储渲染结果的映射
-        self._rendered_contents: Dict[DataNode, str] = {}
+        self._rendered_contents: Dict[DataNode, Union[str, SpilledOutput]] = {}
+
+        # 渲染结果的持久化缓存及当前数据树各节点的缓存键
+        self.render_cache: Optional[RenderCache] = (
+            RenderCache(config.cache_dir, max_entries=config.cache_max_entries)
+            if config.cache_dir
+            else None
+        )
+        self._cache_keys: Dict[DataNode, str] = {}
+
+        # 流式渲染时记录每个节点尚未渲染的父节点数量, 降为0时释放其渲染结果;
+        # None表示保留所有渲染结果
+        self._pending_parents: Optional[Dict[DataNode, int]] = None
+        # 不会被释放的渲染结果(根节点)
+        self._retained_outputs: Set[DataNode] = set()
+
+        # 设置了内存预算时, 超出预算的子节点渲染结果写入临时文件
+        self._spill: Optional[SpillStore] = (
+            SpillStore(config.memory_budget) if config.memory_budget is not None else None
+        )
+
+        # 异步渲染: 同一生成器上的请求依次执行; 取消时通知执行中的渲染在下一个节点处停止。
+        # asyncio.Lock 绑定创建它的事件循环, 因此每个事件循环各用一个
+        self._async_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._cancel_event = threading.Event()
+
+    def add_hook(self, hook: TraceHook) -> None:
+        """注册追踪钩子
+
+        钩子会收到节点开始/结束以及各阶段(build_tree, parse, create_resolver,
+        get_template, render)开始/结束的事件。进程池worker中的事件不会被追踪。
+        """
+        self.tracer.add_hook(hook)
+
+    def remove_hook(self, hook: TraceHook) -> None:
+        """移除追踪钩子"""
+        self.tracer.remove_hook(hook)
 
     def render(self, pattern: str) -> Dict[str, str]:
         """渲染模板并返回结果
@@ -62,44 +223,866 @@ class DataDrivenGenerator:
         Raises:
             GeneratorError: 如果数据验证或渲染失败
         """
-        # 清空之前的渲染结果
-        self._rendered_contents.clear()
         results = {}
 
+        try:
+            # 1. 创建数据树, 处理缓存及并行子树
+            trees = self._prepare_trees(pattern)
+
+            # 2. 对每个树进行后序遍历和渲染(已渲染的子树会被跳过)
+            for tree in trees:
+                self._process_node(tree)
+                key = f"{tree.name}"
+                results[key] = self._get_output(tree)
+        finally:
+            self._finish_release()
+
+        if not results:
+            raise GeneratorError(
+                GeneratorErrorType.RENDER_ERROR, "No templates were rendered"
+            )
+
+        return results
+
+    def render_stream(self, pattern: str) -> Iterator[Tuple[str, Iterator[str]]]:
+        """流式渲染模板
+
+        根节点通过模板处理器的 generate_template 分块生成, 不在内存中拼接完整结果;
+        子节点的渲染结果在其父节点渲染完成后立即释放。由于模板中的过滤器(如indent)
+        需要完整字符串, 根节点的直接子节点输出仍会在根节点渲染期间保留。
+
+        Args:
+            pattern: 用于查找数据文件的模式，如 "root.yaml"
+
+        Yields:
+            Tuple[str, Iterator[str]]: (文件名, 渲染结果分块迭代器),
+                必须先消费完分块迭代器再获取下一个根节点
+
+        Raises:
+            GeneratorError: 如果数据验证或渲染失败
+        """
+        try:
+            trees = self._prepare_trees(pattern, release=True)
+            for tree in trees:
+                yield f"{tree.name}", self._generate_root(tree)
+        finally:
+            self._finish_release()
+
+    def render_to(
+        self, pattern: str, sink_factory: Callable[[str], IO[str]]
+    ) -> List[str]:
+        """流式渲染并将每个根节点的结果写入文件类对象
+
+        Args:
+            pattern: 用于查找数据文件的模式，如 "root.yaml"
+            sink_factory: 根据文件名打开可写文本流的函数, 写入完成后由生成器关闭
+
+        Returns:
+            List[str]: 已写入的文件名列表
+        """
+        names = []
+        for name, chunks in self.render_stream(pattern):
+            with sink_factory(name) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
+            names.append(name)
+        return names
+
+    async def render_async(
+        self, pattern: str, executor: Optional[Executor] = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """异步渲染, 按顺序产出每个根节点的 (文件名, 渲染结果)
+
+        构建数据树和渲染每个根节点都在executor(默认为事件循环的默认线程池)中执行,
+        不阻塞事件循环; 每个根节点渲染完成后立即产出。
+        同一生成器上的多个请求共享数据树和渲染状态, 因此依次执行;
+        需要同时服务多个请求时可为每个项目创建独立的生成器。
+        消费该迭代器的任务被取消时, 执行中的工作在下一个检查点停止(构建数据树时的下一棵树,
+        渲染时的下一个节点, 并行渲染子树时尚未开始的子树不再执行),
+        之后本方法才释放生成器, 抛出 asyncio.CancelledError。
+        生成器可以在多个事件循环中先后使用(例如多次 asyncio.run)。
+
+        Args:
+            pattern: 用于查找数据文件的模式，如 "root.yaml"
+            executor: 执行阻塞工作的执行器, None表示使用事件循环的默认执行器
+
+        Yields:
+            Tuple[str, str]: (文件名, 渲染结果)
+
+        Raises:
+            GeneratorError: 如果数据验证或渲染失败
+        """
+        loop = asyncio.get_running_loop()
+        lock = self._async_locks.get(loop)
+        if lock is None:
+            lock = self._async_locks[loop] = asyncio.Lock()
+        async with lock:
+            self._cancel_event.clear()
+            try:
+                trees = await self._run_in_executor(
+                    loop, executor, self._prepare_async, pattern
+                )
+                for tree in trees:
+                    content = await self._run_in_executor(
+                        loop, executor, self._render_root, tree
+                    )
+                    yield f"{tree.name}", content
+            finally:
+                self._finish_release()
+                self._cancel_event.clear()
+
+    async def _run_in_executor(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        executor: Optional[Executor],
+        func: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        """在执行器中运行一个渲染步骤, 被取消时等待该步骤停止后再抛出CancelledError"""
+        future = loop.run_in_executor(executor, func, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self._cancel_event.set()
+            await asyncio.wait([future])
+            if not future.cancelled():
+                future.exception()  # 取消导致的错误不再上报
+            raise
+
+    def _prepare_async(self, pattern: str) -> List[DataNode]:
+        """异步渲染的准备步骤: 创建数据树并统计父节点引用"""
+        return self._prepare_trees(pattern, release=True)
+
+    def _render_root(self, tree: DataNode) -> str:
+        """渲染一个根节点及其子树并返回结果"""
+        self._process_node(tree)
+        return self._get_output(tree)
+
+    def render_pipeline(
+        self,
+        pattern: str,
+        sink_factory: Callable[[str], IO[str]],
+        queue_size: int = 2,
+    ) -> List[str]:
+        """以 加载 -> 渲染 -> 写入 三级流水线渲染并写入每个根节点的结果
+
+        加载线程逐个构建数据树, 当前线程渲染, 写入线程将结果写入sink,
+        三个阶段通过容量为queue_size的队列相连: 渲染当前根节点的同时加载下一个根节点,
+        写入与二者重叠; 队列满时上游阶段等待, 在途的数据树和渲染结果数量因此有上限。
+        子节点的渲染结果在父节点渲染完成后释放, 根节点的结果交给写入线程后释放。
+
+        与 render 的区别:
+        - 插件通过 find_by_file_path 引用的尚未加载的文件在渲染线程中按需解析,
+          与加载线程的构建通过数据处理器的锁互斥
+        - 被之前的根节点引用过的节点其结果已释放, 会再次渲染(结果相同)
+        - 不使用进程池(max_workers)
+
+        Args:
+            pattern: 用于查找数据文件的模式，如 "root.yaml"
+            sink_factory: 根据文件名打开可写文本流的函数, 在写入线程中调用, 写入完成后关闭
+            queue_size: 每个阶段之间队列的容量
+
+        Returns:
+            List[str]: 已写入的文件名列表(按写入顺序)
+
+        Raises:
+            GeneratorError: 如果没有匹配的数据文件或渲染失败
+        """
+        self._reset_outputs()
+        self._pending_parents = {}
+        self._retained_outputs = set()
+
+        pipeline = Pipeline(queue_size)
+        trees_queue = pipeline.new_queue()
+        outputs_queue = pipeline.new_queue()
+        names: List[str] = []
+
+        def load_trees() -> Iterator[DataNode]:
+            trees = self.data_handler.iter_data_trees(pattern)
+            while True:
+                with self.tracer.phase("build_tree", pattern):
+                    tree = next(trees, None)
+                if tree is None:
+                    return
+                yield tree
+
+        def write_output(item: Tuple[str, str]) -> None:
+            name, content = item
+            with self.tracer.phase("write", name):
+                with sink_factory(name) as sink:
+                    sink.write(content)
+            names.append(name)
+
+        pipeline.produce("load", load_trees, trees_queue)
+        pipeline.consume("write", outputs_queue, write_output)
+        try:
+            while True:
+                tree = pipeline.get(trees_queue)
+                if tree is END:
+                    break
+                content = self._render_pipeline_tree(tree)
+                if not pipeline.put(outputs_queue, (f"{tree.name}", content)):
+                    break
+            pipeline.put(outputs_queue, END)
+        except BaseException as e:
+            pipeline.fail(e)
+        finally:
+            # 等待所有阶段结束后再检查错误, 保证加载和写入阶段的错误已记录
+            pipeline.join()
+            self._finish_release()
+            self._rendered_contents.clear()
+        pipeline.raise_error()
+
+        if not names:
+            raise GeneratorError(
+                GeneratorErrorType.DATA_INIT_ERROR,
+                f"No data files found matching pattern: {pattern}",
+            )
+        return names
+
+    def _render_pipeline_tree(self, tree: DataNode) -> str:
+        """流水线渲染阶段: 渲染一棵数据树并返回根节点的结果"""
+        if self.render_cache is not None:
+            self._cache_keys.update(self._compute_cache_keys([tree]))
+            self._load_cached_outputs([tree])
+
+        # 只统计本次需要渲染的节点对子节点的引用, 已有结果的子树不会再访问
+        pending_parents = cast(Dict[DataNode, int], self._pending_parents)
+        visited: Set[DataNode] = set()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node in visited or node in self._rendered_contents:
+                continue
+            visited.add(node)
+            for child in node.children:
+                if isinstance(child, DataNode):
+                    pending_parents[child] = pending_parents.get(child, 0) + 1
+                    stack.append(child)
+
+        self._process_node(tree)
+        content = self._get_output(tree)
+        if pending_parents.get(tree, 0) <= 0:
+            self._discard_output(tree)
+        return content
+
+    def create_worker_pool(self, jobs: int) -> ProcessPoolExecutor:
+        """创建渲染进程池
+
+        每个worker只初始化一次处理器(Jinja环境, 插件等), 因此进程池可在多次
+        render_sharded 调用之间复用。worker的数据树只在一次调用内复用,
+        每次调用都会重新构建, 调用之间数据文件的修改会反映在结果中。
+
+        Args:
+            jobs: worker进程数
+        """
+        return ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(self.config,),
+        )
+
+    def render_sharded(
+        self,
+        pattern: str,
+        jobs: int,
+        executor: Optional[ProcessPoolExecutor] = None,
+    ) -> Iterator[Tuple[str, str]]:
+        """将根节点分配到多个worker进程渲染, 按完成顺序产出 (文件名, 渲染结果)
+
+        主进程构建数据树以确定各根节点子树的大小, 同时各worker构建自己的数据树;
+        子树最大的根节点最先派发, 避免最后才开始的大子树拖长总时间。
+        多个根节点同名时只渲染最后一个(与 render 的结果中后者覆盖前者一致)。
+        命中渲染缓存的根节点直接产出, 不再派发。
+
+        Args:
+            pattern: 用于查找数据文件的模式，如 "**/*.yaml"
+            jobs: worker进程数(executor为None时用于创建进程池, 否则用于预热worker)
+            executor: 由 create_worker_pool 创建的进程池, None表示临时创建
+
+        Yields:
+            Tuple[str, str]: (文件名, 渲染结果)
+
+        Raises:
+            GeneratorError: 如果没有匹配的数据文件或渲染失败
+        """
+        own_executor = executor is None
+        pool = self.create_worker_pool(jobs) if executor is None else executor
+        futures: Dict[Any, DataNode] = {}
+        batch = uuid.uuid4().hex
+        try:
+            # worker构建数据树与主进程构建数据树同时进行
+            for _ in range(jobs):
+                pool.submit(_build_worker_trees, pattern, batch)
+            trees = self._prepare_trees(pattern, parallel=False)
+
+            for index in self._shard_order(trees):
+                tree = trees[index]
+                if tree in self._rendered_contents:
+                    yield f"{tree.name}", self._get_output(tree)
+                    continue
+                futures[pool.submit(_render_subtree, pattern, batch, (index,))] = tree
+
+            for future in as_completed(futures):
+                tree = futures[future]
+                try:
+                    content = future.result()
+                except GeneratorError:
+                    raise
+                except Exception as e:
+                    raise GeneratorError(
+                        GeneratorErrorType.RENDER_ERROR,
+                        f"Failed to render {tree.name}: {str(e)}",
+                    )
+                yield f"{tree.name}", content
+        finally:
+            for future in futures:
+                future.cancel()
+            if own_executor:
+                pool.shutdown()
+            self._finish_release()
+
+    @staticmethod
+    def _shard_order(trees: List[DataNode]) -> List[int]:
+        """返回需要渲染的根节点索引, 按子树节点数从大到小排列
+
+        同名的根节点只保留最后一个。
+        """
+        last_index = {f"{tree.name}": index for index, tree in enumerate(trees)}
+        selected = [
+            index for index, tree in enumerate(trees) if last_index[f"{tree.name}"] == index
+        ]
+        sizes = {
+            index: sum(1 for _ in trees[index].iter_data_nodes()) for index in selected
+        }
+        return sorted(selected, key=lambda index: sizes[index], reverse=True)
+
+    def _prepare_trees(
+        self, pattern: str, parallel: bool = True, release: bool = False
+    ) -> List[DataNode]:
+        """创建数据树, 加载缓存结果并在进程池中渲染独立子树
+
+        Args:
+            pattern: 用于查找数据文件的模式
+            parallel: 为False时不在进程池中渲染子树(max_workers不生效)
+            release: 为True时子节点的渲染结果在父节点渲染完成后释放;
+                设置了内存预算时总是释放
+
+        Raises:
+            GeneratorError: 如果没有匹配的数据文件
+        """
+        # 清空之前的渲染结果
+        self._reset_outputs()
+
         # 1. 创建数据树
-        trees = self.data_handler.create_data_tree(pattern)
+        with self.tracer.phase("build_tree", pattern):
+            trees = self._build_trees(pattern)
         if not trees:
             raise GeneratorError(
                 GeneratorErrorType.DATA_INIT_ERROR,
                 f"No data files found matching pattern: {pattern}",
             )
 
-        # 2. 对每个树进行后序遍历和渲染
+        # 只保留根节点的结果, 其余结果在所有父节点渲染完成后释放
+        if release or self._spill is not None:
+            self._pending_parents = self._count_parents(trees)
+            self._retained_outputs = set(trees)
+
+        # 2. 使用缓存时, 命中缓存的子树直接复用结果, 不再渲染
+        if self.render_cache is not None:
+            self._cache_keys = self._compute_cache_keys(trees)
+            self._load_cached_outputs(trees)
+        self._check_cancelled()
+
+        # 3. 并行模式下先在进程池中渲染相互独立的子树
+        if (
+            parallel
+            and self.config.max_workers is not None
+            and self.config.max_workers > 1
+        ):
+            self._render_subtrees_parallel(pattern, trees, self.config.max_workers)
+
+        return trees
+
+    def compile_plan(self, pattern: str) -> RenderPlan:
+        """编译渲染计划: 构建数据树但不渲染
+
+        计划包含按渲染顺序排列的节点, 各节点的模板及依赖的模板, 子节点组的链接关系,
+        以及判断计划是否失效所需的输入文件状态, 可以序列化为JSON。
+
+        Args:
+            pattern: 用于查找数据文件的模式，如 "root.yaml"
+
+        Returns:
+            RenderPlan: 渲染计划
+        """
+        inputs = self.data_handler.get_input_stats()
+        with self.tracer.phase("build_tree", pattern):
+            trees = self.data_handler.create_data_tree(pattern)
+        return self._plan_from_trees(pattern, trees, inputs)
+
+    def _build_trees(self, pattern: str) -> List[DataNode]:
+        """创建数据树
+
+        设置了 plan_cache_dir 时, 缓存的计划仍然有效则按计划创建数据树(不解析子节点模式),
+        否则完整构建并保存新的计划。
+        """
+        if self.config.plan_cache_dir is None:
+            return self._collect_trees(pattern)
+
+        config_key = self._plan_config_key(pattern)
+        plan_path = os.path.join(self.config.plan_cache_dir, config_key[:32] + ".json")
+        plan = RenderPlan.load(plan_path)
+        if plan is not None and plan.config_key == config_key and plan.is_current():
+            return self.data_handler.create_data_tree_from_plan(plan)
+
+        # 先记录输入文件状态再构建, 构建期间被修改的文件会使计划在下次失效
+        inputs = self.data_handler.get_input_stats()
+        trees = self._collect_trees(pattern)
+        try:
+            self._plan_from_trees(pattern, trees, inputs).save(plan_path)
+        except OSError:
+            pass  # 计划只是缓存, 写入失败不影响渲染
+        return trees
+
+    def _collect_trees(self, pattern: str) -> List[DataNode]:
+        """逐个构建数据树, 每棵树构建完成后检查异步渲染是否已被取消"""
+        trees: List[DataNode] = []
+        for tree in self.data_handler.iter_data_trees(pattern):
+            trees.append(tree)
+            self._check_cancelled()
+        return trees
+
+    def _plan_config_key(self, pattern: str) -> str:
+        """计划缓存的键: 计划版本, 数据处理器配置和查找模式"""
+        digest = hashlib.sha256()
+        for part in (
+            RENDER_PLAN_VERSION,
+            pattern,
+            json.dumps(self.config.data_config, sort_keys=True, default=str),
+        ):
+            digest.update(part.encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def _plan_from_trees(
+        self, pattern: str, trees: List[DataNode], inputs: Dict[str, List[int]]
+    ) -> RenderPlan:
+        """根据已构建的数据树生成渲染计划"""
+        order: List[DataNode] = []
+        index: Dict[DataNode, int] = {}
         for tree in trees:
-            self._process_node(tree)
-            key = f"{tree.name}"
-            results[key] = self._rendered_contents[tree]
+            for node in tree.iter_data_nodes():
+                if node not in index:
+                    index[node] = len(order)
+                    order.append(node)
 
-        if not results:
-            raise GeneratorError(
-                GeneratorErrorType.RENDER_ERROR, "No templates were rendered"
+        template_key = self.data_handler.preserved_template_key
+        dependencies: Dict[str, List[str]] = {}
+        nodes: List[PlanNode] = []
+        for node in order:
+            template = node.data.get(template_key)
+            templates: List[str] = []
+            if isinstance(template, str):
+                if template not in dependencies:
+                    try:
+                        dependencies[template] = (
+                            self.template_handler.get_template_dependencies(template)
+                        )
+                    except Exception:
+                        dependencies[template] = [template]
+                templates = list(dependencies[template])
+            else:
+                template = None
+
+            groups: List[List[int]] = []
+            start = 0
+            for group_number in node.children_group_number:
+                groups.append(
+                    [index[child] for child in node.children[start : start + group_number]]
+                )
+                start += group_number
+
+            parent = node.parent
+            nodes.append(
+                PlanNode(
+                    file=self.data_handler.get_source_path(node),
+                    name=node.name,
+                    template=template,
+                    templates=templates,
+                    parent=index.get(parent) if isinstance(parent, DataNode) else None,
+                    groups=groups,
+                )
             )
 
-        return results
+        return RenderPlan(
+            pattern=pattern,
+            config_key=self._plan_config_key(pattern),
+            nodes=nodes,
+            roots=[index[tree] for tree in trees],
+            inputs=inputs,
+        )
+
+    def _compute_cache_keys(self, trees: List[DataNode]) -> Dict[DataNode, str]:
+        """后序计算每个节点的缓存键
+
+        缓存键是以下内容的sha256: 节点路径, 节点数据, 模板及其引用模板的源码,
+        各子节点组的数量以及子节点的缓存键。插件函数通过 find_by_file_path
+        读取到的其他文件内容不在键中, 依赖此类跨文件引用的模板在被引用文件变化后
+        需要清理缓存目录。
+        无法计算键的节点(例如模板不存在)及其祖先节点不参与缓存。
+
+        Args:
+            trees: 数据树列表
+
+        Returns:
+            Dict[DataNode, str]: 节点到缓存键的映射
+        """
+        keys: Dict[DataNode, str] = {}
+        visited: Set[DataNode] = set()
+        fingerprints: Dict[str, Optional[str]] = {}
+        children_key = self.template_handler.preserved_children_key
+
+        def compute(node: DataNode) -> Optional[str]:
+            # 后序遍历保证子节点已经处理过, 没有键的子节点表示无法缓存
+            child_keys = [
+                keys.get(child) for child in node.children if isinstance(child, DataNode)
+            ]
+            if any(child_key is None for child_key in child_keys):
+                return None
+
+            template_path = node.data.get(self.data_handler.preserved_template_key)
+            if not isinstance(template_path, str):
+                return None
+            if template_path not in fingerprints:
+                try:
+                    fingerprints[template_path] = (
+                        self.template_handler.get_template_fingerprint(template_path)
+                    )
+                except Exception:
+                    fingerprints[template_path] = None
+            fingerprint = fingerprints[template_path]
+            if fingerprint is None:
+                return None
+
+            # 排除渲染时注入的子节点内容
+            injected = {
+                children_key + str(index)
+                for index in range(len(node.children_group_number))
+            }
+            data = {k: v for k, v in node.data.items() if k not in injected}
+
+            digest = hashlib.sha256()
+            for part in (
+                RENDER_CACHE_VERSION,
+                self.data_handler.get_absolute_path(node),
+                repr(data),
+                fingerprint,
+                repr(list(node.children_group_number)),
+                *child_keys,
+            ):
+                digest.update(str(part).encode("utf-8") + b"\0")
+            return digest.hexdigest()
+
+        for tree in trees:
+            for node in tree.iter_data_nodes():
+                if node in visited:
+                    continue
+                visited.add(node)
+                key = compute(node)
+                if key is not None:
+                    keys[node] = key
+        return keys
+
+    def _load_cached_outputs(self, trees: List[DataNode]) -> None:
+        """自顶向下查找缓存, 命中的节点直接写入渲染结果, 其子树不再访问"""
+        if self.render_cache is None:
+            return
+        pending = list(trees)
+        while pending:
+            node = pending.pop()
+            if node in self._rendered_contents:
+                continue
+            key = self._cache_keys.get(node)
+            cached = self.render_cache.get(key) if key is not None else None
+            if cached is not None:
+                self._rendered_contents[node] = self._store_output(node, cached)
+            else:
+                pending.extend(
+                    child for child in node.children if isinstance(child, DataNode)
+                )
+
+    def _select_parallel_subtrees(
+        self, trees: List[DataNode], target: int
+    ) -> List[Tuple[Tuple[int, ...], DataNode]]:
+        """选择可以独立渲染的子树
+
+        从各个根节点开始逐层向下展开, 直到子树数量达到target或无法继续展开。
+        被展开的节点(子树之上的部分)由主进程串行渲染, 已有渲染结果的节点不再展开。
+
+        Returns:
+            List[Tuple[Tuple[int, ...], DataNode]]: (索引路径, 子树根节点) 列表
+        """
+        frontier: List[Tuple[Tuple[int, ...], DataNode]] = [
+            ((index,), tree) for index, tree in enumerate(trees)
+        ]
+        while len(frontier) < target:
+            expanded = False
+            next_frontier: List[Tuple[Tuple[int, ...], DataNode]] = []
+            for index_path, node in frontier:
+                children = [
+                    (index_path + (child_index,), child)
+                    for child_index, child in enumerate(node.children)
+                    if isinstance(child, DataNode)
+                ]
+                if children and node not in self._rendered_contents:
+                    next_frontier.extend(children)
+                    expanded = True
+                else:
+                    next_frontier.append((index_path, node))
+            if not expanded:
+                break
+            frontier = next_frontier
+        return frontier
+
+    def _render_subtrees_parallel(
+        self, pattern: str, trees: List[DataNode], max_workers: int
+    ) -> None:
+        """在进程池中渲染相互独立的子树, 结果按节点写回 _rendered_contents
+
+        Args:
+            pattern: 数据树的查找模式, worker据此重建数据树
+            trees: 主进程中已构建的数据树
+            max_workers: 进程数
+        """
+        subtrees: List[Tuple[Tuple[int, ...], DataNode]] = []
+        dispatched = set()
+        for index_path, node in self._select_parallel_subtrees(trees, max_workers * 4):
+            # 已有结果的子树不再派发, 被多个父节点共享的子树只派发一次
+            if node in self._rendered_contents or node in dispatched:
+                continue
+            dispatched.add(node)
+            subtrees.append((index_path, node))
+        if not subtrees:
+            return
+        batch = uuid.uuid4().hex
+        executor = self.create_worker_pool(max_workers)
+        futures = {
+            executor.submit(_render_subtree, pattern, batch, index_path): node
+            for index_path, node in subtrees
+        }
+        pending = set(futures)
+        try:
+            # 按完成顺序取回结果, 等待期间定期检查取消请求
+            while pending:
+                self._check_cancelled()
+                done, pending = wait(
+                    pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    node = futures[future]
+                    try:
+                        self._rendered_contents[node] = self._store_output(
+                            node, future.result()
+                        )
+                    except GeneratorError:
+                        raise
+                    except Exception as e:
+                        raise GeneratorError(
+                            GeneratorErrorType.RENDER_ERROR,
+                            f"Failed to render subtree {node.name}: {str(e)}",
+                        )
+        finally:
+            # 出错或取消时取消尚未开始的子树, 不等待执行中的worker结束
+            executor.shutdown(wait=not pending, cancel_futures=True)
 
     def _process_node(self, node: DataNode) -> None:
         """处理单个节点及其子节点
 
-        采用后序遍历（先处理子节点再处理父节点）
+        采用后序遍历（先处理子节点再处理父节点）, 已有渲染结果的节点会被跳过。
+        遍历使用显式栈, 不受Python递归深度限制。异步渲染被取消时在下一个节点处停止。
 
         Args:
             node: 要处理的数据节点
         """
-        # 1. 先处理所有子节点
-        for child in node.children:
+        stack: List[Tuple[DataNode, bool]] = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            self._check_cancelled()
+            if current in self._rendered_contents:
+                continue
+            if not children_done:
+                # 1. 先处理所有子节点
+                stack.append((current, True))
+                stack.extend(
+                    (child, False)
+                    for child in reversed(current.children)
+                    if isinstance(child, DataNode)
+                    and child not in self._rendered_contents
+                )
+                continue
+            self._render_node(current)
+
+    def _check_cancelled(self) -> None:
+        """异步渲染被取消时抛出错误, 在构建和渲染的各个检查点调用"""
+        if self._cancel_event.is_set():
+            raise GeneratorError(GeneratorErrorType.RENDER_ERROR, "Render cancelled")
+
+    def _render_node(self, node: DataNode) -> None:
+        """渲染子节点均已渲染的节点并保存结果
+
+        节点结束事件在 finally 中发出, 渲染失败时追踪中的开始/结束事件仍然成对。
+        """
+        if self.tracer.enabled:
+            self.tracer.node_start(node)
+        try:
+            template_path = self._prepare_context(node)
+            try:
+                # 6. 渲染模板
+                result = self.template_handler.render_template(
+                    template_path, node, self.data_handler
+                )
+
+                # 7. 验证结果并保存
+                validate_render_result(result, template_path)
+                self._rendered_contents[node] = self._store_output(node, result)
+                if self.render_cache is not None and node in self._cache_keys:
+                    self.render_cache.put(self._cache_keys[node], result)
+
+            except Exception as e:
+                raise GeneratorError(
+                    GeneratorErrorType.RENDER_ERROR,
+                    f"Failed to render {template_path}: {str(e)}",
+                )
+
+            self._release_children(node)
+        finally:
+            if self.tracer.enabled:
+                self.tracer.node_end(node)
+
+    def _generate_root(self, tree: DataNode) -> Iterator[str]:
+        """流式渲染根节点: 先渲染子节点, 再分块生成根节点的输出
+
+        启用渲染缓存时同时收集各分块, 全部生成后将完整结果写入缓存;
+        迭代器未消费完就被关闭时不写入缓存。
+        """
+        if tree in self._rendered_contents:
+            # 根节点命中缓存或已由其他根节点渲染
+            yield self._get_output(tree)
+            return
+
+        for child in tree.children:
             if isinstance(child, DataNode):
                 self._process_node(child)
 
+        if self.tracer.enabled:
+            self.tracer.node_start(tree)
+        try:
+            template_path = self._prepare_context(tree)
+            cache_key = (
+                self._cache_keys.get(tree) if self.render_cache is not None else None
+            )
+            chunks: List[str] = []
+            try:
+                for chunk in self.template_handler.generate_template(
+                    template_path, tree, self.data_handler
+                ):
+                    if cache_key is not None:
+                        chunks.append(chunk)
+                    yield chunk
+                if cache_key is not None:
+                    self.render_cache.put(cache_key, "".join(chunks))
+            except Exception as e:
+                raise GeneratorError(
+                    GeneratorErrorType.RENDER_ERROR,
+                    f"Failed to render {template_path}: {str(e)}",
+                )
+            self._release_children(tree)
+        finally:
+            # 渲染失败或分块迭代器未消费完就被关闭时同样结束该节点
+            if self.tracer.enabled:
+                self.tracer.node_end(tree)
+
+    @staticmethod
+    def _count_parents(trees: List[DataNode]) -> Dict[DataNode, int]:
+        """统计每个节点被父节点引用的次数(被共享的节点有多个父节点)"""
+        counts: Dict[DataNode, int] = {}
+        visited: Set[DataNode] = set()
+        for tree in trees:
+            for node in tree.iter_data_nodes():
+                if node in visited:
+                    continue
+                visited.add(node)
+                for child in node.children:
+                    if isinstance(child, DataNode):
+                        counts[child] = counts.get(child, 0) + 1
+        return counts
+
+    def _release_children(self, node: DataNode) -> None:
+        """父节点渲染完成后, 释放不再被其他父节点需要的子节点渲染结果
+
+        同时删除注入到父节点数据中的子节点内容, 它们只在渲染时需要。
+        """
+        if self._pending_parents is None:
+            return
+        children_key = self.template_handler.preserved_children_key
+        for group_index in range(len(node.children_group_number)):
+            node.data.pop(children_key + str(group_index), None)
+        for child in node.children:
+            if not isinstance(child, DataNode):
+                continue
+            remaining = self._pending_parents.get(child, 0) - 1
+            self._pending_parents[child] = remaining
+            if remaining <= 0 and child not in self._retained_outputs:
+                self._discard_output(child)
+
+    def _store_output(self, node: DataNode, content: str) -> Union[str, SpilledOutput]:
+        """按内存预算保存渲染结果, 根节点及不释放结果时的结果总是保留在内存中"""
+        if (
+            self._spill is None
+            or self._pending_parents is None
+            or node in self._retained_outputs
+        ):
+            return content
+        return self._spill.admit(content)
+
+    def _get_output(self, node: DataNode) -> str:
+        """取回节点的渲染结果(溢出到临时文件的结果从文件读回)"""
+        output = self._rendered_contents[node]
+        if isinstance(output, str):
+            return output
+        return cast(SpillStore, self._spill).read(output)
+
+    def _discard_output(self, node: DataNode) -> None:
+        """释放节点的渲染结果"""
+        output = self._rendered_contents.pop(node, None)
+        if output is not None and self._spill is not None:
+            self._spill.release(output)
+
+    def _reset_outputs(self) -> None:
+        """清空上一次渲染的结果"""
+        self._rendered_contents.clear()
+        self._cache_keys.clear()
+        if self._spill is not None:
+            self._spill.clear()
+
+    def _finish_release(self) -> None:
+        """结束释放模式, 删除溢出的临时文件并按条目上限清理渲染结果缓存"""
+        self._pending_parents = None
+        self._retained_outputs = set()
+        if self._spill is not None:
+            self._spill.clear()
+        if self.render_cache is not None:
+            self.render_cache.prune()
+
+    def _prepare_context(self, node: DataNode) -> str:
+        """验证节点数据并将子节点渲染结果按组写入渲染上下文
+
+        Args:
+            node: 子节点均已渲染的数据节点
+
+        Returns:
+            str: 节点的模板路径
+        """
         # 2. 验证数据
         validate_data_context(node.data, self.data_handler.preserved_template_key)
 
@@ -108,7 +1091,7 @@ class DataDrivenGenerator:
 
         # 4. 收集子节点渲染结果
         
-        print(f"Processing node: {node.name} with children{node.children_group_number}: {[child.name for child in node.children]}")        
+        print(f"Processing node: {node.name} with children{list(node.children_group_number)}: {[child.name for child in node.children]}")        
         
         # 给子节点编号?
         current_children_index = 0
@@ -120,7 +1103,7 @@ class DataDrivenGenerator:
                 if child_index < len(node.children):
                     child = node.children[child_index]
                     if isinstance(child, DataNode) and child in self._rendered_contents:
-                        children_content.append(self._rendered_contents[child])
+                        children_content.append(self._get_output(child))
 
             # 5. 添加子节点内容到上下文
             data[self.template_handler.preserved_children_key + str(group_index)] = "\n".join(
@@ -129,23 +1112,7 @@ class DataDrivenGenerator:
             # 更新当前子节点索引
             current_children_index += group_number
 
-        try:
-            template_path = node.data[self.data_handler.preserved_template_key]
-
-            # 6. 渲染模板
-            result = self.template_handler.render_template(
-                template_path, node, self.data_handler
-            )
-
-            # 7. 验证结果并保存
-            validate_render_result(result, template_path)
-            self._rendered_contents[node] = result
-
-        except Exception as e:
-            raise GeneratorError(
-                GeneratorErrorType.RENDER_ERROR,
-                f"Failed to render {template_path}: {str(e)}",
-            )
+        return node.data[self.data_handler.preserved_template_key]
 
     # def _create_node_resolver(self, node: DataNode) -> UserFunctionResolver:
     #     """为当前节点创建独立的函数解析器
@@ -0,0 +1,165 @@
+"""Output writer that only replaces files whose content changed"""
+
+import hashlib
+import os
+import tempfile
+from typing import IO, List
+
+# 比较文件内容时每次读取的字节数
+_CHUNK_SIZE = 1 << 16
+
+
+def _read_umask() -> int:
+    """读取进程的umask
+
+    os.umask 只能通过设置新值读取旧值, 设置期间其他线程创建的文件会得到错误的权限,
+    因此只在导入模块时读取一次, 此时还没有渲染或写入线程。
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def _default_mode() -> int:
+    """新建文件的权限(与open()创建的文件一致, 遵循umask)"""
+    return 0o666 & ~_UMASK
+
+
+def _file_digest(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _same_content(path: str, size: int, digest: bytes) -> bool:
+    """path 是否已是大小为 size, 哈希为 digest 的文件
+
+    大小不同时不读取文件内容。
+    """
+    try:
+        if os.stat(path).st_size != size:
+            return False
+        return _file_digest(path) == digest
+    except OSError:
+        return False
+
+
+class _TempSink:
+    """写入目标目录中临时文件的文本输出, 关闭时交给 OutputWriter 提交"""
+
+    def __init__(self, writer: "OutputWriter", path: str) -> None:
+        self._writer = writer
+        self._path = path
+        fd, self._tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=".", suffix=".tmp"
+        )
+        self._file: IO[str] = os.fdopen(fd, "w", encoding=writer.encoding)
+        self._closed = False
+
+    def write(self, text: str) -> int:
+        return self._file.write(text)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._file.close()
+        self._writer._commit(self._path, self._tmp_path)
+
+    def __enter__(self) -> "_TempSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # 渲染出错时丢弃未完成的输出, 保留原文件
+        self._closed = True
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+class OutputWriter:
+    """将渲染结果写入输出目录, 内容未变化的文件保持不动
+
+    已有文件大小不同时直接判定为变化, 大小相同时比较sha256。
+    需要写入时先写同目录下的临时文件再用 os.replace 原子替换,
+    监视输出文件的工具不会看到写了一半的文件, 未变化的文件mtime也不会改变。
+    written / skipped 记录写入和跳过的文件路径。
+    """
+
+    def __init__(
+        self, output_dir: str, file_extension: str = "txt", encoding: str = "utf-8"
+    ) -> None:
+        self.output_dir = output_dir
+        self.file_extension = file_extension
+        self.encoding = encoding
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.output_dir, f"{name}.{self.file_extension}")
+
+    def write(self, name: str, content: str) -> bool:
+        """写入一个渲染结果, 返回是否实际写入了文件"""
+        path = self.path_for(name)
+        # 与文本模式写入的结果一致
+        if os.linesep != "\n":
+            content = content.replace("\n", os.linesep)
+        data = content.encode(self.encoding)
+        if _same_content(path, len(data), hashlib.sha256(data).digest()):
+            self.skipped.append(path)
+            return False
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.written.append(path)
+        return True
+
+    def open_sink(self, name: str) -> _TempSink:
+        """打开一个流式输出, 关闭时内容有变化才替换目标文件
+
+        用作 render_to / render_pipeline 的 sink_factory。
+        """
+        return _TempSink(self, self.path_for(name))
+
+    def _commit(self, path: str, tmp_path: str) -> None:
+        """用已写完的临时文件替换目标文件, 内容相同时丢弃临时文件"""
+        try:
+            size = os.stat(tmp_path).st_size
+            if _same_content(path, size, _file_digest(tmp_path)):
+                os.remove(tmp_path)
+                self.skipped.append(path)
+                return
+            self._replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.written.append(path)
+
+    @staticmethod
+    def _replace(tmp_path: str, path: str) -> None:
+        # mkstemp 创建的文件权限为0600, 恢复为原文件或默认的权限
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except OSError:
+            mode = _default_mode()
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+
+    def summary(self) -> str:
+        return f"{len(self.written)} written, {len(self.skipped)} unchanged"
@@ -0,0 +1,108 @@
+"""Bounded producer/consumer stages for the render pipeline"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+# 阶段结束标记
+END = object()
+
+
+class Pipeline:
+    """由有界队列连接的多线程流水线
+
+    每个阶段运行在自己的线程中, 通过容量为 queue_size 的队列与相邻阶段相连,
+    队列满时上游阶段阻塞(背压), 因此同一时刻在途的数据量有上限。
+    任一阶段出错时设置 stop 事件, 其余阶段在下一次读写队列时退出;
+    第一个错误由 raise_error 在调用线程中重新抛出。
+    """
+
+    # 阻塞读写队列时检查 stop 事件的间隔(秒)
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, queue_size: int = 2) -> None:
+        if queue_size < 1:
+            raise ValueError("queue_size must be positive")
+        self.queue_size = queue_size
+        self.stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._threads: List[threading.Thread] = []
+
+    def new_queue(self) -> "queue.Queue[Any]":
+        return queue.Queue(maxsize=self.queue_size)
+
+    def put(self, target: "queue.Queue[Any]", item: Any) -> bool:
+        """放入一个元素, 队列满时等待; 流水线已停止时返回False"""
+        while not self.stop.is_set():
+            try:
+                target.put(item, timeout=self.POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, source: "queue.Queue[Any]") -> Any:
+        """取出一个元素, 队列空时等待; 流水线已停止时返回END"""
+        while not self.stop.is_set():
+            try:
+                return source.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return END
+
+    def fail(self, error: BaseException) -> None:
+        """记录错误并停止所有阶段"""
+        self._errors.append(error)
+        self.stop.set()
+
+    def raise_error(self) -> None:
+        """重新抛出第一个阶段错误"""
+        if self._errors:
+            raise self._errors[0]
+
+    def _run(self, func: Callable[..., None], *args: Any) -> None:
+        try:
+            func(*args)
+        except BaseException as e:
+            self.fail(e)
+
+    def _start(self, name: str, func: Callable[..., None], *args: Any) -> None:
+        thread = threading.Thread(
+            target=self._run, args=(func,) + args, name=name, daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def produce(
+        self, name: str, source: Callable[[], Iterable[Any]], target: "queue.Queue[Any]"
+    ) -> None:
+        """启动生产者阶段: 在后台线程中迭代source(), 将元素依次放入target"""
+
+        def run() -> None:
+            try:
+                for item in source():
+                    if not self.put(target, item):
+                        return
+            finally:
+                self.put(target, END)
+
+        self._start(name, run)
+
+    def consume(
+        self, name: str, source: "queue.Queue[Any]", handler: Callable[[Any], None]
+    ) -> None:
+        """启动消费者阶段: 在后台线程中对source中的每个元素调用handler, 直到END"""
+
+        def run() -> None:
+            while True:
+                item = self.get(source)
+                if item is END:
+                    return
+                handler(item)
+
+        self._start(name, run)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """等待所有阶段线程结束"""
+        for thread in self._threads:
+            thread.join(timeout)
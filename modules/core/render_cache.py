@@ -0,0 +1,99 @@
+"""Persistent content-addressed cache for rendered node outputs"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class RenderCache:
+    """按内容哈希存储节点渲染结果的磁盘缓存
+
+    缓存键由DataDrivenGenerator计算(节点数据, 模板源码及其引用的模板,
+    子节点的缓存键), 因此相同的键总是对应相同的渲染结果。
+    每个条目存储为 cache_dir/<key前两位>/<key> 的文本文件。
+    设置 max_entries 时, prune() 按最近使用时间(命中时更新条目的mtime)
+    删除最久未使用的条目; clear() 删除所有条目。
+    """
+
+    def __init__(
+        self, cache_dir: str, encoding: str = "utf-8", max_entries: Optional[int] = None
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.encoding = encoding
+        self.max_entries = max_entries
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的渲染结果, 未命中或读取失败时返回None"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r", encoding=self.encoding, newline="") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        try:
+            # 更新mtime作为最近使用时间
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        """写入渲染结果(先写临时文件再原子替换, 避免并发写入产生半截文件)"""
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(entry_path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding=self.encoding, newline="") as f:
+                f.write(content)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _entries(self) -> List[Tuple[float, Path]]:
+        """返回所有条目的 (mtime, 路径)"""
+        entries = []
+        for entry_path in self.cache_dir.glob("??/*"):
+            if entry_path.suffix == ".tmp":
+                continue
+            try:
+                entries.append((entry_path.stat().st_mtime, entry_path))
+            except OSError:
+                continue
+        return entries
+
+    def prune(self, max_entries: Optional[int] = None) -> int:
+        """删除最久未使用的条目, 只保留 max_entries 个
+
+        Args:
+            max_entries: 保留的条目数, None表示使用构造时的 max_entries;
+                两者都为None时不删除
+
+        Returns:
+            int: 删除的条目数
+        """
+        if max_entries is None:
+            max_entries = self.max_entries
+        if max_entries is None:
+            return 0
+        entries = self._entries()
+        if len(entries) <= max_entries:
+            return 0
+        entries.sort(key=lambda entry: entry[0])
+        removed = 0
+        for _, entry_path in entries[: len(entries) - max_entries]:
+            try:
+                entry_path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def clear(self) -> int:
+        """删除所有条目, 返回删除的条目数"""
+        return self.prune(0)
@@ -0,0 +1,101 @@
+"""Serializable render plan: node order, templates and child wiring"""
+
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+# 计划格式版本, 格式变化时递增以使旧计划失效
+RENDER_PLAN_VERSION = "1"
+
+
+@dataclass
+class PlanNode:
+    """渲染计划中的一个节点
+
+    file:      数据文件相对于数据根目录的路径
+    name:      节点名称(输出文件名)
+    template:  模板路径, 数据中没有模板键时为None
+    templates: 节点依赖的模板(模板本身及其通过include/import/extends引用的模板)
+    parent:    主父节点在计划中的索引, 决定节点的绝对路径; 根节点为None
+    groups:    每个子节点组中子节点在计划中的索引
+    """
+
+    file: str
+    name: str
+    template: Optional[str]
+    templates: List[str] = field(default_factory=list)
+    parent: Optional[int] = None
+    groups: List[List[int]] = field(default_factory=list)
+
+
+@dataclass
+class RenderPlan:
+    """渲染计划
+
+    nodes 按渲染顺序(后序, 子节点在父节点之前)排列, roots 为各数据树根节点的索引。
+    inputs 记录编译计划时数据根目录下各目录和数据文件的 [mtime_ns, size]
+    (目录的size为-1), 它们都未变化时计划仍然有效, 可以跳过子节点模式的解析。
+    config_key 标识编译计划时的数据处理器配置和查找模式。
+    """
+
+    pattern: str
+    config_key: str
+    nodes: List[PlanNode]
+    roots: List[int]
+    inputs: Dict[str, List[int]]
+    version: str = RENDER_PLAN_VERSION
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RenderPlan":
+        return cls(
+            pattern=data["pattern"],
+            config_key=data["config_key"],
+            nodes=[PlanNode(**node) for node in data["nodes"]],
+            roots=list(data["roots"]),
+            inputs={path: list(stat) for path, stat in data["inputs"].items()},
+            version=data.get("version", ""),
+        )
+
+    def save(self, file_path: str) -> None:
+        """写入JSON文件(先写临时文件再原子替换)"""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp_path, file_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["RenderPlan"]:
+        """读取计划, 文件不存在, 损坏或版本不符时返回None"""
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                plan = cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if plan.version != RENDER_PLAN_VERSION:
+            return None
+        return plan
+
+    def is_current(self) -> bool:
+        """检查编译计划时记录的目录和数据文件是否都未变化"""
+        for path, (mtime_ns, size) in self.inputs.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if stat.st_mtime_ns != mtime_ns:
+                return False
+            if size >= 0 and stat.st_size != size:
+                return False
+        return True
@@ -0,0 +1,73 @@
+"""Spill-to-disk storage for intermediate render outputs"""
+
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+
+
+class SpilledOutput:
+    """已写入临时文件的渲染结果"""
+
+    __slots__ = ("path", "length")
+
+    def __init__(self, path: str, length: int) -> None:
+        self.path = path
+        self.length = length
+
+
+class SpillStore:
+    """按内存预算保存子节点渲染结果
+
+    内存中保留的渲染结果总字符数不超过 budget, 超出预算的结果写入临时目录,
+    父节点渲染时再读回。临时目录在第一次溢出时创建, clear() 时删除。
+    """
+
+    def __init__(self, budget: int, encoding: str = "utf-8") -> None:
+        if budget < 0:
+            raise ValueError("memory budget must not be negative")
+        self.budget = budget
+        self.encoding = encoding
+        self.in_memory = 0  # 内存中保留的字符数
+        self.spilled = 0  # 累计溢出的结果数量
+        self._directory: Optional[str] = None
+        self._next_id = 0
+
+    def admit(self, content: str) -> Union[str, SpilledOutput]:
+        """保存一个渲染结果, 超出预算时写入临时文件"""
+        if self.in_memory + len(content) <= self.budget:
+            self.in_memory += len(content)
+            return content
+
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="xdm_spill_")
+        path = os.path.join(self._directory, f"{self._next_id}.txt")
+        self._next_id += 1
+        with open(path, "w", encoding=self.encoding, newline="") as f:
+            f.write(content)
+        self.spilled += 1
+        return SpilledOutput(path, len(content))
+
+    def read(self, output: Union[str, SpilledOutput]) -> str:
+        """取回渲染结果(溢出的结果从临时文件读回)"""
+        if isinstance(output, str):
+            return output
+        with open(output.path, "r", encoding=self.encoding, newline="") as f:
+            return f.read()
+
+    def release(self, output: Union[str, SpilledOutput]) -> None:
+        """释放不再需要的渲染结果"""
+        if isinstance(output, str):
+            self.in_memory -= len(output)
+            return
+        try:
+            os.remove(output.path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """丢弃所有结果并删除临时目录"""
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+        self.in_memory = 0
@@ -4,14 +4,17 @@ from jinja2 import (
     Template,
     pass_context,
     StrictUndefined,
+    meta,
 )
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Callable, Optional, List, Set, Iterator, Tuple
 from dataclasses import dataclass
 from pathlib import Path
+import hashlib
 
 from .expr_filter import expr_filter_factory
 from modules.node.data_node import DataNode
 from modules.core import DataHandler
+from modules.core.tracing import Tracer
 
 
 @dataclass
@@ -67,6 +70,9 @@ class JinjaTemplateHandler:
         """
         self.config = JinjaConfig.validate(config)
 
+        # 追踪器, 由DataDrivenGenerator替换为共享实例
+        self.tracer = Tracer()
+
         # 创建Jinja环境
         self.env = Environment(
             loader=FileSystemLoader(
@@ -82,6 +88,11 @@ class JinjaTemplateHandler:
 
         self.resolver_factory = UserFunctionResolverFactory()
 
+        # 模板指纹缓存(模板路径 -> (模板及其引用模板源码的哈希, 各模板的uptodate检查函数))
+        self._template_fingerprints: Dict[
+            str, Tuple[str, List[Optional[Callable[[], bool]]]]
+        ] = {}
+
         print(self.resolver_factory.show_function_info())
         # self.register_filter("expr_filter", expr_filter_factory("Expr Filter: "))  # 注册默认过滤器
 
@@ -98,6 +109,69 @@ class JinjaTemplateHandler:
         """
         self.env.filters[name] = func
 
+    def get_template_dependencies(self, template_path: str) -> List[str]:
+        """获取模板及其通过include/import/extends引用的所有模板
+
+        动态引用(模板名为表达式)无法静态解析, 不包含在结果中。
+
+        Args:
+            template_path: 模板文件路径（相对于template_dir）
+
+        Returns:
+            List[str]: 模板路径列表, 第一个为模板本身
+        """
+        return [name for name, _, _ in self._collect_template_sources(template_path)]
+
+    def _collect_template_sources(
+        self, template_path: str
+    ) -> List[Tuple[str, str, Optional[Callable[[], bool]]]]:
+        """广度优先收集模板及其引用模板的 (路径, 源码, 加载器返回的uptodate检查函数)"""
+        sources: List[Tuple[str, str, Optional[Callable[[], bool]]]] = []
+        pending: List[str] = [template_path]
+        visited: Set[str] = set()
+        while pending:
+            name = pending.pop(0)
+            if name in visited:
+                continue
+            visited.add(name)
+            source, _, uptodate = self.env.loader.get_source(self.env, name)
+            sources.append((name, source, uptodate))
+            for referenced in meta.find_referenced_templates(self.env.parse(source)):
+                if referenced is not None:
+                    pending.append(referenced)
+        return sources
+
+    def get_template_fingerprint(self, template_path: str) -> str:
+        """计算模板指纹
+
+        指纹覆盖模板本身以及它通过include/import/extends引用的所有模板的源码,
+        用于渲染缓存的键。动态引用(模板名为表达式)无法静态解析, 不计入指纹。
+        指纹按模板缓存, 与Jinja的模板缓存一样用加载器的uptodate检查(文件的mtime)判断是否失效,
+        因此同一个处理器在多次渲染之间修改模板时会重新计算。
+
+        Args:
+            template_path: 模板文件路径（相对于template_dir）
+
+        Returns:
+            str: 十六进制的sha256摘要
+        """
+        cached = self._template_fingerprints.get(template_path)
+        if cached is not None:
+            fingerprint, checks = cached
+            if all(uptodate is None or uptodate() for uptodate in checks):
+                return fingerprint
+
+        digest = hashlib.sha256()
+        checks = []
+        for name, source, uptodate in self._collect_template_sources(template_path):
+            digest.update(name.encode(self.config.encoding) + b"\0")
+            digest.update(source.encode(self.config.encoding) + b"\0")
+            checks.append(uptodate)
+
+        fingerprint = digest.hexdigest()
+        self._template_fingerprints[template_path] = (fingerprint, checks)
+        return fingerprint
+
     def render_template(
         self, template_path: str, node: DataNode, data_handler: DataHandler
     ) -> str:
@@ -115,7 +189,8 @@ class JinjaTemplateHandler:
             jinja2.TemplateNotFound: 如果模板不存在
             jinja2.TemplateError: 如果渲染过程出错
         """
-        node_resolver = self.resolver_factory.create_resolver(node, data_handler)
+        with self.tracer.phase("create_resolver", template_path):
+            node_resolver = self.resolver_factory.create_resolver(node, data_handler)
 
         filters = {"expr_filter": expr_filter_factory(node_resolver)}
 
@@ -128,16 +203,56 @@ class JinjaTemplateHandler:
                 # 注册新的过滤器
                 for key, value in filters.items():
                     self.register_filter(key, value)
-                template = self.env.get_template(template_path)
-                return template.render(data)
+                with self.tracer.phase("get_template", template_path):
+                    template = self.env.get_template(template_path)
+                with self.tracer.phase("render", template_path):
+                    return template.render(data)
             finally:
                 # 无论是否发生异常，都恢复原始过滤器
                 self.env.filters = original_filters
         else:
-            template = self.env.get_template(template_path)
-            return template.render(data)
+            with self.tracer.phase("get_template", template_path):
+                template = self.env.get_template(template_path)
+            with self.tracer.phase("render", template_path):
+                return template.render(data)
         # if resolver:
         #     for key, value in resolver.items():
         #         self.register_filter(key, value)
         # template = self.env.get_template(template_path)
         # return template.render(data)
+
+    def generate_template(
+        self, template_path: str, node: DataNode, data_handler: DataHandler
+    ) -> Iterator[str]:
+        """分块渲染模板, 用于流式输出
+
+        节点的过滤器在整个迭代期间保持注册, 迭代结束(或中断)后恢复原始过滤器。
+
+        Args:
+            template_path: 模板文件路径（相对于template_dir）
+            node: 要渲染的数据节点
+            data_handler: 数据处理器, 用于创建节点的函数解析器
+
+        Yields:
+            str: 渲染结果分块
+
+        Raises:
+            jinja2.TemplateNotFound: 如果模板不存在
+            jinja2.TemplateError: 如果渲染过程出错
+        """
+        with self.tracer.phase("create_resolver", template_path):
+            node_resolver = self.resolver_factory.create_resolver(node, data_handler)
+
+        filters = {"expr_filter": expr_filter_factory(node_resolver)}
+
+        original_filters = self.env.filters.copy()
+        try:
+            for key, value in filters.items():
+                self.register_filter(key, value)
+            with self.tracer.phase("get_template", template_path):
+                template = self.env.get_template(template_path)
+            # 该阶段包含调用方消费分块(写入sink)的时间
+            with self.tracer.phase("render", template_path):
+                yield from template.generate(node.data)
+        finally:
+            self.env.filters = original_filters
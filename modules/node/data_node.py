@@ -5,19 +5,63 @@
 """
 
 from enum import Enum
-from typing import Optional, List, Dict, Any, TypeVar, Iterable
+from typing import Optional, List, Dict, Any, TypeVar, Iterable, Set, Tuple, Callable, Sequence
 from dataclasses import dataclass
 
 from .file_node import FileType, FileNode, DirectoryNode, T
 
 
 class DataNode(DirectoryNode["DataNode"]):
+    __slots__ = ("_data", "_loader", "children_group_number")
+
     def __init__(
-        self, data: Dict[str, Any], name: str, parent: Optional["DataNode"] = None
+        self,
+        data: Optional[Dict[str, Any]],
+        name: str,
+        parent: Optional["DataNode"] = None,
+        loader: Optional[Callable[[], Dict[str, Any]]] = None,
     ):
+        """data 为None且提供了loader时, 数据在第一次访问 data 时才由loader加载"""
         super().__init__(name, parent)
-        self.data: Dict[str, Any] = data
-        self.children_group_number: List[int] = [] # 记录子节点组的数量
+        self._data: Optional[Dict[str, Any]] = data
+        self._loader = loader
+        # 记录子节点组的数量; 没有子节点组时共用空元组, 叶子节点不再各自分配列表
+        self.children_group_number: Sequence[int] = ()
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._data is None:
+            loader = self._loader
+            self._data = loader() if loader is not None else {}
+            self._loader = None
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict[str, Any]) -> None:
+        self._data = value
+        self._loader = None
+
+    def add_children_group(self, count: int) -> None:
+        """记录一个子节点组的子节点数量"""
+        if not isinstance(self.children_group_number, list):
+            self.children_group_number = list(self.children_group_number)
+        self.children_group_number.append(count)
+
+    @property
+    def is_loaded(self) -> bool:
+        """数据是否已加载"""
+        return self._data is not None
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # 加载器通常引用处理器, 序列化前先加载数据
+        state = {
+            slot: getattr(self, slot)
+            for cls in type(self).__mro__
+            for slot in cls.__dict__.get("__slots__", ())
+        }
+        state["_data"] = self.data
+        state["_loader"] = None
+        return None, state
         
     def serialize_tree(self, indent: int = 0) -> str:
         """Serialize the data node to a dictionary representation."""
@@ -29,12 +73,35 @@ class DataNode(DirectoryNode["DataNode"]):
 {" " * indent}}}
 """
 
+    def link_child(self, node: "DataNode") -> None:
+        """链接子节点
+
+        被多个父节点共享的数据节点只保留第一个父节点作为parent,
+        其余父节点仅在children中引用它。
+        """
+        if node.parent is None:
+            self.add_child(node)
+        else:
+            self.children.append(node)
+
     def iter_data_nodes(self) -> Iterable["DataNode"]:
-        """深度优先遍历所有数据节点"""
-        for child in self.children:
-            if isinstance(child, DataNode):
-                yield from child.iter_data_nodes()
-        yield self
+        """深度优先后序遍历所有数据节点(被共享的节点只返回一次)
+
+        使用显式栈遍历, 每个节点的开销为O(1), 与树的深度无关。
+        """
+        visited: Set["DataNode"] = {self}
+        stack: List[Tuple["DataNode", int]] = [(self, 0)]
+        while stack:
+            node, child_index = stack[-1]
+            if child_index < len(node.children):
+                stack[-1] = (node, child_index + 1)
+                child = node.children[child_index]
+                if isinstance(child, DataNode) and child not in visited:
+                    visited.add(child)
+                    stack.append((child, 0))
+                continue
+            stack.pop()
+            yield node
 
     def get_data(self) -> Iterable[Dict[str, Any]]:
         """深度优先遍历，获取所有数据节点的数据"""
@@ -4,14 +4,59 @@ FileNode 模块
 """
 
 from enum import Enum
-from typing import Optional, List, Dict, Any, Union, cast, TypeVar, Generic, Tuple
+from typing import (
+    Optional,
+    List,
+    Dict,
+    Any,
+    Union,
+    cast,
+    TypeVar,
+    Generic,
+    Tuple,
+    Callable,
+    Iterator,
+    Set,
+)
 from dataclasses import dataclass
-from fnmatch import fnmatch
-from pathlib import Path
+from fnmatch import translate
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import os
+import re
 
 T = TypeVar("T", bound="BaseNode")
 
+# 通配符字符, 不含这些字符的模式段按名称索引直接查找
+_GLOB_CHARS = frozenset("*?[")
+
+# 索引中不存在的键
+_MISSING = object()
+
+
+def _is_literal(part: str) -> bool:
+    """模式段是否为不含通配符的普通名称"""
+    return not _GLOB_CHARS.intersection(part) and part not in (".", "..", "")
+
+
+def _glob_matcher(part: str) -> Callable[[str], Any]:
+    """将通配符模式段翻译为正则表达式, 返回其 match 方法(与 fnmatch 的匹配结果一致)"""
+    return re.compile(translate(os.path.normcase(part))).match
+
+
+def _index_add(index: Dict[str, Any], key: str, node: Any) -> None:
+    """加入索引; 同一个键对应多个节点(如名称只有大小写不同)时记为None, 查找时逐个比较"""
+    if index.get(key, node) is not node:
+        index[key] = None
+    else:
+        index[key] = node
+
+
+def _index_remove(index: Dict[str, Any], key: str, node: Any) -> None:
+    """从索引中移除; 记为None的键保持不变"""
+    if index.get(key) is node:
+        del index[key]
+
 
 class FileType(Enum):
     FILE = "file"
@@ -33,15 +78,115 @@ class FilePathResolver:
         return path
 
 
+# compile_pattern 缓存的模式数
+PATTERN_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class CompiledPattern:
+    """预处理后的路径模式
+
+    pattern:  规范化后的模式
+    parts:    按 "/" 拆分的各段
+    matchers: 通配符段翻译后的正则 match 方法; ".", "..", "**" 和普通名称段为None
+    literal:  所有段都是普通名称, 可以直接在路径索引中查找
+    """
+
+    pattern: str
+    parts: Tuple[str, ...]
+    matchers: Tuple[Optional[Callable[[str], Any]], ...]
+    literal: bool
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(path_pattern: str) -> CompiledPattern:
+    """规范化并拆分路径模式, 通配符段预先翻译为正则表达式
+
+    结果按模式字符串缓存在容量为 PATTERN_CACHE_SIZE 的LRU中,
+    CHILDREN模式在大量父节点中重复时只处理一次。
+    """
+    pattern = FilePathResolver.normalize_path(path_pattern)
+    parts = tuple(pattern.split("/"))
+    matchers = tuple(
+        None if part in (".", "..", "**") or _is_literal(part) else _glob_matcher(part)
+        for part in parts
+    )
+    return CompiledPattern(
+        pattern, parts, matchers, all(_is_literal(part) for part in parts)
+    )
+
+
+# 深度不超过该值的节点缓存从根节点开始的路径名称, 更深的节点(如很深的数据链)
+# 每次从最近的已缓存祖先开始计算, 缓存占用的内存不随深度平方增长
+PATH_CACHE_MAX_DEPTH = 64
+
+
 class BaseNode(Generic[T]):
-    """节点基类，包含文件和目录共同的属性和方法"""
+    """节点基类，包含文件和目录共同的属性和方法
+
+    节点类使用 __slots__, 大型树中每个节点不再携带 __dict__。
+    节点缓存从根节点开始的路径名称, 修改 parent 时作废该节点及其子树的缓存。
+    """
+
+    __slots__ = ("name", "type", "_parent", "_path")
 
     def __init__(
         self, name: str, node_type: FileType, parent: Optional[T] = None
     ):
         self.name = name
         self.type = node_type
-        self.parent = parent
+        self._parent = parent
+        self._path: Optional[Tuple[str, ...]] = None
+
+    @property
+    def parent(self) -> Optional[T]:
+        return self._parent
+
+    @parent.setter
+    def parent(self, parent: Optional[T]) -> None:
+        if parent is not self._parent:
+            self._parent = parent
+            self._invalidate_path()
+
+    def _invalidate_path(self) -> None:
+        """作废当前节点及其子树中缓存的路径
+
+        节点有缓存时其祖先必然也有缓存, 没有缓存的节点的子树不需要继续遍历。
+        """
+        stack: List[BaseNode] = [self]
+        while stack:
+            node = stack.pop()
+            if node._path is None:
+                continue
+            node._path = None
+            stack.extend(getattr(node, "children", ()))
+
+    def _path_names(self) -> Tuple[str, ...]:
+        """从根节点到当前节点的名称(跳过空名称)"""
+        path = self._path
+        if path is not None:
+            return path
+        pending: List[BaseNode] = []
+        current: Optional[BaseNode] = self
+        while current is not None and current._path is None:
+            pending.append(current)
+            current = current._parent
+        names = list(current._path) if current is not None else []
+        for node in reversed(pending):
+            if node.name:
+                names.append(node.name)
+            if len(names) <= PATH_CACHE_MAX_DEPTH:
+                node._path = tuple(names)
+        return self._path if self._path is not None else tuple(names)
+
+    def _depth(self) -> int:
+        """到根节点的层数"""
+        depth = 0
+        current = self._parent
+        while current is not None:
+            depth += 1
+            current = current._parent
+        return depth
 
     def get_absolute_path(self, slice_range: Tuple = (0, None)) -> str:
         """获取节点的绝对路径，始终以/开头
@@ -53,25 +198,10 @@ class BaseNode(Generic[T]):
         Returns:
             节点的绝对路径字符串
         """
-        # 1. 收集路径节点名称
-        path_names = []
-        current: Optional["BaseNode"] = self
-        
-        # 从当前节点向上遍历到根节点
-        while current:
-            # 跳过根节点（如果根节点名称为空）
-            if current.name:
-                path_names.append(current.name)
-            current = current.parent
-        
-        # 反转列表，使顺序变为从根节点到当前节点
-        path_names.reverse()
-        
-        # 2. 应用切片范围
+        # 从根节点到当前节点的名称(跳过名称为空的根节点), 应用切片范围
         start, end = slice_range
-        sliced_names = path_names[start:end]
-        
-        # 3. 构建路径字符串
+        sliced_names = self._path_names()[start:end]
+
         if not sliced_names:
             return "/"
         
@@ -79,8 +209,44 @@ class BaseNode(Generic[T]):
         return "/" + "/".join(sliced_names)
 
     def get_relative_path(self, from_node: "BaseNode") -> str:
-        """计算从一个节点到当前节点的相对路径"""
-        # 获取两个节点的绝对路径
+        """计算从一个节点到当前节点的相对路径
+
+        按深度将两个节点上移到同一层, 再同步上移到最近公共祖先, 耗时与深度成正比。
+        """
+        up_count = 0
+        down_names: List[str] = []
+        source: Optional[BaseNode] = from_node
+        target: Optional[BaseNode] = self
+        source_depth = from_node._depth()
+        target_depth = self._depth()
+        while source_depth > target_depth:
+            source = cast(BaseNode, source)._parent
+            source_depth -= 1
+            up_count += 1
+        while target_depth > source_depth:
+            down_names.append(cast(BaseNode, target).name)
+            target = cast(BaseNode, target)._parent
+            target_depth -= 1
+        while source is not target:
+            if source is None or target is None:
+                # 不在同一棵树中, 按绝对路径比较
+                return self._relative_path_by_names(from_node)
+            up_count += 1
+            down_names.append(target.name)
+            source = source._parent
+            target = target._parent
+
+        down_path = "/".join(name for name in reversed(down_names) if name)
+        if down_path and not from_node._path_names():
+            # 与按绝对路径字符串比较的结果保持一致: 从 "/" 出发时多一级 ".."
+            up_count += 1
+        up_path = "/".join([".."] * up_count)
+        if up_path and down_path:
+            return up_path + "/" + down_path
+        return up_path or down_path or "."
+
+    def _relative_path_by_names(self, from_node: "BaseNode") -> str:
+        """按绝对路径的公共前缀计算相对路径"""
         from_parts = from_node.get_absolute_path().split("/")
         to_parts = self.get_absolute_path().split("/")
 
@@ -108,6 +274,8 @@ class BaseNode(Generic[T]):
 class FileNode(BaseNode[T]):
     """文件节点"""
 
+    __slots__ = ()
+
     def __init__(self, file_name: str, parent: Optional["DirectoryNode[T]"] = None):
         super().__init__(file_name, FileType.FILE, parent)
 
@@ -119,23 +287,288 @@ class FileNode(BaseNode[T]):
         # 从原目录移除
         parent_directory: DirectoryNode = cast(DirectoryNode, self.parent)
         if parent_directory:
-            parent_directory.children.remove(self)
+            parent_directory.remove_child(self)
 
         # 添加到新目录
         directory.add_child(self)
 
 
+def _glob_union(patterns: List[str]) -> Optional[Callable[[str], Any]]:
+    """将多个规范化的通配符模式合并为一个正则表达式, 返回其 match 方法; 没有模式时返回None"""
+    if not patterns:
+        return None
+    return re.compile("|".join(translate(os.path.normcase(p)) for p in patterns)).match
+
+
+class _TreeScanner:
+    """DirectoryNode.build_tree 使用的目录扫描器, 文件名模式和排除模式各合并编译为一个正则"""
+
+    def __init__(self, patterns: List[str], exclude: List[str]) -> None:
+        exclude = [FilePathResolver.normalize_path(p) for p in exclude]
+        self.match_file = _glob_union(
+            [FilePathResolver.normalize_path(p) for p in patterns]
+        )
+        self.match_excluded_name = _glob_union([p for p in exclude if "/" not in p])
+        self.match_excluded_path = _glob_union([p for p in exclude if "/" in p])
+
+    def list_directory(
+        self, path: str, rel_key: str
+    ) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+        """列出目录中要加入的文件名和要进入的子目录
+
+        Returns:
+            (文件名列表, [(目录名, 路径, 规范化相对路径)]); 没有含 "/" 的排除模式时不计算相对路径
+        """
+        files: List[str] = []
+        directories: List[Tuple[str, str, str]] = []
+        match_file = self.match_file
+        match_name = self.match_excluded_name
+        match_path = self.match_excluded_path
+        normalize = match_file is not None or match_name is not None or match_path is not None
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return files, directories
+        with entries:
+            for entry in entries:
+                name = entry.name
+                key = FilePathResolver.normalize_path(name) if normalize else name
+                if match_name is not None and match_name(key):
+                    continue
+                child_key = ""
+                if match_path is not None:
+                    child_key = f"{rel_key}/{key}" if rel_key else key
+                    if match_path(child_key):
+                        continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # 与 os.walk 相同, 指向目录的符号链接既不进入也不作为文件
+                    if not entry.is_symlink():
+                        directories.append((name, entry.path, child_key))
+                elif match_file is None or match_file(key):
+                    files.append(name)
+        return files, directories
+
+    def scan(self, directory: "DirectoryNode", path: str, rel_key: str) -> None:
+        """扫描 path 下的整个子树, 将节点直接加入新建的(尚无索引的) directory"""
+        stack: List[Tuple[DirectoryNode, str, str]] = [(directory, path, rel_key)]
+        while stack:
+            current, current_path, current_key = stack.pop()
+            files, subdirectories = self.list_directory(current_path, current_key)
+            children = current.children
+            for name in files:
+                children.append(FileNode(name, current))
+            pending = []
+            for name, sub_path, sub_key in subdirectories:
+                child = DirectoryNode(name, current)
+                children.append(child)
+                pending.append((child, sub_path, sub_key))
+            stack.extend(reversed(pending))
+
+
+class _DirectoryIndex:
+    """目录的查找索引和缓存, 第一次需要时才创建, 未参与查找的目录(如数据节点)不占用"""
+
+    __slots__ = ("names", "keys", "root", "paths", "descendants")
+
+    def __init__(self) -> None:
+        # 规范化名称 -> 子节点
+        self.names: Optional[Dict[str, Any]] = None
+        # 与 children 一一对应的规范化名称, 通配符匹配时使用
+        self.keys: Optional[List[str]] = None
+        # 持有路径索引的根目录, 尚未建立路径索引时为None
+        self.root: Optional["DirectoryNode"] = None
+        # 只用于根目录: 规范化相对路径 -> 节点
+        self.paths: Optional[Dict[str, Any]] = None
+        # 当前目录及其所有子目录(先序)
+        self.descendants: Optional[List["DirectoryNode"]] = None
+
+
 class DirectoryNode(BaseNode[T]):
-    """目录节点"""
+    """目录节点
+
+    按名称查找时使用两个索引, 均在第一次查找时建立, 之后由 add_child / remove_child 维护:
+    - 每个目录的 规范化名称 -> 子节点;
+    - 根目录的 规范化相对路径 -> 节点, 不含通配符的路径模式一次查找即可。
+    ** 模式使用缓存的子目录列表, 增删目录时作废该目录及其所有上级目录的缓存。
+    索引和缓存都放在按需创建的 _DirectoryIndex 中。
+    """
+
+    __slots__ = ("children", "_lookup")
 
     def __init__(self, dir_name: str, parent: Optional["DirectoryNode[T]"] = None):
         super().__init__(dir_name, FileType.DIRECTORY, parent)
         self.children: List[Union[FileNode[T], "DirectoryNode[T]"]] = []
+        self._lookup: Optional[_DirectoryIndex] = None
+
+    def _index(self) -> _DirectoryIndex:
+        """本目录的索引对象, 不存在时创建"""
+        if self._lookup is None:
+            self._lookup = _DirectoryIndex()
+        return self._lookup
 
     def add_child(self, node: Union[FileNode[T], "DirectoryNode[T]"]) -> None:
-        """添加子节点"""
+        """添加子节点, 同时更新名称索引和路径索引"""
         node.parent = self
         self.children.append(node)
+        lookup = self._lookup
+        root = None
+        if lookup is not None:
+            if lookup.names is not None or lookup.keys is not None:
+                key = FilePathResolver.normalize_path(node.name)
+                if lookup.names is not None:
+                    _index_add(lookup.names, key, node)
+                if lookup.keys is not None:
+                    lookup.keys.append(key)
+            root = lookup.root
+        if isinstance(node, DirectoryNode):
+            node._set_index_root(root)
+            self._invalidate_descendant_dirs()
+        if root is not None:
+            root._index_subtree(node)
+
+    def remove_child(self, node: Union[FileNode[T], "DirectoryNode[T]"]) -> None:
+        """移除子节点, 同时更新名称索引和路径索引"""
+        lookup = self._lookup
+        if lookup is not None and lookup.root is not None:
+            lookup.root._unindex_subtree(node)
+        position = self.children.index(node)
+        del self.children[position]
+        if lookup is not None:
+            if lookup.keys is not None:
+                del lookup.keys[position]
+            if lookup.names is not None:
+                _index_remove(lookup.names, FilePathResolver.normalize_path(node.name), node)
+        if isinstance(node, DirectoryNode):
+            node._set_index_root(None)
+            self._invalidate_descendant_dirs()
+        node.parent = None
+
+    def _children_named(self, key: str) -> List[Union[FileNode[T], "DirectoryNode[T]"]]:
+        """规范化名称为 key 的子节点"""
+        lookup = self._index()
+        index = lookup.names
+        if index is None:
+            index = lookup.names = {}
+            for child in self.children:
+                _index_add(index, FilePathResolver.normalize_path(child.name), child)
+        entry = index.get(key, _MISSING)
+        if entry is _MISSING:
+            return []
+        if entry is None:
+            return [
+                child
+                for child in self.children
+                if FilePathResolver.normalize_path(child.name) == key
+            ]
+        return [entry]
+
+    def _normalized_child_names(self) -> List[str]:
+        """与 children 一一对应的规范化名称"""
+        lookup = self._index()
+        if lookup.keys is None:
+            lookup.keys = [
+                FilePathResolver.normalize_path(child.name) for child in self.children
+            ]
+        return lookup.keys
+
+    def _set_index_root(self, root: Optional["DirectoryNode[T]"]) -> None:
+        """设置子树中所有目录持有路径索引的根目录, 子树原有的路径索引作废"""
+
+        def stale(directory: DirectoryNode[T]) -> bool:
+            lookup = directory._lookup
+            if lookup is None:
+                return root is not None
+            return lookup.root is not root or lookup.paths is not None
+
+        stack: List[DirectoryNode[T]] = [self]
+        while stack:
+            directory = stack.pop()
+            lookup = directory._index() if root is not None else directory._lookup
+            if lookup is not None:
+                if directory is not root:
+                    lookup.paths = None
+                lookup.root = root
+            stack.extend(
+                child
+                for child in directory.children
+                if isinstance(child, DirectoryNode) and stale(child)
+            )
+
+    def _relative_key(self, node: BaseNode) -> str:
+        """node 相对于本目录的规范化路径"""
+        names: List[str] = []
+        current: Optional[BaseNode] = node
+        while current is not None and current is not self:
+            names.append(FilePathResolver.normalize_path(current.name))
+            current = current.parent
+        return "/".join(reversed(names))
+
+    def _index_subtree(self, node: Union[FileNode[T], "DirectoryNode[T]"]) -> None:
+        """将 node 及其子树加入本目录(根目录)的路径索引"""
+        index = cast(Dict[str, Any], self._index().paths)
+        prefix = self._relative_key(cast(BaseNode, node.parent))
+        stack: List[Tuple[Union[FileNode[T], DirectoryNode[T]], str]] = [(node, prefix)]
+        while stack:
+            current, parent_key = stack.pop()
+            name = FilePathResolver.normalize_path(current.name)
+            key = f"{parent_key}/{name}" if parent_key else name
+            _index_add(index, key, current)
+            if isinstance(current, DirectoryNode):
+                stack.extend((child, key) for child in current.children)
+
+    def _unindex_subtree(self, node: Union[FileNode[T], "DirectoryNode[T]"]) -> None:
+        """将 node 及其子树移出本目录(根目录)的路径索引"""
+        index = cast(Dict[str, Any], self._index().paths)
+        key = self._relative_key(node)
+        stack: List[Tuple[Union[FileNode[T], DirectoryNode[T]], str]] = [(node, key)]
+        while stack:
+            current, key = stack.pop()
+            _index_remove(index, key, current)
+            if isinstance(current, DirectoryNode):
+                stack.extend(
+                    (child, f"{key}/{FilePathResolver.normalize_path(child.name)}")
+                    for child in current.children
+                )
+
+    def _find_by_literal_path(
+        self, pattern: str
+    ) -> Optional[List[Union[FileNode[T], "DirectoryNode[T]"]]]:
+        """在根目录的路径索引中查找不含通配符的规范化路径
+
+        索引的键是规范化(小写)的路径, 只有大小写不同的目录(如 Cfg/ 和 cfg/)共用同一个键,
+        因此本目录的键还对应其他目录时不使用索引, 否则会找到另一个目录中的文件。
+
+        Returns:
+            匹配的节点列表; 路径或本目录的键对应多个节点, 或本目录不在索引中时返回None,
+            由调用方逐级查找
+        """
+        root = self._index().root
+        if root is None:
+            root = self
+            while root.parent:
+                root = cast(DirectoryNode[T], root.parent)
+            root_lookup = root._index()
+            if root_lookup.paths is None:
+                root_lookup.paths = {}
+                root._set_index_root(root)
+                for child in root.children:
+                    root._index_subtree(child)
+            if self._index().root is not root:
+                return None  # 本目录未通过 add_child 加入树中
+        paths = cast(Dict[str, Any], root._index().paths)
+        prefix = root._relative_key(self)
+        if prefix and paths.get(prefix) is not self:
+            return None  # 其他目录与本目录的规范化路径相同
+        entry = paths.get(f"{prefix}/{pattern}" if prefix else pattern, _MISSING)
+        if entry is _MISSING:
+            return []
+        if entry is None:
+            return None
+        return [entry]
 
     def create_file(self, file_name: str) -> "FileNode[T]":
         """创建文件节点"""
@@ -150,60 +583,94 @@ class DirectoryNode(BaseNode[T]):
         return dir_node
 
     def build_tree(
-        self, tree_path: str, patterns: Optional[Union[str, List[str]]] = None
+        self,
+        tree_path: str,
+        patterns: Optional[Union[str, List[str]]] = None,
+        exclude: Optional[Union[str, List[str]]] = None,
+        workers: Optional[int] = None,
     ) -> "DirectoryNode[T]":
-        """构建目录树"""
+        """构建目录树
+
+        用 os.scandir 逐级扫描, 子目录的节点和相对路径都由父目录直接得到。
+        每个目录的子节点顺序与 os.walk 相同: 先是文件, 后是子目录;
+        指向目录的符号链接和无法读取的目录不进入。
+
+        Args:
+            tree_path: 根目录路径
+            patterns: 文件名模式, 为空时加入所有文件
+            exclude: 排除模式, 匹配的文件不加入, 匹配的目录整个跳过不扫描(如 ".git", "output");
+                不含 "/" 的模式匹配名称, 含 "/" 的模式匹配相对于 tree_path 的路径
+            workers: 大于1时用线程池并行扫描 tree_path 的各个一级子目录
+        """
         if isinstance(patterns, str):
             patterns = [patterns]
+        if isinstance(exclude, str):
+            exclude = [exclude]
 
         if not os.path.isdir(tree_path):
             raise ValueError(f"{tree_path} is not a valid directory path.")
 
-        # 创建目录映射
-        dir_nodes: Dict[str, DirectoryNode] = {}
-        root_path = Path(tree_path).resolve()
-
-        for root, dirs, files in os.walk(tree_path):
-            current_path = Path(root).resolve()
-            rel_path = current_path.relative_to(root_path)
-            current_dir_path = str(rel_path)
+        scanner = _TreeScanner(patterns or [], exclude or [])
+        files, directories = scanner.list_directory(tree_path, "")
+        for name in files:
+            self.add_child(FileNode(name, self))
 
-            # 创建或获取目录节点
-            if current_dir_path not in dir_nodes:
-                if current_dir_path == ".":
-                    current_dir = self
-                else:
-                    parent_path = str(rel_path.parent)
-                    parent_dir = dir_nodes[parent_path]
-                    current_dir = parent_dir.create_directory(rel_path.name)
-                dir_nodes[current_dir_path] = current_dir
-            else:
-                current_dir = dir_nodes[current_dir_path]
-
-            # 添加文件
-            for filename in files:
-                normalized_filename = FilePathResolver.normalize_path(filename)
-                if not patterns or any(
-                    fnmatch(normalized_filename, FilePathResolver.normalize_path(p))
-                    for p in patterns
-                ):
-                    current_dir.create_file(filename)
+        # 一级子目录先在游离的节点上扫描, 完成后再按顺序加入, 以维护已建立的索引
+        subtrees = [
+            (DirectoryNode(name), path, key) for name, path, key in directories
+        ]
+        if workers is not None and workers > 1 and len(subtrees) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda args: scanner.scan(*args), subtrees))
+        else:
+            for subtree in subtrees:
+                scanner.scan(*subtree)
+        for directory, _, _ in subtrees:
+            self.add_child(directory)
         # 设置根节点的名称
         # self.name = str(root_path.resolve())
         return self
 
     def _get_all_nodes(self) -> List[Union[FileNode[T], "DirectoryNode[T]"]]:
-        """获取当前目录及其子目录下的所有节点"""
-        result = [cast(DirectoryNode[T], self)]
-        if not isinstance(self, DirectoryNode):
-            pass
-        else:
-            for child in self.children:
-                if isinstance(child, DirectoryNode):
-                    result.extend(child._get_all_nodes())
-                else:
-                    result.append(cast(FileNode[T], child))
-        return result
+        """获取当前目录及其子目录下的所有节点(先序, 使用显式栈遍历)"""
+        return list(self._iter_all_nodes())
+
+    def _iter_all_nodes(self) -> Iterator[Union[FileNode[T], "DirectoryNode[T]"]]:
+        """逐个产出当前目录及其子目录下的所有节点(先序)"""
+        stack: List[Union[FileNode[T], "DirectoryNode[T]"]] = [
+            cast(DirectoryNode[T], self)
+        ]
+        while stack:
+            node = stack.pop()
+            yield node
+            if isinstance(node, DirectoryNode):
+                stack.extend(reversed(node.children))
+
+    def _descendant_directories(self) -> List["DirectoryNode[T]"]:
+        """当前目录及其所有子目录(先序), 缓存到子树中的目录发生增删为止"""
+        lookup = self._index()
+        if lookup.descendants is None:
+            result: List[DirectoryNode[T]] = []
+            stack: List[DirectoryNode[T]] = [self]
+            while stack:
+                directory = stack.pop()
+                result.append(directory)
+                stack.extend(
+                    child
+                    for child in reversed(directory.children)
+                    if isinstance(child, DirectoryNode)
+                )
+            lookup.descendants = result
+        return lookup.descendants
+
+    def _invalidate_descendant_dirs(self) -> None:
+        """作废当前目录及所有上级目录缓存的子目录列表"""
+        current: Optional[BaseNode] = self
+        while current is not None:
+            lookup = cast(DirectoryNode[T], current)._lookup
+            if lookup is not None:
+                lookup.descendants = None
+            current = current.parent
 
     # def _get_relative_paths(
     #     self, base_dir: "DirectoryNode"
@@ -248,12 +715,20 @@ class DirectoryNode(BaseNode[T]):
         if path_pattern == "":
             return result
 
-        pattern = FilePathResolver.normalize_path(path_pattern)
+        compiled = compile_pattern(path_pattern)
+        pattern = compiled.pattern
         base_directories: List[DirectoryNode] = [self]
 
-        parts = pattern.split("/")
+        parts = compiled.parts
+        matchers = compiled.matchers
         last_index = len(parts) - 1
 
+        # 不含通配符和 . / .. 的路径直接在路径索引中查找
+        if compiled.literal:
+            found = self._find_by_literal_path(pattern)
+            if found is not None:
+                return found
+
         # 处理绝对路径
         if pattern.startswith("/"):
             # 找到根节点
@@ -262,11 +737,15 @@ class DirectoryNode(BaseNode[T]):
                 root = root.parent
             base_directories = [cast(DirectoryNode[T], root)]
             parts = parts[1:]  # 跳过空的第一个元素
+            matchers = matchers[1:]
             last_index = len(parts) - 1
 
         for index, part in enumerate(parts):
+            match = matchers[index]
             # 为每一层创建新的目录列表
             next_directories: List[DirectoryNode] = []
+            # 本层 ** 已展开的目录, 它们的子树不再重复展开
+            expanded: Set[DirectoryNode] = set()
 
             for base_dir in base_directories:
                 if part == ".":
@@ -281,31 +760,45 @@ class DirectoryNode(BaseNode[T]):
                         next_directories.append(cast(DirectoryNode[T], base_dir.parent))
 
                 elif part == "**":
-                    # 收集所有子节点用于继续搜索
-                    all_nodes = base_dir._get_all_nodes()
-                    for node in all_nodes:
-                        if isinstance(node, DirectoryNode):
-                            next_directories.append(node)
-                        if index == last_index:  # 如果是最后一个部分，所有节点都是结果
+                    if base_dir in expanded:
+                        continue  # 已包含在之前展开的目录的子树中
+                    if index == last_index:
+                        # 最后一个部分: 子树中的所有节点都是结果, 逐个枚举
+                        for node in base_dir._iter_all_nodes():
+                            if isinstance(node, DirectoryNode):
+                                expanded.add(node)
                             result.append(node)
+                    else:
+                        # 只需要子目录用于继续搜索
+                        directories = base_dir._descendant_directories()
+                        expanded.update(directories)
+                        next_directories.extend(directories)
+
+                elif match is None:
+                    # 普通名称按名称索引查找
+                    for child in base_dir._children_named(part):
+                        if isinstance(child, DirectoryNode):
+                            next_directories.append(child)
+                        if index == last_index:
+                            result.append(child)
 
                 else:
-                    # 常规模式匹配
-                    for child in base_dir.children:
-                        child_name = FilePathResolver.normalize_path(child.name)
-                        pattern_name = FilePathResolver.normalize_path(part)
-                        if fnmatch(child_name, pattern_name):
+                    # 通配符模式匹配
+                    for child_name, child in zip(
+                        base_dir._normalized_child_names(), base_dir.children
+                    ):
+                        if match(child_name):
                             if isinstance(child, DirectoryNode):
                                 next_directories.append(child)
                             if index == last_index:
                                 result.append(child)
 
-            # 更新当前搜索的目录列表
-            base_directories = list(set(next_directories))  # 去重
+            # 更新当前搜索的目录列表(保持发现顺序去重, 使结果顺序可复现)
+            base_directories = list(dict.fromkeys(next_directories))
             if not base_directories and index < last_index:
                 return []  # 如果中途没有找到匹配的目录，提前返回空列表
 
-        return list(set(result))  # 返回去重后的结果
+        return list(dict.fromkeys(result))  # 返回去重后的结果
 
     # def find_nodes_by_path(self, path_pattern: str) -> List[BaseNode]:
     #     """
@@ -0,0 +1,58 @@
+"""Test cases for the synthetic end-to-end benchmark"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.benchmark.bench_e2e import compare_reports, run_benchmark
+from modules.benchmark.synth import SyntheticProjectConfig, create_synthetic_project
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_synthetic_project_shape(self):
+        """Test file count, multiple roots and determinism of the generator"""
+        config = SyntheticProjectConfig(file_count=20, depth=2, fan_out=3, seed=7)
+        project = create_synthetic_project(os.path.join(self.test_dir, "a"), config)
+        # 一棵树容量为 1 + 3 + 9 = 13, 20个文件需要两棵树
+        self.assertEqual(project.file_count, 20)
+        self.assertEqual(project.root_count, 2)
+
+        again = create_synthetic_project(os.path.join(self.test_dir, "b"), config)
+        with open(os.path.join(project.data_dir, "root0.yaml"), encoding="utf-8") as f:
+            first = f.read()
+        with open(os.path.join(again.data_dir, "root0.yaml"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), first)
+
+        with self.assertRaises(ValueError):
+            SyntheticProjectConfig(expr_density=1.5).validate()
+
+    def test_run_benchmark_report(self):
+        """Test the end-to-end run renders every file and reports phases"""
+        config = SyntheticProjectConfig(
+            file_count=15, depth=2, fan_out=4, data_size=3, expr_density=0.5
+        )
+        report = run_benchmark(config)
+
+        self.assertEqual(report["nodes_rendered"], 15)
+        self.assertGreater(report["output_bytes"], 0)
+        self.assertGreater(report["wall_time_s"], 0)
+        self.assertEqual(report["phases"]["parse"]["count"], 15)
+        self.assertIn("build_tree", report["phases"])
+
+        table = compare_reports(report, report)
+        self.assertIn("wall_time_s", table)
+        self.assertIn("+0.0%", table)
+
+
+if __name__ == "__main__":
+    unittest.main()
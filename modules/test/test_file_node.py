@@ -9,7 +9,15 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from modules.node.file_node import DirectoryNode, FileNode, FilePathResolver, BaseNode
+from modules.node.file_node import (
+    DirectoryNode,
+    FileNode,
+    FilePathResolver,
+    BaseNode,
+    PATH_CACHE_MAX_DEPTH,
+    compile_pattern,
+)
+from modules.node.data_node import DataNode
 
 
 class TestFileNode(unittest.TestCase):
@@ -159,6 +167,38 @@ class TestFileNode(unittest.TestCase):
         self.assertIsNotNone(nested_yaml)
         self.assertEqual(nested_yaml.get_absolute_path(), "/nested/deep")
 
+    def test_file_tree_build_exclude_and_workers(self):
+        """Test excluded directories are pruned and parallel scans build the same tree"""
+        self.create_test_files(["output/gen.yaml", ".git/objects/x.yaml", "vars/skip.bak"])
+
+        def paths(root):
+            return [node.get_absolute_path() for node in root._get_all_nodes()]
+
+        full = DirectoryNode("").build_tree(self.test_dir, "*.yaml")
+        self.assertIn("/output/gen.yaml", paths(full))
+
+        pruned = DirectoryNode("").build_tree(
+            self.test_dir, "*.yaml", exclude=[".git", "OUTPUT", "nested/deep"]
+        )
+        self.assertEqual(
+            sorted(paths(pruned)),
+            ["/", "/config.yaml", "/nested", "/vars", "/vars/var1.yaml", "/vars/var2.yaml"],
+        )
+        # 排除模式也作用于文件
+        no_bak = DirectoryNode("").build_tree(self.test_dir, exclude="*.bak")
+        self.assertNotIn("/vars/skip.bak", paths(no_bak))
+        self.assertIn("/vars/data.json", paths(no_bak))
+
+        # 文件在前, 子目录在后, 与串行扫描的结果和顺序相同
+        parallel = DirectoryNode("").build_tree(self.test_dir, "*.yaml", workers=4)
+        self.assertEqual(paths(parallel), paths(full))
+        self.assertEqual(parallel.children[0].name, "config.yaml")
+
+        # 已建立索引的目录上构建, 新节点可以立即查找
+        self.root.find_nodes_by_path("missing.yaml")
+        self.root.build_tree(self.test_dir, "*.yaml", workers=2)
+        self.assertEqual(len(self.root.find_nodes_by_path("nested/deep/file.yaml")), 1)
+
     def test_relative_paths(self):
         """Test relative path calculations"""
         # 创建嵌套目录结构
@@ -285,6 +325,174 @@ class TestFileNode(unittest.TestCase):
         # root = DirectoryNode("root")
         # self.assertEqual(root.get_absolute_path(), "/root")
 
+    def test_name_and_path_index(self):
+        """Test literal lookups follow tree mutations after the indexes are built"""
+        self.root.build_tree(self.test_dir)
+        vars_dir = self.root.find_nodes_by_path("vars")[0]
+        self.assertEqual(
+            [node.name for node in self.root.find_nodes_by_path("./vars/var1.yaml")],
+            ["var1.yaml"],
+        )
+        self.assertEqual(
+            [node.name for node in vars_dir.find_nodes_by_path("../nested/deep/file.yaml")],
+            ["file.yaml"],
+        )
+        self.assertEqual(self.root.find_nodes_by_path("vars/missing.yaml"), [])
+        self.assertIsNotNone(self.root._lookup.paths)
+
+        # 索引建立后的增加, 移动和删除
+        deep = self.root.find_nodes_by_path("nested/deep")[0]
+        new_file = deep.create_file("New.yaml")
+        self.assertEqual(deep.find_nodes_by_path("new.yaml"), [new_file])
+        self.assertEqual(self.root.find_nodes_by_path("nested/deep/new.yaml"), [new_file])
+        var1 = self.root.find_nodes_by_path("vars/var1.yaml")[0]
+        var1.move_to_directory(deep)
+        self.assertEqual(self.root.find_nodes_by_path("vars/var1.yaml"), [])
+        self.assertEqual(vars_dir.find_nodes_by_path("var1.yaml"), [])
+        self.assertEqual(self.root.find_nodes_by_path("nested/deep/var1.yaml"), [var1])
+        extra = vars_dir.create_directory("extra")
+        extra.create_file("x.yaml")
+        self.assertEqual(len(self.root.find_nodes_by_path("vars/extra/x.yaml")), 1)
+        vars_dir.remove_child(extra)
+        self.assertEqual(self.root.find_nodes_by_path("vars/extra/x.yaml"), [])
+        self.assertEqual(extra.find_nodes_by_path("x.yaml")[0].name, "x.yaml")
+
+        # 规范化后同名的节点都会被找到
+        upper = vars_dir.create_file("VAR2.yaml")
+        self.assertEqual(len(self.root.find_nodes_by_path("vars/var2.yaml")), 2)
+        self.assertIn(upper, vars_dir.find_nodes_by_path("var2.yaml"))
+
+    def test_literal_lookup_with_case_colliding_directories(self):
+        """Test directories differing only in case do not share literal lookups"""
+        for path in ("cfg/root.yaml", "Cfg/x.yaml", "a/cfg/y.yaml", "A/cfg/z.yaml"):
+            full_path = os.path.join(self.test_dir, "case", path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            open(full_path, "w").close()
+        root = DirectoryNode("").build_tree(os.path.join(self.test_dir, "case"))
+        lower = [d for d in root.children if d.name == "cfg"][0]
+        upper = [d for d in root.children if d.name == "Cfg"][0]
+
+        self.assertEqual(lower.find_nodes_by_path("x.yaml"), [])
+        self.assertEqual(
+            [node.get_absolute_path() for node in upper.find_nodes_by_path("x.yaml")],
+            ["/Cfg/x.yaml"],
+        )
+        # 祖先目录大小写冲突时同样只在本目录中查找
+        nested = root.find_nodes_by_path("a/cfg")
+        self.assertEqual(len(nested), 2)
+        for directory in nested:
+            expected = "y.yaml" if directory.parent.name == "a" else "z.yaml"
+            self.assertEqual(
+                [node.name for node in directory.find_nodes_by_path(expected)], [expected]
+            )
+            other = "z.yaml" if expected == "y.yaml" else "y.yaml"
+            self.assertEqual(directory.find_nodes_by_path(other), [])
+
+    def test_compiled_pattern(self):
+        """Test patterns are split, classified and cached once per string"""
+        compiled = compile_pattern("./Vars/../vars/*.YAML")
+        self.assertEqual(compiled.parts, ("vars", "..", "vars", "*.yaml"))
+        self.assertEqual([m is None for m in compiled.matchers], [True, True, True, False])
+        self.assertFalse(compiled.literal)
+        self.assertTrue(compiled.matchers[3]("var1.yaml"))
+        self.assertFalse(compiled.matchers[3]("var1.json"))
+        self.assertTrue(compile_pattern("vars/var1.yaml").literal)
+        self.assertIs(compile_pattern("./Vars/../vars/*.YAML"), compiled)
+
+        for pattern in ("var?.yaml", "[!d]*.json", "*"):
+            match = compile_pattern(pattern).matchers[0]
+            for name in ("var1.yaml", "data.json", "x"):
+                self.assertEqual(bool(match(name)), fnmatch(name, pattern), (pattern, name))
+
+    def test_recursive_listing_cache(self):
+        """Test ** results follow directory changes made after a cached lookup"""
+        self.root.build_tree(self.test_dir)
+
+        def names(nodes):
+            return sorted(node.name for node in nodes)
+
+        self.assertEqual(names(self.root.find_nodes_by_path("**/*.yaml")),
+                         ["config.yaml", "file.yaml", "var1.yaml", "var2.yaml"])
+        self.assertIsNotNone(self.root._lookup.descendants)
+
+        deep = self.root.find_nodes_by_path("nested/deep")[0]
+        deeper = deep.create_directory("deeper")
+        deeper.create_file("new.yaml")
+        self.assertIsNone(self.root._lookup.descendants)
+        self.assertIn("new.yaml", names(self.root.find_nodes_by_path("**/*.yaml")))
+        # 文件的增删不影响缓存的目录列表
+        deeper.create_file("other.yaml")
+        self.assertIsNotNone(self.root._lookup.descendants)
+        self.assertIn("other.yaml", names(self.root.find_nodes_by_path("**/*.yaml")))
+
+        deep.remove_child(deeper)
+        self.assertNotIn("new.yaml", names(self.root.find_nodes_by_path("**/*.yaml")))
+
+        # 重叠的 ** 不产生重复结果, 顺序与单个 ** 相同
+        self.assertEqual(
+            self.root.find_nodes_by_path("**/**"), self.root.find_nodes_by_path("**")
+        )
+        self.assertEqual(self.root.find_nodes_by_path("**"), self.root._get_all_nodes())
+
+    def test_path_cache_follows_reparenting(self):
+        """Test cached paths are dropped for a moved subtree and deep chains stay exact"""
+        a = self.root.create_directory("a")
+        b = self.root.create_directory("b")
+        sub = a.create_directory("sub")
+        leaf = sub.create_file("leaf.yaml")
+        self.assertEqual(leaf.get_absolute_path(), "/a/sub/leaf.yaml")
+        self.assertEqual(leaf.get_relative_path(b), "../a/sub/leaf.yaml")
+
+        a.remove_child(sub)
+        b.add_child(sub)
+        self.assertEqual(leaf.get_absolute_path(), "/b/sub/leaf.yaml")
+        self.assertEqual(leaf.get_relative_path(b), "sub/leaf.yaml")
+        self.assertEqual(b.get_relative_path(leaf), "../..")
+        leaf.move_to_directory(a)
+        self.assertEqual(leaf.get_absolute_path(slice_range=(1, None)), "/leaf.yaml")
+        self.assertEqual(sub.get_relative_path(leaf), "../../b/sub")
+
+        # 超过缓存深度的节点不缓存路径, 结果仍然正确
+        node = self.root
+        for index in range(PATH_CACHE_MAX_DEPTH + 10):
+            node = node.create_directory(f"n{index}")
+        expected = "/" + "/".join(f"n{index}" for index in range(PATH_CACHE_MAX_DEPTH + 10))
+        self.assertEqual(node.get_absolute_path(), expected)
+        self.assertIsNone(node._path)
+        self.assertEqual(node.get_relative_path(b), "../" + expected[1:])
+
+    def test_relative_path_between_same_named_siblings(self):
+        """Test distinct siblings sharing a name are not treated as the same node"""
+        directory = self.root.create_directory("same")
+        first = FileNode("x.yaml")
+        second = FileNode("x.yaml")
+        directory.add_child(first)
+        directory.add_child(second)
+
+        # 按节点而不是按名称比较: 两个不同节点之间是 "../x.yaml", 而不是 "."
+        self.assertEqual(first.get_relative_path(second), "../x.yaml")
+        self.assertEqual(second.get_relative_path(first), "../x.yaml")
+        self.assertEqual(first.get_relative_path(first), ".")
+        self.assertEqual(first._relative_path_by_names(second), ".")
+
+    def test_nodes_use_slots(self):
+        """Test node instances carry no __dict__ and still pickle"""
+        import pickle
+
+        for node in (FileNode("a.yaml"), DirectoryNode("dir"), DataNode({}, "d")):
+            self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            FileNode("a.yaml").extra = 1
+
+        root = DataNode({"name": "root"}, "root.yaml")
+        root.add_child(DataNode(None, "lazy.yaml", loader=lambda: {"value": 1}))
+        root.add_children_group(1)
+        restored = pickle.loads(pickle.dumps(root))
+        self.assertEqual(restored.children_group_number, [1])
+        self.assertIs(restored.children[0].parent, restored)
+        self.assertEqual(restored.children[0].data, {"value": 1})
+        self.assertEqual(DataNode({}, "leaf").children_group_number, ())
+
 
 if __name__ == "__main__":
     unittest.main()
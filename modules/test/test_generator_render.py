@@ -0,0 +1,704 @@
+"""Test cases for DataDrivenGenerator rendering modes"""
+
+import asyncio
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+import shutil
+from unittest import mock
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.core import GeneratorError
+from modules.core.data_driven_generator import (
+    DataDrivenGenerator,
+    DataDrivenGeneratorConfig,
+)
+from modules.core.render_plan import RenderPlan
+from modules.core.tracing import ChromeTraceExporter
+from modules.core.types import DataHandlerType, TemplateHandlerType
+from modules.yaml.yaml_handler import _YamlFileHandler
+
+
+class _MemorySink(io.StringIO):
+    """Text sink that keeps its content in a dict when closed"""
+
+    def __init__(self, store, name):
+        super().__init__()
+        self.store = store
+        self.name_key = name
+
+    def close(self):
+        self.store[self.name_key] = self.getvalue()
+        super().close()
+
+
+class TestGeneratorRender(unittest.TestCase):
+    def setUp(self):
+        """Create a temporary data/template project for testing"""
+        self.test_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.test_dir, "data")
+        self.template_dir = os.path.join(self.test_dir, "template")
+
+        files = {
+            "data/root.yaml": (
+                'TEMPLATE_PATH: "root.j2"\n'
+                'CHILDREN_PATH: ["ctr/*.yaml", "other.yaml"]\n'
+                'name: "root"\n'
+            ),
+            "data/other.yaml": (
+                'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: "other"\n'
+            ),
+            "template/root.j2": (
+                "<root name=\"{{ name }}\">\n"
+                "    {{ CHILDREN_CONTEXT0 | indent(4) }}\n"
+                "    {{ CHILDREN_CONTEXT1 | indent(4) }}\n"
+                "</root>\n"
+            ),
+            "template/ctr.j2": (
+                "<ctr name=\"{{ name }}\">\n"
+                "    {{ CHILDREN_CONTEXT0 | indent(4) }}\n"
+                "</ctr>"
+            ),
+            "template/leaf.j2": "<var name=\"{{ name }}\"/>",
+        }
+        for ctr in range(3):
+            files[f"data/ctr/ctr{ctr}.yaml"] = (
+                'TEMPLATE_PATH: "ctr.j2"\n'
+                f'CHILDREN_PATH: ["../vars{ctr}/*.yaml"]\n'
+                f'name: "ctr{ctr}"\n'
+            )
+            for var in range(4):
+                files[f"data/vars{ctr}/var{var}.yaml"] = (
+                    'TEMPLATE_PATH: "leaf.j2"\n'
+                    "CHILDREN_PATH: []\n"
+                    f'name: "var{ctr}_{var}"\n'
+                )
+        for path, content in files.items():
+            full_path = os.path.join(self.test_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        """Clean up temporary files"""
+        shutil.rmtree(self.test_dir)
+
+    def create_generator(self, **kwargs) -> DataDrivenGenerator:
+        """Helper method to create a generator for the test project"""
+        config = DataDrivenGeneratorConfig(
+            data_type=DataHandlerType.YAML_HANDLER,
+            data_config={"root_path": self.data_dir, "file_pattern": ["*.yaml"]},
+            template_type=TemplateHandlerType.JINJA_HANDLER,
+            template_config={"template_dir": self.template_dir},
+            **kwargs,
+        )
+        return DataDrivenGenerator(config)
+
+    def test_serial_render(self):
+        """Test serial rendering keeps the CHILDREN group order"""
+        results = self.create_generator().render("root.yaml")
+        content = results["root.yaml"]
+
+        self.assertIn('<ctr name="ctr0">', content)
+        self.assertIn('<var name="var2_3"/>', content)
+        self.assertLess(content.index("ctr2"), content.index('"other"'))
+
+    def test_parallel_render_matches_serial(self):
+        """Test process-pool rendering produces byte-identical output"""
+        serial = self.create_generator().render("root.yaml")
+        parallel = self.create_generator(max_workers=2).render("root.yaml")
+        self.assertEqual(serial, parallel)
+
+    def test_sharded_render_matches_render(self):
+        """Test sharding roots across worker processes gives the render outputs"""
+        generator = self.create_generator()
+        with generator.create_worker_pool(2) as pool:
+            for pattern in ("**/*.yaml", "root.yaml"):
+                expected = self.create_generator().render(pattern)
+                sharded = dict(generator.render_sharded(pattern, 2, pool))
+                self.assertEqual(sharded, expected)
+
+    def test_sharded_render_reused_pool_sees_changes(self):
+        """Test a reused worker pool rebuilds its trees for every call and pattern"""
+        generator = self.create_generator()
+        with generator.create_worker_pool(2) as pool:
+            first = dict(generator.render_sharded("root.yaml", 2, pool))
+            self.assertIn('<var name="var1_2"/>', first["root.yaml"])
+
+            with open(os.path.join(self.data_dir, "vars1", "var2.yaml"), "w", encoding="utf-8") as f:
+                f.write('TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: "edited"\n')
+            for pattern in ("root.yaml", "ctr/*.yaml", "root.yaml"):
+                expected = self.create_generator().render(pattern)
+                sharded = dict(generator.render_sharded(pattern, 2, pool))
+                self.assertEqual(sharded, expected)
+            self.assertIn('<var name="edited"/>', sharded["root.yaml"])
+
+    def test_shard_order_longest_subtree_first(self):
+        """Test roots are scheduled by subtree size and duplicate names collapse"""
+        trees = self.create_generator().data_handler.create_data_tree("**/*.yaml")
+        order = [trees[index] for index in DataDrivenGenerator._shard_order(trees)]
+
+        self.assertEqual(order[0].name, "root.yaml")
+        self.assertEqual(
+            sorted(tree.name for tree in order[1:4]), ["ctr0.yaml", "ctr1.yaml", "ctr2.yaml"]
+        )
+        self.assertEqual(len(order), len({tree.name for tree in trees}))
+
+    def test_memory_budget_spills_and_releases_children(self):
+        """Test a small memory budget spills child outputs and frees them"""
+        expected = self.create_generator().render("root.yaml")
+        generator = self.create_generator(memory_budget=60)
+        spill = generator._spill
+        peak = {"in_memory": 0}
+        original_admit = spill.admit
+
+        def tracking_admit(content):
+            output = original_admit(content)
+            peak["in_memory"] = max(peak["in_memory"], spill.in_memory)
+            return output
+
+        spill.admit = tracking_admit
+        self.assertEqual(generator.render("root.yaml"), expected)
+        self.assertGreater(spill.spilled, 0)
+        self.assertLessEqual(peak["in_memory"], 60)
+        self.assertEqual(spill.in_memory, 0)
+        self.assertIsNone(spill._directory)
+        # 只保留根节点的结果, 注入的子节点内容也已删除
+        self.assertEqual(len(generator._rendered_contents), 1)
+        root = next(iter(generator._rendered_contents))
+        self.assertNotIn("CHILDREN_CONTEXT0", root.data)
+        self.assertNotIn("CHILDREN_CONTEXT0", root.children[0].data)
+
+        streamed = {}
+        for name, chunks in generator.render_stream("root.yaml"):
+            streamed[name] = "".join(chunks)
+        self.assertEqual(streamed, expected)
+
+    def test_render_cache_reuses_unchanged_subtrees(self):
+        """Test the render cache only re-renders the path of a changed leaf"""
+        cache_dir = os.path.join(self.test_dir, "cache")
+        first = self.create_generator(cache_dir=cache_dir).render("root.yaml")
+
+        generator = self.create_generator(cache_dir=cache_dir)
+        rendered = []
+        original = generator.template_handler.render_template
+
+        def tracking_render(template_path, node, data_handler):
+            rendered.append(node.name)
+            return original(template_path, node, data_handler)
+
+        generator.template_handler.render_template = tracking_render
+        self.assertEqual(generator.render("root.yaml"), first)
+        self.assertEqual(rendered, [])
+
+        leaf_path = os.path.join(self.data_dir, "vars1", "var2.yaml")
+        with open(leaf_path, "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: "changed"\n')
+
+        results = generator.render("root.yaml")
+        self.assertIn('<var name="changed"/>', results["root.yaml"])
+        self.assertEqual(sorted(rendered), ["ctr1.yaml", "root.yaml", "var2.yaml"])
+
+    def test_render_cache_sees_template_edits(self):
+        """Test a reused generator re-renders after a template changes on disk"""
+        generator = self.create_generator(cache_dir=os.path.join(self.test_dir, "cache"))
+        self.assertEqual(generator.render("other.yaml"), {"other.yaml": '<var name="other"/>'})
+
+        template_path = os.path.join(self.template_dir, "leaf.j2")
+        with open(template_path, "w", encoding="utf-8") as f:
+            f.write('<leaf name="{{ name }}"/>')
+        mtime = os.stat(template_path).st_mtime + 10
+        os.utime(template_path, (mtime, mtime))
+
+        self.assertEqual(
+            generator.render("other.yaml"), {"other.yaml": '<leaf name="other"/>'}
+        )
+
+    def test_render_cache_stores_streamed_root(self):
+        """Test a fully streamed root is written to the render cache"""
+        cache_dir = os.path.join(self.test_dir, "cache")
+        streamed = {
+            name: "".join(chunks)
+            for name, chunks in self.create_generator(cache_dir=cache_dir).render_stream(
+                "root.yaml"
+            )
+        }
+
+        generator = self.create_generator(cache_dir=cache_dir)
+        rendered = []
+        original = generator.template_handler.render_template
+
+        def tracking_render(template_path, node, data_handler):
+            rendered.append(node.name)
+            return original(template_path, node, data_handler)
+
+        generator.template_handler.render_template = tracking_render
+        self.assertEqual(generator.render("root.yaml"), streamed)
+        self.assertEqual(rendered, [])
+
+    def test_render_cache_prunes_least_recently_used(self):
+        """Test the render cache keeps at most cache_max_entries entries"""
+        cache_dir = os.path.join(self.test_dir, "cache")
+        self.create_generator(cache_dir=cache_dir).render("root.yaml")
+        cache = self.create_generator(cache_dir=cache_dir).render_cache
+        self.assertEqual(len(cache._entries()), 17)
+
+        # 最先写入的条目最近被读取过, 清理时保留
+        oldest = min(cache._entries())[1]
+        for offset, (_, entry_path) in enumerate(sorted(cache._entries())):
+            os.utime(entry_path, (1000 + offset, 1000 + offset))
+        self.assertIsNotNone(cache.get(oldest.name))
+
+        generator = self.create_generator(cache_dir=cache_dir, cache_max_entries=5)
+        generator.render("other.yaml")
+        entries = [entry_path for _, entry_path in generator.render_cache._entries()]
+        self.assertEqual(len(entries), 5)
+        self.assertIn(oldest, entries)
+
+        self.assertEqual(generator.render_cache.clear(), 5)
+        self.assertEqual(generator.render_cache._entries(), [])
+
+    def test_compile_plan_wiring_and_order(self):
+        """Test the compiled plan lists children before parents with group wiring"""
+        plan = self.create_generator().compile_plan("root.yaml")
+        files = [node.file for node in plan.nodes]
+
+        self.assertEqual(len(plan.nodes), 17)
+        self.assertEqual([files[i] for i in plan.roots], ["root.yaml"])
+        root = plan.nodes[plan.roots[0]]
+        self.assertEqual(root.template, "root.j2")
+        self.assertEqual(root.templates, ["root.j2"])
+        self.assertEqual(
+            [sorted(files[i] for i in group) for group in root.groups],
+            [["ctr/ctr0.yaml", "ctr/ctr1.yaml", "ctr/ctr2.yaml"], ["other.yaml"]],
+        )
+        for position, node in enumerate(plan.nodes):
+            for group in node.groups:
+                self.assertTrue(all(child < position for child in group))
+        self.assertIn(os.path.join(self.data_dir, "root.yaml"), plan.inputs)
+
+        restored = RenderPlan.from_dict(json.loads(json.dumps(plan.to_dict())))
+        self.assertEqual(restored, plan)
+
+    def test_plan_cache_skips_tree_discovery(self):
+        """Test a cached plan rebuilds the trees without resolving CHILDREN patterns"""
+        plan_dir = os.path.join(self.test_dir, "plans")
+        expected = self.create_generator().render("root.yaml")
+        self.assertEqual(
+            self.create_generator(plan_cache_dir=plan_dir).render("root.yaml"), expected
+        )
+        self.assertEqual(len(os.listdir(plan_dir)), 1)
+
+        generator = self.create_generator(plan_cache_dir=plan_dir)
+        with mock.patch.object(
+            generator.data_handler, "create_data_tree", side_effect=AssertionError
+        ):
+            self.assertEqual(generator.render("root.yaml"), expected)
+
+    def test_plan_cache_invalidated_by_changed_inputs(self):
+        """Test modifying or adding a data file makes the cached plan stale"""
+        plan_dir = os.path.join(self.test_dir, "plans")
+        self.create_generator(plan_cache_dir=plan_dir).render("root.yaml")
+
+        leaf_path = os.path.join(self.data_dir, "vars0", "var0.yaml")
+        with open(leaf_path, "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: "changed0"\n')
+        results = self.create_generator(plan_cache_dir=plan_dir).render("root.yaml")
+        self.assertIn('<var name="changed0"/>', results["root.yaml"])
+
+        new_path = os.path.join(self.data_dir, "vars2", "var9.yaml")
+        with open(new_path, "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: "added"\n')
+        generator = self.create_generator(plan_cache_dir=plan_dir)
+        results = generator.render("root.yaml")
+        self.assertIn('<var name="added"/>', results["root.yaml"])
+        self.assertEqual(generator.render("root.yaml"), results)
+
+    def test_cross_reference_loads_unwired_file_lazily(self):
+        """Test find_by_file_path resolves files outside the tree on first access"""
+        files = {
+            "lookup_root.yaml": (
+                'TEMPLATE_PATH: "lookup.j2"\nCHILDREN_PATH: []\n'
+                "expr:\n  type: function\n  args: [math:node_value, lookup/table.yaml]\n"
+            ),
+            "lookup/table.yaml": 'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nvalue: 42\n',
+            "lookup/unused.yaml": 'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nvalue: 7\n',
+        }
+        for path, content in files.items():
+            full_path = os.path.join(self.data_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        with open(os.path.join(self.template_dir, "lookup.j2"), "w", encoding="utf-8") as f:
+            f.write("<value>{{ expr | expr_filter | int }}</value>")
+
+        generator = self.create_generator()
+        loaded = []
+        original_load = _YamlFileHandler._load_yaml_file
+
+        def tracking_load(yaml_path, *args):
+            loaded.append(os.path.basename(yaml_path))
+            return original_load(yaml_path, *args)
+
+        with mock.patch.object(
+            _YamlFileHandler, "_load_yaml_file", staticmethod(tracking_load)
+        ):
+            results = generator.render("lookup_root.yaml")
+        self.assertEqual(results["lookup_root.yaml"], "<value>42</value>")
+        self.assertEqual(loaded, ["lookup_root.yaml", "table.yaml"])
+
+        handler = generator.data_handler
+        root = handler.create_data_tree("lookup_root.yaml")[0]
+        table = handler.find_by_file_path(root, "lookup/*.yaml")
+        self.assertEqual(sorted(node.name for node in table), ["table.yaml", "unused.yaml"])
+        self.assertFalse(any(node.is_loaded for node in table))
+        self.assertEqual(sorted(node.data["value"] for node in table), [7, 42])
+
+    def test_stream_render_matches_render(self):
+        """Test streaming render writes the same bytes and releases children"""
+        expected = self.create_generator().render("root.yaml")
+
+        generator = self.create_generator()
+        streamed = {}
+        for name, chunks in generator.render_stream("root.yaml"):
+            streamed[name] = "".join(chunks)
+            self.assertEqual(generator._rendered_contents, {})
+        self.assertEqual(streamed, expected)
+
+    def test_pipeline_render_matches_render(self):
+        """Test the load/render/write pipeline writes the same outputs as render"""
+        for pattern in ("root.yaml", "**/*.yaml"):
+            expected = self.create_generator().render(pattern)
+            written = {}
+            generator = self.create_generator()
+            names = generator.render_pipeline(
+                pattern, lambda name: _MemorySink(written, name), queue_size=1
+            )
+            # 同名的根节点依次写入, 与render结果中后者覆盖前者一致
+            self.assertEqual(set(names), set(expected))
+            self.assertEqual(written, expected)
+            self.assertEqual(generator._rendered_contents, {})
+
+    def test_pipeline_backpressure_bounds_loaded_trees(self):
+        """Test the loader stage cannot run ahead of a slow writer"""
+        generator = self.create_generator()
+        counters = {"loaded": 0, "written": 0, "ahead": 0}
+        original_iter = generator.data_handler.iter_data_trees
+
+        def counting_iter(pattern):
+            for tree in original_iter(pattern):
+                counters["loaded"] += 1
+                counters["ahead"] = max(
+                    counters["ahead"], counters["loaded"] - counters["written"]
+                )
+                yield tree
+
+        def slow_sink(name):
+            time.sleep(0.01)
+            counters["written"] += 1
+            return _MemorySink({}, name)
+
+        generator.data_handler.iter_data_trees = counting_iter
+        names = generator.render_pipeline("**/*.yaml", slow_sink, queue_size=1)
+        self.assertEqual(len(names), 17)
+        # 两个队列各1个, 渲染中1个, 写入中1个, 加载线程等待放入的1个
+        self.assertLessEqual(counters["ahead"], 5)
+
+    def test_pipeline_error_stops_all_stages(self):
+        """Test a render error is raised and every stage thread exits"""
+        with open(os.path.join(self.data_dir, "other.yaml"), "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "missing.j2"\nCHILDREN_PATH: []\nname: "other"\n')
+        threads_before = threading.active_count()
+        with self.assertRaises(GeneratorError):
+            self.create_generator().render_pipeline(
+                "**/*.yaml", lambda name: _MemorySink({}, name)
+            )
+        self.assertEqual(threading.active_count(), threads_before)
+
+    def test_pipeline_cross_reference_while_loading(self):
+        """Test a template lookup of a file the loader thread is still building shares one node"""
+        files = {
+            "pipe_a.yaml": (
+                'TEMPLATE_PATH: "lookup.j2"\nCHILDREN_PATH: []\n'
+                "expr:\n  type: function\n  args: [math:node_value, shared/table.yaml]\n"
+            ),
+            "pipe_b.yaml": (
+                'TEMPLATE_PATH: "ctr.j2"\nCHILDREN_PATH: ["shared/table.yaml"]\nname: "b"\n'
+            ),
+            "shared/table.yaml": (
+                'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: "table"\nvalue: 42\n'
+            ),
+        }
+        for path, content in files.items():
+            full_path = os.path.join(self.data_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        with open(os.path.join(self.template_dir, "lookup.j2"), "w", encoding="utf-8") as f:
+            f.write("<value>{{ expr | expr_filter | int }}</value>")
+
+        generator = self.create_generator()
+        handler = generator.data_handler
+        # 固定根节点顺序: 先渲染 pipe_a, 同时加载线程构建引用同一文件的 pipe_b
+        handler.file_tree.children.sort(key=lambda node: node.name)
+        loaded = []
+        original_load = _YamlFileHandler._load_yaml_file
+
+        def slow_table_load(yaml_path, *args):
+            if os.path.basename(yaml_path) == "table.yaml":
+                loaded.append(yaml_path)
+                time.sleep(0.2)
+            return original_load(yaml_path, *args)
+
+        written = {}
+        with mock.patch.object(
+            _YamlFileHandler, "_load_yaml_file", staticmethod(slow_table_load)
+        ):
+            generator.render_pipeline(
+                "pipe_*.yaml", lambda name: _MemorySink(written, name), queue_size=2
+            )
+        self.assertEqual(written["pipe_a.yaml"], "<value>42</value>")
+        self.assertIn('<var name="table"/>', written["pipe_b.yaml"])
+        self.assertEqual(len(loaded), 1)
+        tables = [node for node in handler._file_node_mapping if node.name == "table.yaml"]
+        self.assertEqual(len(tables), 1)
+
+    def slow_down_render(self, generator, delay=0.01):
+        """Helper method to make every node render take at least delay seconds"""
+        rendered = []
+        original = generator.template_handler.render_template
+
+        def slow_render(template_path, node, data_handler):
+            time.sleep(delay)
+            rendered.append(node.name)
+            return original(template_path, node, data_handler)
+
+        generator.template_handler.render_template = slow_render
+        return rendered
+
+    def test_render_async_matches_render(self):
+        """Test async rendering yields every root and keeps the loop responsive"""
+        expected = self.create_generator().render("**/*.yaml")
+        generator = self.create_generator()
+        self.slow_down_render(generator)
+
+        async def main():
+            ticks = 0
+            done = False
+
+            async def ticker():
+                nonlocal ticks
+                while not done:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            ticker_task = asyncio.ensure_future(ticker())
+            results = {}
+            async for name, content in generator.render_async("**/*.yaml"):
+                results[name] = content
+            done = True
+            await ticker_task
+            return results, ticks
+
+        results, ticks = asyncio.run(main())
+        self.assertEqual(results, expected)
+        self.assertGreater(ticks, 5)
+
+    def test_render_async_concurrent_requests(self):
+        """Test concurrent requests on one generator run one after another"""
+        expected = self.create_generator().render("root.yaml")
+        generator = self.create_generator()
+
+        async def collect(pattern):
+            return {name: content async for name, content in generator.render_async(pattern)}
+
+        async def main():
+            return await asyncio.gather(collect("root.yaml"), collect("root.yaml"))
+
+        first, second = asyncio.run(main())
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+
+    def test_render_async_cancellation(self):
+        """Test cancelling the consumer stops rendering at the next node"""
+        generator = self.create_generator()
+        rendered = self.slow_down_render(generator, delay=0.02)
+
+        async def consume():
+            async for _ in generator.render_async("root.yaml"):
+                pass
+
+        async def main():
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            stopped_at = len(rendered)
+            await asyncio.sleep(0.1)
+            self.assertEqual(len(rendered), stopped_at)
+            self.assertLess(stopped_at, 13)
+
+            # 取消后生成器可以继续使用
+            results = {name: content async for name, content in generator.render_async("root.yaml")}
+            return results
+
+        results = asyncio.run(main())
+        self.assertEqual(results, self.create_generator().render("root.yaml"))
+
+    def test_render_async_cancellation_during_tree_build(self):
+        """Test cancelling while trees are built stops before the remaining roots"""
+        generator = self.create_generator()
+        built = []
+        original_iter = generator.data_handler.iter_data_trees
+
+        def slow_iter(pattern):
+            for tree in original_iter(pattern):
+                time.sleep(0.02)
+                built.append(tree.name)
+                yield tree
+
+        generator.data_handler.iter_data_trees = slow_iter
+
+        async def consume():
+            async for _ in generator.render_async("**/*.yaml"):
+                pass
+
+        async def main():
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        self.assertLess(len(built), 17)
+
+    def test_render_async_across_event_loops(self):
+        """Test one generator serves requests from successive event loops"""
+        expected = self.create_generator().render("root.yaml")
+        generator = self.create_generator()
+
+        async def collect():
+            return {name: content async for name, content in generator.render_async("root.yaml")}
+
+        async def main():
+            # 并发的请求在锁上等待, 锁因此与当前事件循环关联
+            return await asyncio.gather(collect(), collect())
+
+        self.assertEqual(asyncio.run(main()), [expected, expected])
+        self.assertEqual(asyncio.run(main()), [expected, expected])
+
+    def test_overlapping_roots_parse_and_render_once(self):
+        """Test files shared by several parents or roots are handled once"""
+        generator = self.create_generator()
+        loaded = []
+        original_load = _YamlFileHandler._load_yaml_file
+
+        def tracking_load(yaml_path, *args):
+            loaded.append(yaml_path)
+            return original_load(yaml_path, *args)
+
+        rendered = []
+        original_render = generator.template_handler.render_template
+
+        def tracking_render(template_path, node, data_handler):
+            rendered.append(node.name)
+            return original_render(template_path, node, data_handler)
+
+        generator.template_handler.render_template = tracking_render
+        with mock.patch.object(
+            _YamlFileHandler, "_load_yaml_file", staticmethod(tracking_load)
+        ):
+            results = generator.render("**/*.yaml")
+
+        self.assertEqual(len(loaded), 17)
+        self.assertEqual(len(loaded), len(set(loaded)))
+        self.assertEqual(len(rendered), 17)
+        self.assertEqual(
+            results["ctr1.yaml"],
+            self.create_generator().render("ctr/ctr1.yaml")["ctr1.yaml"],
+        )
+
+    def test_deep_chain_beyond_recursion_limit(self):
+        """Test a CHILDREN chain deeper than the Python recursion limit"""
+        depth = sys.getrecursionlimit() + 200
+        chain_dir = os.path.join(self.data_dir, "chain")
+        for index in range(depth):
+            next_path = f"../b{(index + 1) // 100}/n{index + 1}.yaml"
+            children = f'["{next_path}"]' if index + 1 < depth else "[]"
+            bucket_dir = os.path.join(chain_dir, f"b{index // 100}")
+            os.makedirs(bucket_dir, exist_ok=True)
+            with open(os.path.join(bucket_dir, f"n{index}.yaml"), "w") as f:
+                f.write(
+                    'TEMPLATE_PATH: "leaf.j2"\n'
+                    f"CHILDREN_PATH: {children}\n"
+                    f'name: "n{index}"\n'
+                )
+
+        generator = DataDrivenGenerator(
+            DataDrivenGeneratorConfig(
+                data_type=DataHandlerType.YAML_HANDLER,
+                data_config={"root_path": chain_dir, "max_depth": depth},
+                template_type=TemplateHandlerType.JINJA_HANDLER,
+                template_config={"template_dir": self.template_dir},
+            )
+        )
+        trees = generator.data_handler.create_data_tree("b0/n0.yaml")
+        self.assertEqual(len(list(trees[0].iter_data_nodes())), depth)
+
+        results = generator.render("b0/n0.yaml")
+        self.assertEqual(results["n0.yaml"], '<var name="n0"/>')
+
+    def test_trace_node_events_balanced_on_error(self):
+        """Test a failing node still gets its end event in render and stream modes"""
+        with open(os.path.join(self.data_dir, "root.yaml"), "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "bad.j2"\nCHILDREN_PATH: ["ctr/*.yaml"]\nname: "root"\n')
+        with open(os.path.join(self.template_dir, "bad.j2"), "w", encoding="utf-8") as f:
+            f.write("{{ name }}{{ missing_function() }}")
+
+        def render_stream(generator):
+            for _, chunks in generator.render_stream("root.yaml"):
+                "".join(chunks)
+
+        for run in (lambda generator: generator.render("root.yaml"), render_stream):
+            generator = self.create_generator()
+            exporter = ChromeTraceExporter()
+            generator.add_hook(exporter)
+            with self.assertRaises(GeneratorError):
+                run(generator)
+            node_events = [e["ph"] for e in exporter.events if e["cat"] == "node"]
+            self.assertEqual(node_events.count("B"), node_events.count("E"))
+            self.assertEqual(node_events.count("B"), 16)
+
+    def test_trace_hooks_and_chrome_export(self):
+        """Test tracing hooks receive node/phase events and export trace JSON"""
+        generator = self.create_generator()
+        exporter = ChromeTraceExporter()
+        generator.add_hook(exporter)
+        generator.render("root.yaml")
+
+        phases = {e["name"] for e in exporter.events if e["cat"] == "phase"}
+        self.assertEqual(
+            phases, {"build_tree", "parse", "create_resolver", "get_template", "render"}
+        )
+        node_starts = [e for e in exporter.events if e["cat"] == "node" and e["ph"] == "B"]
+        self.assertEqual(len(node_starts), 17)
+
+        trace_path = os.path.join(self.test_dir, "trace.json")
+        exporter.write(trace_path)
+        with open(trace_path, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["traceEvents"]), len(exporter.events))
+
+        generator.remove_hook(exporter)
+        self.assertFalse(generator.tracer.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Test cases for the skip-unchanged output writer"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from modules.core.output_writer import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.test_dir, "out")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _set_old_mtime(self, path):
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    def test_write_skips_unchanged_files(self):
+        """Test identical content is skipped and changed content is replaced"""
+        writer = OutputWriter(self.output_dir, "xml")
+        self.assertTrue(writer.write("a", "<a/>\n"))
+        path = writer.path_for("a")
+        self._set_old_mtime(path)
+
+        writer = OutputWriter(self.output_dir, "xml")
+        self.assertFalse(writer.write("a", "<a/>\n"))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1_000_000_000)
+
+        # 大小相同但内容不同时也要写入
+        self.assertTrue(writer.write("a", "<b/>\n"))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "<b/>\n")
+        self.assertEqual(writer.written, [path])
+        self.assertEqual(writer.skipped, [path])
+        self.assertEqual(writer.summary(), "1 written, 1 unchanged")
+        self.assertEqual(os.listdir(self.output_dir), ["a.xml"])
+
+    def test_open_sink_commits_on_close(self):
+        """Test streamed output replaces the file only when its bytes differ"""
+        writer = OutputWriter(self.output_dir, "xml")
+        with writer.open_sink("s") as sink:
+            sink.write("<s>")
+            sink.write("</s>")
+        path = writer.path_for("s")
+        self._set_old_mtime(path)
+
+        with writer.open_sink("s") as sink:
+            sink.write("<s></s>")
+        self.assertEqual(os.stat(path).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(writer.summary(), "1 written, 1 unchanged")
+
+        # 渲染出错时保留原文件并删除临时文件
+        with self.assertRaises(RuntimeError):
+            with writer.open_sink("s") as sink:
+                sink.write("partial")
+                raise RuntimeError("render failed")
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "<s></s>")
+        self.assertEqual(os.listdir(self.output_dir), ["s.xml"])
+
+    def test_new_files_follow_umask_without_changing_it(self):
+        """Test new files get the umask mode and writing never touches the umask"""
+        if os.name != "posix":
+            self.skipTest("file modes are POSIX-specific")
+        umask = os.umask(0)
+        os.umask(umask)
+        with mock.patch("os.umask", side_effect=AssertionError("umask changed")):
+            writer = OutputWriter(self.output_dir, "xml")
+            writer.write("a", "<a/>\n")
+            with writer.open_sink("s") as sink:
+                sink.write("<s/>")
+        for name in ("a", "s"):
+            mode = os.stat(writer.path_for(name)).st_mode & 0o777
+            self.assertEqual(mode, 0o666 & ~umask)
+
+
+if __name__ == "__main__":
+    unittest.main()
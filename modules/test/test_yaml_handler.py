@@ -1,12 +1,33 @@
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 # Add the parent directory to sys.path to import modules
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from modules.yaml.yaml_handler import YamlDataTreeHandler
+import yaml
+
+from modules.yaml.parse_cache import ParseCache
+from modules.yaml.errors import (
+    YamlConfigError,
+    YamlError,
+    YamlErrorType,
+    YamlLoadError,
+    YamlPathError,
+    YamlStructureError,
+)
+from modules.core.render_plan import PlanNode, RenderPlan
+from modules.yaml.yaml_handler import (
+    YamlDataTreeHandler,
+    INTERN_MAX_LENGTH,
+    _LibyamlLoader,
+    _YamlFileHandler,
+    resolve_loader,
+)
 
 
 class TestYamlHandler(unittest.TestCase):
@@ -70,5 +91,456 @@ class TestYamlHandler(unittest.TestCase):
             )
 
 
+class TestYamlParserBackend(unittest.TestCase):
+    """Test cases for the parser backend setting and the JSON fast path"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        files = {
+            "root.yaml": 'TEMPLATE_PATH: "root.j2"\nCHILDREN_PATH: ["*.json"]\nname: root\n',
+            "strict.json": '{"TEMPLATE_PATH": "leaf.j2", "CHILDREN_PATH": [], "value": 1}',
+            # 不是严格JSON(单引号), 退回YAML解析
+            "loose.json": "{'TEMPLATE_PATH': 'leaf.j2', 'CHILDREN_PATH': [], 'value': 2}",
+        }
+        for name, content in files.items():
+            with open(os.path.join(self.test_dir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_resolve_loader(self):
+        """Test libyaml falls back to the pure-Python loader when unavailable"""
+        self.assertIs(resolve_loader("python"), yaml.SafeLoader)
+        self.assertIs(resolve_loader("libyaml"), _LibyamlLoader or yaml.SafeLoader)
+        with self.assertRaises(YamlConfigError):
+            resolve_loader("ruamel")
+        with self.assertRaises(YamlConfigError):
+            YamlDataTreeHandler({"root_path": self.test_dir, "parser_backend": "fast"})
+
+    def test_backends_load_same_data(self):
+        """Test every backend and the JSON fast path give the same data tree"""
+        results = []
+        for backend in ("python", "libyaml"):
+            for json_fast_path in (False, True):
+                handler = YamlDataTreeHandler(
+                    {
+                        "root_path": self.test_dir,
+                        "file_pattern": ["*.yaml", "*.json"],
+                        "parser_backend": backend,
+                        "json_fast_path": json_fast_path,
+                    }
+                )
+                root = handler.create_data_tree("root.yaml")[0]
+                results.append(
+                    sorted((child.name, child.data["value"]) for child in root.children)
+                )
+        self.assertEqual(results[0], [("loose.json", 2), ("strict.json", 1)])
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_invalid_file_raises_load_error(self):
+        """Test a file that is neither JSON nor YAML raises YamlLoadError"""
+        path = os.path.join(self.test_dir, "broken.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"a": [1, 2}')
+        for loader in (yaml.SafeLoader, resolve_loader("libyaml")):
+            with self.assertRaises(YamlLoadError):
+                _YamlFileHandler._load_yaml_file(path, loader, True)
+
+
+class TestParseCache(unittest.TestCase):
+    """Test cases for the persistent parsed-file cache"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.test_dir, "data")
+        self.cache_dir = os.path.join(self.test_dir, "cache")
+        os.makedirs(self.data_dir)
+        self.root_path = os.path.join(self.data_dir, "root.yaml")
+        self._write_root("root", mtime_ns=1_000_000_000)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write_root(self, name, mtime_ns):
+        with open(self.root_path, "w", encoding="utf-8") as f:
+            f.write(f'TEMPLATE_PATH: "root.j2"\nCHILDREN_PATH: []\nname: {name}\n')
+        # 固定mtime, 模拟同一时间戳内的修改
+        os.utime(self.root_path, ns=(mtime_ns, mtime_ns))
+
+    def _load_root(self, **config):
+        handler = YamlDataTreeHandler(
+            {"root_path": self.data_dir, "parse_cache_dir": self.cache_dir, **config}
+        )
+        return handler, handler.create_data_tree("root.yaml")[0].data["name"]
+
+    def test_hit_skips_parse(self):
+        """Test an unchanged file is read from the cache without parsing"""
+        handler, name = self._load_root()
+        self.assertEqual((name, handler.parse_cache.misses), ("root", 1))
+
+        with mock.patch.object(
+            _YamlFileHandler, "_load_yaml_file", side_effect=AssertionError
+        ):
+            handler, name = self._load_root()
+        self.assertEqual((name, handler.parse_cache.hits), ("root", 1))
+
+        # 解析后端不同时不共用条目
+        handler, _ = self._load_root(parser_backend="python")
+        if _LibyamlLoader is not None:
+            self.assertEqual(handler.parse_cache.misses, 1)
+
+    def test_changed_file_invalidates_entry(self):
+        """Test changes in mtime, size or (with verify_hash) content miss the cache"""
+        self._load_root()
+        self._write_root("root2", mtime_ns=2_000_000_000)
+        self.assertEqual(self._load_root()[1], "root2")
+
+        self._write_root("root3", mtime_ns=3_000_000_000)
+        self.assertEqual(self._load_root()[1], "root3")
+
+        # 大小和mtime都不变的修改只有校验哈希时才能发现
+        self._load_root(parse_cache_verify_hash=True)
+        self._write_root("root4", mtime_ns=3_000_000_000)
+        self.assertEqual(self._load_root(parse_cache_verify_hash=True)[1], "root4")
+
+    def test_corrupt_entry_is_ignored(self):
+        """Test a damaged cache entry counts as a miss and is rewritten"""
+        self._load_root()
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                with open(os.path.join(directory, name), "wb") as f:
+                    f.write(b"not a pickle")
+        handler, name = self._load_root()
+        self.assertEqual((name, handler.parse_cache.misses), ("root", 1))
+        handler, _ = self._load_root()
+        self.assertEqual(handler.parse_cache.hits, 1)
+
+    def test_recently_modified_file_records_hash(self):
+        """Test files modified within the racy window are always hash-checked"""
+        cache = ParseCache(self.cache_dir)
+        self.assertIsNone(cache.begin(self.root_path, os.stat(self.root_path))[2])
+        with open(self.root_path, "a", encoding="utf-8") as f:
+            f.write("extra: 1\n")
+        self.assertIsNotNone(cache.begin(self.root_path, os.stat(self.root_path))[2])
+
+
+class TestPrefetch(unittest.TestCase):
+    """Test cases for parsing data files on a worker pool ahead of tree wiring"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        files = {
+            "root.yaml": 'TEMPLATE_PATH: "root.j2"\nCHILDREN_PATH: ["ctr/*.yaml"]\nname: root\n',
+            "unused.yaml": 'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nname: unused\n',
+        }
+        for ctr in range(3):
+            files[f"ctr/ctr{ctr}.yaml"] = (
+                f'TEMPLATE_PATH: "ctr.j2"\nCHILDREN_PATH: ["../vars{ctr}/*.yaml"]\nname: ctr{ctr}\n'
+            )
+            for var in range(3):
+                files[f"vars{ctr}/var{var}.yaml"] = (
+                    f'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\nvalue: {ctr * 10 + var}\n'
+                )
+        for path, content in files.items():
+            full_path = os.path.join(self.test_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _build(self, **config):
+        handler = YamlDataTreeHandler({"root_path": self.test_dir, **config})
+        try:
+            root = handler.create_data_tree("root.yaml")[0]
+            self.assertEqual(handler._prefetched, {})
+        finally:
+            handler.close()
+        return [(node.name, node.data) for node in root.iter_data_nodes()]
+
+    def test_prefetch_builds_same_tree(self):
+        """Test prefetched parsing yields the same tree as sequential parsing"""
+        expected = self._build()
+        self.assertEqual(len(expected), 13)
+        self.assertEqual(self._build(prefetch_workers=2), expected)
+
+        # 预解析的结果写入解析缓存, 未被引用的文件也会被预解析
+        cache_dir = os.path.join(self.test_dir, "cache")
+        self.assertEqual(
+            self._build(prefetch_workers=2, parse_cache_dir=cache_dir), expected
+        )
+        entries = sum(len(files) for _, _, files in os.walk(cache_dir))
+        self.assertEqual(entries, 14)
+        self.assertEqual(
+            self._build(prefetch_workers=2, parse_cache_dir=cache_dir), expected
+        )
+
+    def test_prefetch_error_reports_file(self):
+        """Test a parse error in a worker surfaces as YamlLoadError for that file"""
+        broken = os.path.join(self.test_dir, "vars1", "var2.yaml")
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write("value: [1, 2\n")
+        with self.assertRaises(YamlError) as context:
+            self._build(prefetch_workers=2)
+        cause = context.exception
+        while cause.__cause__ is not None:
+            cause = cause.__cause__
+        self.assertIsInstance(cause, YamlLoadError)
+        self.assertEqual(cause.path, broken)
+
+    def test_exclude_pattern_and_scan_workers(self):
+        """Test excluded directories stay out of the file tree and threaded scans match"""
+        expected = self._build()
+        self.assertEqual(self._build(scan_workers=2), expected)
+
+        pruned = self._build(exclude_pattern=["vars2"])
+        self.assertEqual(len(pruned), len(expected) - 3)
+        self.assertNotIn(20, [data.get("value") for _, data in pruned])
+
+
+class TestInternStrings(unittest.TestCase):
+    """Test cases for interning keys and short values at load time"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        long_text = "x" * (INTERN_MAX_LENGTH + 1)
+        for name in ("a", "b"):
+            with open(os.path.join(self.test_dir, f"{name}.yaml"), "w", encoding="utf-8") as f:
+                f.write(
+                    'TEMPLATE_PATH: "leaf.j2"\nCHILDREN_PATH: []\n'
+                    f"shared: &s {{type: INTEGER_TYPE, tags: [alpha_tag]}}\n"
+                    f"alias: *s\ndescription: {long_text}\n"
+                )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _load(self, **config):
+        handler = YamlDataTreeHandler({"root_path": self.test_dir, **config})
+        return [handler.create_data_tree(f"{name}.yaml")[0].data for name in ("a", "b")]
+
+    def test_keys_and_short_values_are_shared(self):
+        """Test equal keys and short values across files are the same objects"""
+        a, b = self._load()
+        self.assertIs(next(k for k in a if k == "shared"), next(k for k in b if k == "shared"))
+        self.assertIs(a["shared"]["type"], b["shared"]["type"])
+        self.assertIs(a["shared"]["tags"][0], b["shared"]["tags"][0])
+        self.assertIsNot(a["description"], b["description"])
+        # YAML别名仍指向同一个对象
+        self.assertIs(a["alias"], a["shared"])
+
+        a, b = self._load(intern_strings=False)
+        self.assertIsNot(a["shared"]["type"], b["shared"]["type"])
+
+
+class TestCycleDetection(unittest.TestCase):
+    """Test cases for circular CHILDREN references"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, files):
+        for path, children in files.items():
+            full_path = os.path.join(self.test_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(f'TEMPLATE_PATH: "node.j2"\nCHILDREN_PATH: {children}\n')
+
+    def test_fixture_cycle_fails_fast(self):
+        """Test the circular fixture reports its cycle without reparsing files"""
+        handler = YamlDataTreeHandler(
+            {
+                "root_path": str(Path(__file__).parent / "yaml_test" / "configs" / "circular"),
+                "file_pattern": ["*.yaml"],
+            }
+        )
+        loaded = []
+        original_load = _YamlFileHandler._load_yaml_file
+
+        def tracking_load(yaml_path, *args):
+            loaded.append(os.path.basename(yaml_path))
+            return original_load(yaml_path, *args)
+
+        with mock.patch.object(
+            _YamlFileHandler, "_load_yaml_file", staticmethod(tracking_load)
+        ):
+            with self.assertRaises(YamlStructureError) as context:
+                handler.create_data_tree("circular1.yaml")
+        error = context.exception
+        self.assertEqual(error.error_type, YamlErrorType.CIRCULAR_REFERENCE)
+        self.assertEqual(error.cycle, ["circular1.yaml", "circular2.yaml", "circular1.yaml"])
+        self.assertIn("circular1.yaml -> circular2.yaml -> circular1.yaml", str(error))
+        self.assertEqual(loaded, ["circular1.yaml", "circular2.yaml"])
+
+    def test_nested_cycle_and_self_reference(self):
+        """Test the reported path starts at the repeated file, not at the root"""
+        self._write(
+            {
+                "root.yaml": '["a/a.yaml"]',
+                "a/a.yaml": '["../b/b.yaml"]',
+                "b/b.yaml": '["../c/c.yaml"]',
+                "c/c.yaml": '["../a/a.yaml"]',
+                "self.yaml": '["self.yaml"]',
+            }
+        )
+        handler = YamlDataTreeHandler({"root_path": self.test_dir})
+        with self.assertRaises(YamlStructureError) as context:
+            handler.create_data_tree("root.yaml")
+        error = context.exception
+        self.assertEqual(error.cycle, ["a/a.yaml", "b/b.yaml", "c/c.yaml", "a/a.yaml"])
+        # 与其他子节点错误一样逐层带有父/子节点上下文, 最内层是循环路径
+        self.assertTrue(str(error).startswith("CIRCULAR_REFERENCE: Error processing child a.yaml: "))
+        self.assertIn(
+            "Error processing child c.yaml: CIRCULAR_REFERENCE: "
+            "Error processing child a.yaml: CIRCULAR_REFERENCE: "
+            "Circular reference detected: a/a.yaml -> b/b.yaml -> c/c.yaml -> a/a.yaml",
+            str(error),
+        )
+        self.assertEqual(error.__cause__.cycle, error.cycle)
+        with self.assertRaises(YamlStructureError) as context:
+            handler.create_data_tree("self.yaml")
+        self.assertEqual(context.exception.cycle, ["self.yaml", "self.yaml"])
+        self.assertTrue(
+            str(context.exception).startswith(
+                "CIRCULAR_REFERENCE: Error processing child self.yaml: CIRCULAR_REFERENCE: "
+                "Circular reference detected: self.yaml -> self.yaml"
+            )
+        )
+
+    def test_shared_child_is_not_a_cycle(self):
+        """Test a diamond (two parents sharing a child) still builds"""
+        self._write(
+            {
+                "root.yaml": '["a.yaml", "b.yaml"]',
+                "a.yaml": '["shared.yaml"]',
+                "b.yaml": '["shared.yaml"]',
+                "shared.yaml": "[]",
+            }
+        )
+        handler = YamlDataTreeHandler({"root_path": self.test_dir})
+        root = handler.create_data_tree("root.yaml")[0]
+        self.assertEqual(len(list(root.iter_data_nodes())), 4)
+        self.assertEqual(handler._node_paths, {})
+
+
+class TestMultiDocument(unittest.TestCase):
+    """Test cases for multi-document YAML bundles"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "vars"))
+        documents = [
+            {"TEMPLATE_PATH": "var.j2", "CHILDREN_PATH": [], "name": f"Var{i}"}
+            for i in range(3)
+        ]
+        with open(os.path.join(self.test_dir, "vars", "all.yaml"), "w", encoding="utf-8") as f:
+            yaml.safe_dump_all(documents, f, sort_keys=False)
+        with open(os.path.join(self.test_dir, "vars", "single.yaml"), "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "var.j2"\nCHILDREN_PATH: []\nname: Var2\n')
+        with open(os.path.join(self.test_dir, "root.yaml"), "w", encoding="utf-8") as f:
+            f.write(
+                'TEMPLATE_PATH: "root.j2"\n'
+                'CHILDREN_PATH: ["vars/all.yaml", "vars/all.yaml#1", "vars/*.yaml#Var2"]\n'
+            )
+        self.handler = YamlDataTreeHandler({"root_path": self.test_dir})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_children_patterns_select_documents(self):
+        """Test a bundle expands into one child per document and is read once"""
+        loaded = []
+        original_load = _YamlFileHandler._load_yaml_file
+
+        def tracking_load(yaml_path, *args):
+            loaded.append(os.path.basename(yaml_path))
+            return original_load(yaml_path, *args)
+
+        with mock.patch.object(
+            _YamlFileHandler, "_load_yaml_file", staticmethod(tracking_load)
+        ):
+            root = self.handler.create_data_tree("root.yaml")[0]
+        self.assertEqual(sorted(loaded), ["all.yaml", "root.yaml", "single.yaml"])
+        self.assertEqual(list(root.children_group_number), [3, 1, 2])
+        names = [child.name for child in root.children]
+        self.assertEqual(names[:4], ["all.yaml#0", "all.yaml#1", "all.yaml#2", "all.yaml#1"])
+        self.assertEqual(sorted(names[4:]), ["all.yaml#2", "single.yaml"])
+        self.assertIs(root.children[1], root.children[3])
+        self.assertEqual(root.children[1].data["name"], "Var1")
+        self.assertEqual(self.handler.get_source_path(root.children[1]), "vars/all.yaml#1")
+
+        found = self.handler.find_by_file_path(root, "vars/all.yaml#Var0")
+        self.assertEqual([node.name for node in found], ["all.yaml#0"])
+        self.assertEqual(len(self.handler.find_by_file_path(root, "vars/all.yaml")), 3)
+        self.assertEqual(self.handler.find_by_file_path(root, "vars/all.yaml#7"), [])
+
+    def test_bundle_roots_and_plan(self):
+        """Test each document of a root bundle is a tree and plans address documents"""
+        trees = self.handler.create_data_tree("vars/all.yaml")
+        self.assertEqual([tree.name for tree in trees], ["all.yaml#0", "all.yaml#1", "all.yaml#2"])
+
+        plan = RenderPlan(
+            pattern="root.yaml",
+            config_key="",
+            nodes=[
+                PlanNode(file="vars/all.yaml#1", name="all.yaml#1", template="var.j2", parent=1),
+                PlanNode(file="root.yaml", name="root.yaml", template="root.j2", groups=[[0]]),
+            ],
+            roots=[1],
+            inputs={},
+        )
+        root = self.handler.create_data_tree_from_plan(plan)[0]
+        self.assertEqual([child.data["name"] for child in root.children], ["Var1"])
+        plan.nodes[0].file = "vars/all.yaml#5"
+        with self.assertRaises(YamlPathError):
+            self.handler.create_data_tree_from_plan(plan)
+
+    def test_unselected_lazy_bundle_reports_documents(self):
+        """Test a cross reference to an unloaded bundle without a selector fails clearly"""
+        with open(os.path.join(self.test_dir, "other.yaml"), "w", encoding="utf-8") as f:
+            f.write('TEMPLATE_PATH: "root.j2"\nCHILDREN_PATH: []\n')
+        handler = YamlDataTreeHandler({"root_path": self.test_dir})
+        other = handler.create_data_tree("other.yaml")[0]
+        lazy = handler.find_by_file_path(other, "vars/all.yaml")[0]
+        with self.assertRaises(YamlLoadError) as context:
+            lazy.data
+        self.assertIn("3 documents", str(context.exception))
+
+    def test_hash_in_file_name_is_not_a_selector(self):
+        """Test files whose names contain '#' still resolve as plain children"""
+        files = {
+            "c#1.yaml": 'TEMPLATE_PATH: "var.j2"\nCHILDREN_PATH: []\nname: hash\n',
+            "hash_root.yaml": 'TEMPLATE_PATH: "root.j2"\nCHILDREN_PATH: ["c#1.yaml", "vars/all.yaml#2"]\n',
+        }
+        for path, content in files.items():
+            with open(os.path.join(self.test_dir, path), "w", encoding="utf-8") as f:
+                f.write(content)
+        handler = YamlDataTreeHandler({"root_path": self.test_dir})
+        root = handler.create_data_tree("hash_root.yaml")[0]
+        self.assertEqual([child.name for child in root.children], ["c#1.yaml", "all.yaml#2"])
+        self.assertEqual(root.children[0].data["name"], "hash")
+        self.assertEqual(
+            [node.name for node in handler.find_by_file_path(root, "c#1.yaml")], ["c#1.yaml"]
+        )
+
+        plan = RenderPlan(
+            pattern="hash_root.yaml",
+            config_key="",
+            nodes=[
+                PlanNode(file="c#1.yaml", name="c#1.yaml", template="var.j2", parent=1),
+                PlanNode(file="hash_root.yaml", name="hash_root.yaml", template="root.j2", groups=[[0]]),
+            ],
+            roots=[1],
+            inputs={},
+        )
+        planned = handler.create_data_tree_from_plan(plan)[0]
+        self.assertEqual([child.data["name"] for child in planned.children], ["hash"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,5 @@
 from enum import Enum, auto
-from typing import Optional
+from typing import List, Optional
 
 class YamlErrorType(Enum):
     """Enumeration of possible YAML handling error types"""
@@ -45,6 +45,7 @@ class YamlStructureError(YamlError):
     """Error in YAML file structure"""
     def __init__(self, error_type: YamlErrorType, message: str, path: Optional[str] = None):
         super().__init__(error_type, message, path)
+        self.cycle: List[str] = []  # files forming a circular reference
 
     @classmethod
     def missing_key(cls, key: str, path: Optional[str] = None) -> "YamlStructureError":
@@ -52,9 +53,17 @@ class YamlStructureError(YamlError):
         return cls(YamlErrorType.MISSING_KEY, f"Missing required key '{key}'", path)
 
     @classmethod
-    def circular_reference(cls, path: str) -> "YamlStructureError":
-        """Create error for circular reference detection"""
-        return cls(YamlErrorType.CIRCULAR_REFERENCE, f"Circular reference detected", path)
+    def circular_reference(cls, path: str, cycle: Optional[List[str]] = None) -> "YamlStructureError":
+        """Create error for circular reference detection
+
+        cycle: files forming the cycle, starting and ending with the same file
+        """
+        message = "Circular reference detected"
+        if cycle:
+            message += ": " + " -> ".join(cycle)
+        error = cls(YamlErrorType.CIRCULAR_REFERENCE, message, path)
+        error.cycle = list(cycle or [])
+        return error
 
     @classmethod
     def max_depth_exceeded(cls, depth: int, path: str) -> "YamlStructureError":
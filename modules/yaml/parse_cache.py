@@ -0,0 +1,109 @@
+"""Persistent cache of parsed data files"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Optional, Tuple
+
+# 缓存格式版本, 条目格式或解析方式变化时递增以使旧缓存失效
+PARSE_CACHE_VERSION = "1"
+
+# mtime距写入缓存的时间小于该值(纳秒)的文件可能在同一个时间戳内再次被修改,
+# 这类条目总是额外记录并校验内容哈希
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def _content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """按文件路径, mtime和大小缓存数据文件解析结果的磁盘缓存
+
+    每个条目以pickle存储为 cache_dir/<key前两位>/<key>, key 由缓存版本,
+    解析方式 variant (解析后端等) 和文件的绝对路径计算。条目记录写入时文件的
+    mtime_ns 和大小, 读取时任一不符即视为未命中。
+    verify_hash 为True时条目还记录内容的sha256, 命中前重新计算比较(没有哈希的旧条目视为未命中);
+    mtime距写入时间过近的文件即使未开启也会校验, 避免同一时间戳内的修改被漏掉。
+    缓存目录中的条目会被反序列化执行, 只应指向受信任的目录。
+    """
+
+    # get() 未命中时的返回值(解析结果本身可能为None)
+    MISS = object()
+
+    def __init__(self, cache_dir: str, variant: str = "", verify_hash: bool = False) -> None:
+        self.cache_dir = cache_dir
+        self.variant = variant
+        self.verify_hash = verify_hash
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, path: str) -> str:
+        digest = hashlib.sha256()
+        for part in (PARSE_CACHE_VERSION, self.variant, os.path.abspath(path)):
+            digest.update(part.encode("utf-8") + b"\0")
+        key = digest.hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, path: str, stat: os.stat_result) -> Any:
+        """读取缓存的解析结果, stat 为文件当前的状态; 未命中时返回 ParseCache.MISS"""
+        try:
+            with open(self._entry_path(path), "rb") as f:
+                mtime_ns, size, content_hash, data = pickle.load(f)
+            if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+                raise ValueError("stale entry")
+            if content_hash is None and self.verify_hash:
+                raise ValueError("entry has no content hash")
+            if content_hash is not None and content_hash != _content_hash(path):
+                raise ValueError("content changed")
+        except Exception:
+            # 条目不存在, 损坏或已失效
+            self.misses += 1
+            return self.MISS
+        self.hits += 1
+        return data
+
+    def begin(self, path: str, stat: os.stat_result) -> Tuple[int, int, Optional[str]]:
+        """解析文件之前调用, 返回条目要记录的文件状态, 解析后传给 put()
+
+        需要内容哈希时在解析之前计算: 解析期间文件被修改时, 条目的哈希与
+        新内容不符, 下次读取只会未命中, 不会返回过期的结果。
+        """
+        content_hash = None
+        if self.verify_hash or time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            try:
+                content_hash = _content_hash(path)
+            except OSError:
+                pass
+        return (stat.st_mtime_ns, stat.st_size, content_hash)
+
+    def put(self, path: str, record: Tuple[int, int, Optional[str]], data: Any) -> None:
+        """写入解析结果, record 为解析前 begin() 返回的文件状态
+
+        解析期间文件的mtime发生变化时不写入。写入失败时静默忽略, 缓存只影响速度。
+        """
+        try:
+            if os.stat(path).st_mtime_ns != record[0]:
+                return
+            payload = pickle.dumps(record + (data,), protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        entry_path = self._entry_path(path)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,6 +1,12 @@
+import json
+import sys
+import threading
 import yaml
-from typing import Optional, List, Dict, Any, Iterator, cast
-from dataclasses import dataclass
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Set, Tuple, Union, cast
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
 from pathlib import Path
 
 from .errors import (
@@ -13,6 +19,34 @@ from .errors import (
 from ..node.data_node import DataNode
 from ..node.file_node import DirectoryNode, FileNode
 from ..core import DataHandler
+from ..core.render_plan import RenderPlan
+from ..core.tracing import Tracer
+from .parse_cache import ParseCache
+
+try:
+    from yaml import CSafeLoader as _LibyamlLoader
+except ImportError:  # PyYAML未编译libyaml绑定
+    _LibyamlLoader = None
+
+# 可选的YAML解析后端
+PARSER_BACKENDS = ("libyaml", "python")
+
+
+def resolve_loader(backend: str) -> type:
+    """返回解析后端对应的PyYAML加载器类
+
+    libyaml 在PyYAML未编译libyaml绑定时退回纯Python的 SafeLoader。
+
+    Raises:
+        YamlConfigError: 如果后端名称无效
+    """
+    if backend not in PARSER_BACKENDS:
+        raise YamlConfigError(
+            f"Invalid parser_backend '{backend}', expected one of {PARSER_BACKENDS}"
+        )
+    if backend == "libyaml" and _LibyamlLoader is not None:
+        return _LibyamlLoader
+    return yaml.SafeLoader
 
 
 @dataclass
@@ -24,7 +58,16 @@ class YamlConfig:
     encoding: str = "utf-8"
     preserved_template_key: str = "TEMPLATE_PATH"
     preserved_children_key: str = "CHILDREN_PATH"
-    max_depth: int = 1000  # 递归的最大深度
+    max_depth: int = 1000  # 数据树的最大深度
+    parser_backend: str = "libyaml"  # YAML解析后端: libyaml (不可用时退回python) 或 python
+    json_fast_path: bool = True  # .json文件先用json模块解析
+    parse_cache_dir: Optional[str] = None  # 解析结果缓存目录, None表示不使用缓存
+    parse_cache_verify_hash: bool = False  # 命中缓存前是否校验文件内容哈希
+    prefetch_workers: Optional[int] = None  # 预解析数据文件的进程数, None或1表示不预解析
+    intern_strings: bool = True  # 驻留映射的键和短字符串值, 多个文件中重复的字符串只保留一份
+    document_name_key: str = "name"  # 多文档文件中按名称选择文档(file.yaml#名称)时比较的键
+    exclude_pattern: List[str] = field(default_factory=list)  # 构建文件树时排除的文件和目录
+    scan_workers: Optional[int] = None  # 并行扫描一级子目录的线程数, None或1表示串行扫描
 
     @classmethod
     def validate(cls, config: Dict[str, Any]) -> "YamlConfig":
@@ -38,14 +81,28 @@ class YamlConfig:
                     - encoding: 文件编码 (默认: utf-8)
                     - preserved_template_key: 模板路径键名 (默认: TEMPLATE_PATH)
                     - preserved_children_key: 子节点路径键名 (默认: CHILDREN_PATH)
+                    - max_depth: 数据树的最大深度 (默认: 1000)
+                    - parser_backend: YAML解析后端 libyaml/python (默认: libyaml)
+                    - json_fast_path: .json文件是否先用json模块解析 (默认: True)
+                    - parse_cache_dir: 解析结果缓存目录 (默认: None, 不缓存)
+                    - parse_cache_verify_hash: 命中缓存前是否校验内容哈希 (默认: False)
+                    - prefetch_workers: 预解析数据文件的进程数 (默认: None, 不预解析)
+                    - intern_strings: 是否驻留键和短字符串值 (默认: True)
+                    - document_name_key: 按名称选择多文档文件中文档的键 (默认: name)
+                    - exclude_pattern: 排除的文件和目录模式, 匹配的目录不扫描 (默认: [])
+                      不含 "/" 的模式匹配名称(如 ".git"), 含 "/" 的模式匹配相对于根路径的路径
+                    - scan_workers: 并行扫描一级子目录的线程数 (默认: None, 串行扫描)
 
         Raises:
-            YamlConfigError: 如果缺少必需字段
+            YamlConfigError: 如果缺少必需字段或解析后端无效
             YamlPathError: 如果根路径不存在
         """
         if "root_path" not in config:
             raise YamlConfigError("Missing required field 'root_path'")
 
+        parser_backend = config.get("parser_backend", "libyaml")
+        resolve_loader(parser_backend)
+
         root_path = Path(config["root_path"])
         if not root_path.exists():
             raise YamlPathError(f"root_path {root_path} does not exist", str(root_path))
@@ -60,34 +117,132 @@ class YamlConfig:
             preserved_children_key=config.get(
                 "preserved_children_key", "CHILDREN_PATH"
             ),
+            max_depth=config.get("max_depth", 1000),
+            parser_backend=parser_backend,
+            json_fast_path=config.get("json_fast_path", True),
+            parse_cache_dir=config.get("parse_cache_dir"),
+            parse_cache_verify_hash=config.get("parse_cache_verify_hash", False),
+            prefetch_workers=config.get("prefetch_workers"),
+            intern_strings=config.get("intern_strings", True),
+            document_name_key=config.get("document_name_key", "name"),
+            exclude_pattern=config.get("exclude_pattern", []),
+            scan_workers=config.get("scan_workers"),
         )
 
 
+class YamlDocuments(list):
+    """包含多个文档(以 --- 分隔)的YAML文件的解析结果, 每个元素是一个文档的数据"""
+
+
 class _YamlFileHandler:
     """内部使用的YAML文件处理类"""
 
     @staticmethod
-    def _load_yaml_file(yaml_path: str) -> dict:
+    def _load_yaml_file(
+        yaml_path: str, loader: type = yaml.SafeLoader, json_fast_path: bool = False
+    ) -> Union[dict, YamlDocuments]:
         """加载YAML文件并返回字典数据
 
         Args:
             yaml_path: YAML文件的路径
+            loader: PyYAML加载器类, 参见 resolve_loader
+            json_fast_path: 为True时.json文件先用json模块解析,
+                不是严格JSON时再按YAML解析
 
         Returns:
-            dict: YAML文件的内容
+            dict: YAML文件的内容; 文件包含多个文档时返回 YamlDocuments,
+                空文档记为空字典
 
         Raises:
             YamlLoadError: 如果文件不存在或格式错误
         """
         try:
             with open(yaml_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                if data is None:
-                    return {}
-                return data
+                text = f.read()
+            data = None
+            if json_fast_path and yaml_path.endswith(".json"):
+                try:
+                    data = json.loads(text)
+                except ValueError:
+                    data = _YamlFileHandler._load_yaml_text(text, loader)
+            else:
+                data = _YamlFileHandler._load_yaml_text(text, loader)
+            if data is None:
+                return {}
+            return data
         except (IOError, yaml.YAMLError) as e:
             raise YamlLoadError(str(e), yaml_path)
 
+    @staticmethod
+    def _load_yaml_text(text: str, loader: type) -> Any:
+        """一次顺序读取解析文本中的所有文档, 只有一个文档时返回其数据"""
+        documents = list(yaml.load_all(text, Loader=loader))
+        if len(documents) <= 1:
+            return documents[0] if documents else None
+        return YamlDocuments({} if document is None else document for document in documents)
+
+
+# 不超过该长度的字符串值会被驻留, 更长的值(描述文本等)很少在文件之间重复
+INTERN_MAX_LENGTH = 64
+
+
+def intern_strings(data: Any) -> Any:
+    """原地驻留解析结果中所有映射的字符串键和不超过 INTERN_MAX_LENGTH 的字符串值
+
+    YAML别名产生的共享对象和自引用结构只处理一次。
+
+    Returns:
+        处理后的数据(顶层为字符串时返回驻留后的字符串, 其余情况为data本身)
+    """
+    intern = sys.intern
+    if isinstance(data, str):
+        return intern(data) if len(data) <= INTERN_MAX_LENGTH else data
+    visited: Set[int] = set()
+    stack: List[Any] = [data]
+    while stack:
+        container = stack.pop()
+        if id(container) in visited:
+            continue
+        visited.add(id(container))
+        if isinstance(container, dict):
+            items = list(container.items())
+            container.clear()
+            for key, value in items:
+                if isinstance(key, str):
+                    key = intern(key)
+                if isinstance(value, str):
+                    if len(value) <= INTERN_MAX_LENGTH:
+                        value = intern(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+                container[key] = value
+        elif isinstance(container, list):
+            for index, value in enumerate(container):
+                if isinstance(value, str):
+                    if len(value) <= INTERN_MAX_LENGTH:
+                        container[index] = intern(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+    return data
+
+
+def _prefetch_parse(yaml_path: str, loader: type, json_fast_path: bool) -> Any:
+    """预解析进程中加载一个数据文件"""
+    return _YamlFileHandler._load_yaml_file(yaml_path, loader, json_fast_path)
+
+
+@dataclass
+class _BuildFrame:
+    """迭代构建数据树时的栈帧"""
+
+    file_node: FileNode
+    data_node: DataNode
+    depth: int
+    groups: List[List[FileNode]]  # 每个CHILDREN模式匹配到的文件
+    selectors: List[Optional[str]]  # 每个模式 # 之后的文档选择器, 没有时为None
+    group_index: int = 0  # 正在处理的组
+    child_index: int = 0  # 组内下一个要处理的文件
+
 
 class YamlDataTreeHandler(DataHandler):
     """YAML数据树处理器
@@ -110,7 +265,25 @@ class YamlDataTreeHandler(DataHandler):
             YamlConfigError: 配置验证失败
         """
         self.config: YamlConfig = YamlConfig.validate(config)
-        self._node_paths: List[str] = []  # 用于检测循环引用
+        # 根路径字符串, 避免每个节点都重新转换和解析(resolve 需要访问文件系统)
+        self._root_path = str(self.config.root_path)
+        self._resolved_root_path = str(self.config.root_path.resolve())
+
+        # 追踪器, 由DataDrivenGenerator替换为共享实例
+        self.tracer = Tracer()
+        self._loader = resolve_loader(self.config.parser_backend)
+        self.parse_cache: Optional[ParseCache] = None
+        if self.config.parse_cache_dir:
+            self.parse_cache = ParseCache(
+                self.config.parse_cache_dir,
+                variant=f"{self._loader.__name__}:{self.config.json_fast_path}",
+                verify_hash=self.config.parse_cache_verify_hash,
+            )
+        # 预解析: 文件系统路径 -> (解析结果, 解析前的缓存记录)
+        self._prefetch_pool: Optional[ProcessPoolExecutor] = None
+        self._prefetched: Dict[str, Tuple["Future[Any]", Optional[Tuple[int, int, Optional[str]]]]] = {}
+        # 用于检测循环引用: 构建栈上的文件节点 -> 在栈中的位置(按入栈顺序排列)
+        self._node_paths: Dict[FileNode, int] = {}
         # self._path_mapping: Dict[str, DataNode] = {}  # 文件路径到数据节点的映射
 
         # DataNode 映射到 FileNode
@@ -119,6 +292,17 @@ class YamlDataTreeHandler(DataHandler):
         # FileNode 映射到 DataNode
         self._data_node_mapping: Dict[FileNode, DataNode] = {}
 
+        # 已完整构建(含子节点)的文件节点, 被多个父节点或根引用时直接复用
+        self._built_file_nodes: Set[FileNode] = set()
+
+        # 多文档文件 -> 各文档的文件节点(名称为 "文件名#序号", 不加入文件树)
+        self._bundles: Dict[FileNode, List[FileNode]] = {}
+        self._document_files: Set[FileNode] = set()
+
+        # 保护以上映射, 预解析结果和文件树索引: 流水线渲染时加载线程构建数据树,
+        # 渲染线程同时通过 find_by_file_path 按需创建和加载节点
+        self._lock = threading.RLock()
+
         # 初始化文件树
         self.file_tree: DirectoryNode = DirectoryNode(
             dir_name=str(self.config.root_path)
@@ -142,6 +326,9 @@ class YamlDataTreeHandler(DataHandler):
     def _clear_mapping(self) -> None:
         self._file_node_mapping.clear()
         self._data_node_mapping.clear()
+        self._built_file_nodes.clear()
+        self._bundles.clear()
+        self._document_files.clear()
 
     def get_absolute_path(self, node: DataNode) -> str:
         """获取节点的文件绝对路径
@@ -152,7 +339,223 @@ class YamlDataTreeHandler(DataHandler):
         Returns:
             str: 节点的绝对路径
         """
-        return str(self.config.root_path.resolve()) + node.get_absolute_path()
+        return self._resolved_root_path + node.get_absolute_path()
+
+    def _file_system_path(self, node: Union[FileNode, DirectoryNode]) -> str:
+        """文件树节点对应的文件系统路径"""
+        return self._root_path + node.get_absolute_path(slice_range=(1, None))
+
+    def _start_prefetch(self, file_nodes: Iterable[FileNode]) -> None:
+        """在进程池中按顺序预解析文件, 构建数据树时 _load_file 直接取用结果
+
+        命中解析缓存的文件不提交。未开启预解析(prefetch_workers不大于1)时什么也不做。
+        """
+        workers = self.config.prefetch_workers
+        if workers is None or workers <= 1:
+            return
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ProcessPoolExecutor(max_workers=workers)
+        cache = self.parse_cache
+        for file_node in file_nodes:
+            path = self._file_system_path(file_node)
+            if path in self._prefetched:
+                continue
+            record = None
+            if cache is not None:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # 交给 _load_file 报告错误
+                data = cache.get(path, stat)
+                if data is not ParseCache.MISS:
+                    future: "Future[Any]" = Future()
+                    future.set_result(data)
+                    self._prefetched[path] = (future, None)
+                    continue
+                record = cache.begin(path, stat)
+            self._prefetched[path] = (
+                self._prefetch_pool.submit(
+                    _prefetch_parse, path, self._loader, self.config.json_fast_path
+                ),
+                record,
+            )
+
+    def _stop_prefetch(self) -> None:
+        """丢弃未取用的预解析结果
+
+        取消尚未开始的解析; 已开始的解析等待完成后写入解析缓存。
+        """
+        for path, (future, record) in self._prefetched.items():
+            if future.cancel() or record is None or self.parse_cache is None:
+                continue
+            if future.exception() is None:
+                self.parse_cache.put(path, record, future.result())
+        self._prefetched.clear()
+
+    def close(self) -> None:
+        """关闭预解析进程池"""
+        self._stop_prefetch()
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.shutdown()
+            self._prefetch_pool = None
+
+    def _load_file(self, file_system_path: str) -> Union[dict, YamlDocuments]:
+        """加载数据文件, 开启 intern_strings 时驻留其中的键和短字符串值"""
+        data = self._read_file(file_system_path)
+        if self.config.intern_strings:
+            data = intern_strings(data)
+        return data
+
+    def _read_file(self, file_system_path: str) -> Union[dict, YamlDocuments]:
+        """按配置的解析后端加载数据文件
+
+        已预解析的文件等待并取用预解析结果; 设置了解析缓存时文件未变化则直接读取缓存。
+        """
+        prefetched = self._prefetched.pop(file_system_path, None)
+        if prefetched is not None:
+            future, record = prefetched
+            try:
+                data = future.result()
+            except Exception:
+                # 解析错误或进程池异常: 在当前进程重新加载, 以原始的错误类型和路径报错
+                pass
+            else:
+                if record is not None and self.parse_cache is not None:
+                    self.parse_cache.put(file_system_path, record, data)
+                return data
+
+        cache = self.parse_cache
+        if cache is None:
+            return _YamlFileHandler._load_yaml_file(
+                file_system_path, self._loader, self.config.json_fast_path
+            )
+
+        try:
+            stat = os.stat(file_system_path)
+        except OSError as e:
+            raise YamlLoadError(str(e), file_system_path)
+        data = cache.get(file_system_path, stat)
+        if data is not ParseCache.MISS:
+            return data
+        record = cache.begin(file_system_path, stat)
+        data = _YamlFileHandler._load_yaml_file(
+            file_system_path, self._loader, self.config.json_fast_path
+        )
+        cache.put(file_system_path, record, data)
+        return data
+
+    def get_source_path(self, node: DataNode) -> str:
+        """获取节点对应的数据文件相对于数据根目录的路径
+
+        Args:
+            node: 数据节点
+
+        Returns:
+            str: 以"/"分隔的相对路径
+        """
+        file_node = self._file_node_mapping[node]
+        return file_node.get_absolute_path(slice_range=(1, None)).lstrip("/")
+
+    def get_input_stats(self) -> Dict[str, List[int]]:
+        """获取数据根目录下所有目录和数据文件的 [mtime_ns, size]
+
+        目录的size记为-1, 目录中增删文件会改变目录的mtime。
+        """
+        stats: Dict[str, List[int]] = {}
+        for node in [self.file_tree] + self.file_tree._get_all_nodes():
+            path = self._file_system_path(node)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            size = stat.st_size if isinstance(node, FileNode) else -1
+            stats[path] = [stat.st_mtime_ns, size]
+        return stats
+
+    def create_data_tree_from_plan(self, plan: RenderPlan) -> List[DataNode]:
+        """按渲染计划创建数据树
+
+        只加载计划中的文件, 子节点按计划直接链接, 不再解析子节点模式。
+        调用方需要先确认计划仍然有效(RenderPlan.is_current)。
+
+        Args:
+            plan: 渲染计划
+
+        Returns:
+            List[DataNode]: 与 create_data_tree 相同的数据树列表
+
+        Raises:
+            YamlPathError: 如果计划中的文件不在文件树中
+            YamlLoadError: 如果文件加载失败
+        """
+        self._clear_mapping()
+        sources: List[Tuple[FileNode, Optional[str]]] = []
+        for entry in plan.nodes:
+            # 文件名本身可能含有 "#", 先按完整路径查找
+            path, selector = entry.file, None
+            file_node = self._find_file_node(path)
+            if file_node is None:
+                path, selector = self._split_selector(entry.file)
+                if selector is not None:
+                    file_node = self._find_file_node(path)
+            if file_node is None:
+                raise YamlPathError(f"File in render plan not found", entry.file)
+            sources.append((file_node, selector))
+
+        self._start_prefetch(file_node for file_node, _ in sources)
+        try:
+            plan_files = [
+                self._plan_file_node(file_node, selector) for file_node, selector in sources
+            ]
+        finally:
+            self._stop_prefetch()
+        data_nodes = [self._data_node_mapping[file_node] for file_node in plan_files]
+
+        for index, entry in enumerate(plan.nodes):
+            data_node = data_nodes[index]
+            for group in entry.groups:
+                for child_index in group:
+                    child = data_nodes[child_index]
+                    if child.parent is None and plan.nodes[child_index].parent == index:
+                        data_node.add_child(child)
+                    else:
+                        data_node.children.append(child)
+                data_node.add_children_group(len(group))
+            self._built_file_nodes.add(plan_files[index])
+
+        return [data_nodes[index] for index in plan.roots]
+
+    def _plan_file_node(self, file_node: FileNode, selector: Optional[str]) -> FileNode:
+        """加载计划中的一个文件并创建数据节点(不解析子节点模式)
+
+        selector 为多文档文件中文档的序号, 返回该文档的文件节点。
+        """
+        documents = self._document_nodes(file_node)
+        if selector is not None:
+            name = f"{file_node.name}#{selector}"
+            documents = [document for document in documents if document.name == name]
+        if len(documents) != 1:
+            raise YamlPathError(
+                f"Document in render plan not found",
+                self._file_system_path(file_node) + ("" if selector is None else f"#{selector}"),
+            )
+        if not self._data_node_mapping[documents[0]].data:
+            raise YamlLoadError(f"Failed to load data", self._file_system_path(documents[0]))
+        return documents[0]
+
+    def _find_file_node(self, source_path: str) -> Optional[FileNode]:
+        """按相对路径逐级查找文件节点(名称精确匹配)"""
+        current: Union[FileNode, DirectoryNode] = self.file_tree
+        for part in source_path.split("/"):
+            if not isinstance(current, DirectoryNode):
+                return None
+            for child in current.children:
+                if child.name == part:
+                    current = child
+                    break
+            else:
+                return None
+        return current if isinstance(current, FileNode) else None
 
     def _file_tree_init(self) -> None:
         """初始化文件树结构
@@ -161,123 +564,338 @@ class YamlDataTreeHandler(DataHandler):
         不直接访问此方法，它由__init__自动调用。
         """
         self.file_tree.build_tree(
-            str(self.config.root_path), patterns=self.config.file_pattern
+            str(self.config.root_path),
+            patterns=self.config.file_pattern,
+            exclude=self.config.exclude_pattern,
+            workers=self.config.scan_workers,
         )
 
     def find_by_file_path(self, node: DataNode, pattern: str) -> List[DataNode]:
         """根据文件路径模式查找数据节点
 
+        匹配到尚未加入数据树的文件时, 为其创建延迟加载的数据节点:
+        数据在第一次访问 data 时才解析, 之后该文件被链接为子节点时复用同一个节点。
+        多文档文件返回其中每个文档的节点; 模式以 "#序号" 或 "#名称" 结尾(且完整的模式
+        没有匹配到名称含 "#" 的文件)时只返回选中的文档, 这时会立即加载匹配的文件。尚未加载的多文档文件不带选择器引用时,
+        延迟节点在访问 data 时报错。
+
         Args:
-            pattern: 文件路径模式，如 "*.yaml" 或 "**/config/*.yaml"
+            node: 作为相对路径起点的数据节点
+            pattern: 文件路径模式，如 "*.yaml", "**/config/*.yaml" 或 "vars/*.yaml#Var*"
 
         Returns:
             List[DataNode]: 匹配的数据节点列表
         """
-        # Get file node from mapping
-        file_node: Optional[FileNode] = self._file_node_mapping.get(node, None)
-        if file_node is None:
-            pass
-
-        found_node = cast(DirectoryNode, file_node.parent).find_nodes_by_path(pattern)
-        result: List[DataNode] = []
-        for node in found_node:
-            if isinstance(node, FileNode):
+        with self._lock:
+            # Get file node from mapping
+            file_node: Optional[FileNode] = self._file_node_mapping.get(node, None)
+            if file_node is None or file_node.parent is None:
+                return []
+
+            found_files, selector = self._match_files(
+                cast(DirectoryNode, file_node.parent), pattern
+            )
+            result: List[DataNode] = []
+            for node in found_files:
+                if selector is not None or node in self._bundles:
+                    documents = self._select_documents(self._document_nodes(node), selector)
+                    result.extend(self._data_node_mapping[document] for document in documents)
+                    continue
                 # Get data node from mapping
                 data_node = self._data_node_mapping.get(node)
-                if data_node:
-                    result.append(data_node)
-        return result
+                if data_node is None:
+                    data_node = self._lazy_data_node(node)
+                result.append(data_node)
+            return result
+
+    def _lazy_data_node(self, file_node: FileNode) -> DataNode:
+        """为文件创建延迟加载的数据节点并加入映射"""
+        file_system_path = self._file_system_path(file_node)
+
+        def load() -> Dict[str, Any]:
+            with self._lock:
+                if data_node.is_loaded:
+                    # 等待锁期间已由构建线程加载
+                    return data_node.data
+                with self.tracer.phase("parse", file_system_path):
+                    data = self._load_file(file_system_path)
+            if isinstance(data, YamlDocuments):
+                raise YamlLoadError(
+                    f"File contains {len(data)} documents, "
+                    f"select them with '#<index>' or '#<name>'",
+                    file_system_path,
+                )
+            return data
+
+        data_node = DataNode(data=None, name=file_node.name, loader=load)
+        self._add_mapping(data_node, file_node)
+        return data_node
+
+    @staticmethod
+    def _split_selector(pattern: str) -> Tuple[str, Optional[str]]:
+        """拆分模式末尾的文档选择器: "vars/all.yaml#3" -> ("vars/all.yaml", "3")
+
+        # 之后为空或含有 "/" 时视为文件名的一部分, 没有选择器。
+        """
+        path, sep, selector = pattern.rpartition("#")
+        if not sep or not selector or "/" in selector:
+            return pattern, None
+        return path, selector
+
+    def _match_files(
+        self, directory: DirectoryNode, pattern: str
+    ) -> Tuple[List[FileNode], Optional[str]]:
+        """查找模式匹配的文件, 返回 (文件列表, 文档选择器)
+
+        先按完整的模式匹配, 名称本身含有 "#" 的文件照常引用;
+        没有匹配的文件时才将末尾的 "#..." 视为文档选择器。
+        """
+        files = [
+            node for node in directory.find_nodes_by_path(pattern) if isinstance(node, FileNode)
+        ]
+        path, selector = self._split_selector(pattern)
+        if files or selector is None:
+            return files, None
+        return [
+            node for node in directory.find_nodes_by_path(path) if isinstance(node, FileNode)
+        ], selector
+
+    def _document_nodes(self, file_node: FileNode) -> List[FileNode]:
+        """加载文件并返回其各个文档对应的文件节点, 单文档文件返回 [file_node]
+
+        多文档文件一次读取全部文档, 为每个文档创建名为 "文件名#序号" 的文件节点
+        (父目录与文件相同, 但不加入文件树)和数据节点; 之后的引用直接复用。
+
+        Raises:
+            YamlLoadError: 如果文件加载失败
+        """
+        documents = self._bundles.get(file_node)
+        if documents is not None:
+            return documents
+        data_node = self._data_node_mapping.get(file_node)
+        if data_node is not None and (
+            data_node.is_loaded or file_node in self._document_files
+        ):
+            return [file_node]
+
+        file_system_path = self._file_system_path(file_node)
+        with self.tracer.phase("parse", file_system_path):
+            data = self._load_file(file_system_path)
+        if isinstance(data, YamlDocuments):
+            documents = []
+            for index, document in enumerate(data):
+                document_file = FileNode(f"{file_node.name}#{index}", file_node.parent)
+                self._add_mapping(
+                    DataNode(data=document, name=document_file.name), document_file
+                )
+                self._document_files.add(document_file)
+                documents.append(document_file)
+            self._bundles[file_node] = documents
+            return documents
+
+        if data_node is None:
+            # 创建数据节点并存入映射
+            self._add_mapping(DataNode(data=data, name=file_node.name), file_node)
+        else:
+            # 已通过 find_by_file_path 引用过的文件复用其延迟加载的节点
+            data_node.data = data
+        return [file_node]
+
+    def _select_documents(
+        self, documents: List[FileNode], selector: Optional[str]
+    ) -> List[FileNode]:
+        """按选择器筛选文档: 数字为序号, 其余按 document_name_key 的值做通配符匹配"""
+        if selector is None:
+            return documents
+        if selector.isdigit():
+            index = int(selector)
+            return documents[index : index + 1]
+        key = self.config.document_name_key
+        selected: List[FileNode] = []
+        for document in documents:
+            data = self._data_node_mapping[document].data
+            name = data.get(key) if isinstance(data, dict) else None
+            if isinstance(name, str) and fnmatchcase(name, selector):
+                selected.append(document)
+        return selected
 
     def _data_node_create(self, file_node: FileNode, depth: int) -> DataNode:
         """从文件节点创建数据节点
 
+        每个文件只解析并构建一次: 同一文件被多个父节点的CHILDREN模式或多个根匹配时,
+        返回已构建的同一个DataNode, 数据树因此成为有向无环图。
+        构建使用显式栈迭代完成, 树的深度只受 max_depth 限制, 不受Python递归深度限制。
+        子节点已在构建栈上(是当前节点的祖先)时立即报告循环引用及其完整路径。
+        CHILDREN模式匹配到多文档文件时展开为其中(选中)的各个文档。
+
         Args:
-            file_node: 文件节点
-            depth: 当前递归深度
+            file_node: 已加载的文件节点, 参见 _document_nodes
+            depth: 当前深度
 
         Returns:
             DataNode: 创建的数据节点
 
         Raises:
-            YamlStructureError: 如果递归深度超限或缺少必要字段
+            YamlStructureError: 如果深度超限, 缺少必要字段或存在循环引用
             YamlLoadError: 如果文件加载失败
         """
+        if file_node in self._built_file_nodes:
+            return self._data_node_mapping[file_node]
+
+        on_stack = self._node_paths
+        on_stack.clear()
+        stack: List[_BuildFrame] = [self._create_build_frame(file_node, depth)]
+        on_stack[file_node] = 0
+        while True:
+            frame = stack[-1]
+            if frame.group_index < len(frame.groups):
+                group = frame.groups[frame.group_index]
+                if frame.child_index < len(group):
+                    matching_file = group[frame.child_index]
+                    if matching_file in self._built_file_nodes:
+                        frame.child_index += 1
+                        frame.data_node.link_child(
+                            self._data_node_mapping[matching_file]
+                        )
+                        continue
+                    try:
+                        if matching_file in on_stack:
+                            raise self._cycle_error(stack, on_stack[matching_file])
+                        if matching_file not in self._document_files:
+                            documents = self._select_documents(
+                                self._document_nodes(matching_file),
+                                frame.selectors[frame.group_index],
+                            )
+                            if documents != [matching_file]:
+                                # 多文档文件在组内展开为选中的各个文档
+                                group[frame.child_index : frame.child_index + 1] = documents
+                                continue
+                        frame.child_index += 1
+                        stack.append(
+                            self._create_build_frame(matching_file, frame.depth + 1)
+                        )
+                    except YamlError as e:
+                        raise self._child_error(stack, matching_file, e) from e
+                    on_stack[matching_file] = len(stack) - 1
+                    continue
+                # 当前组的子节点处理完毕, 记录该组的数量
+                frame.data_node.add_children_group(len(group))
+                frame.group_index += 1
+                frame.child_index = 0
+                continue
+
+            # 所有子节点处理完毕, 将节点链接到父节点
+            stack.pop()
+            del on_stack[frame.file_node]
+            self._built_file_nodes.add(frame.file_node)
+            if not stack:
+                return frame.data_node
+            stack[-1].data_node.link_child(frame.data_node)
+
+    def _cycle_error(
+        self, stack: List["_BuildFrame"], start: int
+    ) -> YamlStructureError:
+        """构建栈中从位置 start 开始的节点构成循环时的错误, 路径以重复的起点结尾"""
+        cycle = [frame.file_node for frame in stack[start:]] + [stack[start].file_node]
+        return YamlStructureError.circular_reference(
+            self._file_system_path(stack[start].file_node),
+            [
+                file_node.get_absolute_path(slice_range=(1, None)).lstrip("/")
+                for file_node in cycle
+            ],
+        )
+
+    @staticmethod
+    def _child_error(
+        stack: List["_BuildFrame"], matching_file: FileNode, error: YamlError
+    ) -> YamlStructureError:
+        """为子节点错误逐层添加"处理子节点失败"的上下文, 从出错的子节点一直到根节点
+
+        循环引用错误的 cycle 保留在每一层, 调用方可以直接从最外层的错误读取循环路径。
+        """
+        wrapped = error
+        for file_node in [matching_file] + [frame.file_node for frame in stack[:0:-1]]:
+            cause = wrapped
+            wrapped = YamlStructureError(
+                cause.error_type,
+                f"Error processing child {file_node.name}: {str(cause)}",
+                str(file_node.get_absolute_path()),
+            )
+            wrapped.cycle = list(getattr(cause, "cycle", []))
+            wrapped.__cause__ = cause
+        return cast(YamlStructureError, wrapped)
+
+    def _create_build_frame(self, file_node: FileNode, depth: int) -> "_BuildFrame":
+        """为已加载的文件(参见 _document_nodes)创建构建帧并解析其子节点模式
+
+        Args:
+            file_node: 单文档文件或多文档文件中一个文档的文件节点
+            depth: 节点深度
+
+        Returns:
+            _BuildFrame: 包含数据节点及其各组匹配文件的构建帧
+
+        Raises:
+            YamlStructureError: 如果深度超限或缺少必要字段
+            YamlLoadError: 如果文件数据为空
+        """
         if depth > self.config.max_depth:
             raise YamlStructureError.max_depth_exceeded(
                 self.config.max_depth, file_node.name
             )
-            
-        file_system_path: str = str(
-            self.config.root_path
-        ) + file_node.get_absolute_path(slice_range=(1, None))
-        
-        data = _YamlFileHandler._load_yaml_file(file_system_path)
-        if data:
-            # 创建数据节点并存入映射
-            data_node = DataNode(data=data, name=file_node.name)
-
-            # Add data node to file node mapping
-            self._add_mapping(data_node, file_node)
-
-            # 验证必要字段
-            for key in [self.preserved_template_key, self.preserved_children_key]:
-                if key not in data:
-                    raise YamlStructureError.missing_key(key, file_system_path)
-
-            # 处理子节点
-            children_path = data_node.data[self.preserved_children_key]
-            
-            if children_path == "":  # 空字符串视为空列表
-                children_path = []
-            if children_path:
-                if isinstance(children_path, str):
-                    children_path = [children_path]  # 转换单个字符串为列表
-                elif isinstance(children_path, list):
-                    pass  # 已经是列表
-
-                # 为每个模式创建子节点, 同时将他们分组
-                for paths in children_path:
-                    if not paths:  # 跳过空路径
+
+        file_system_path: str = self._file_system_path(file_node)
+
+        data_node = self._data_node_mapping[file_node]
+        data = data_node.data
+        if not data:
+            raise YamlLoadError(f"Failed to load data", file_system_path)
+
+        # 验证必要字段
+        for key in [self.preserved_template_key, self.preserved_children_key]:
+            if key not in data:
+                raise YamlStructureError.missing_key(key, file_system_path)
+
+        # 处理子节点
+        children_path = data_node.data[self.preserved_children_key]
+        groups: List[List[FileNode]] = []
+        selectors: List[Optional[str]] = []
+
+        if children_path == "":  # 空字符串视为空列表
+            children_path = []
+        if children_path:
+            if isinstance(children_path, str):
+                children_path = [children_path]  # 转换单个字符串为列表
+
+            # 为每个模式查找子节点文件, 同时将他们分组
+            for paths in children_path:
+                if not paths:  # 跳过空路径
+                    continue
+                patterns = []
+                if isinstance(paths, str):
+                    patterns = [paths]
+                elif isinstance(paths, list):
+                    patterns = paths
+                else:
+                    raise YamlStructureError.invalid_children(
+                        f"Invalid children path specification: {paths}",
+                        file_system_path,
+                    )
+                # 处理每个模式
+                for pattern in patterns:
+                    if not pattern:  # 跳过空模式
                         continue
-                    patterns = []
-                    if isinstance(paths, str):
-                        patterns = [paths]
-                    elif isinstance(paths, list):
-                        patterns = paths
-                    else:
-                        raise YamlStructureError.invalid_children(
-                            f"Invalid children path specification: {paths}",
-                            file_system_path,
+                    # "file.yaml#N" / "file.yaml#名称" 选择多文档文件中的文档
+                    matching_files: List[FileNode] = []
+                    selector: Optional[str] = None
+                    if file_node.parent:
+                        matching_files, selector = self._match_files(
+                            cast(DirectoryNode, file_node.parent), pattern
                         )
-                    # 处理每个模式
-                    for pattern in patterns:
-                        current_group_number = 0
-                        if not pattern:  # 跳过空模式
-                            continue
-                        if file_node.parent:
-                            matching_files = cast(
-                                DirectoryNode, file_node.parent
-                            ).find_nodes_by_path(pattern)
-                            for matching_file in matching_files:
-                                if isinstance(matching_file, FileNode):
-                                    try:
-                                        child_node = self._data_node_create(
-                                            matching_file, depth + 1
-                                        )
-                                        data_node.add_child(child_node)
-                                        current_group_number += 1
-                                    except YamlError as e:
-                                        # 重新抛出异常，添加子节点处理失败的上下文
-                                        raise YamlStructureError(
-                                            e.error_type,
-                                            f"Error processing child {matching_file.name}: {str(e)}",
-                                            str(matching_file.get_absolute_path()),
-                                        ) from e
-                        data_node.children_group_number.append(current_group_number)
-                                        
-        else:
-            raise YamlLoadError(f"Failed to load data", file_system_path)
-        return data_node
+                    groups.append(matching_files)
+                    selectors.append(selector)
+
+        return _BuildFrame(file_node, data_node, depth, groups, selectors)
 
     def create_data_tree(self, pattern: str) -> List[DataNode]:
         """从文件模式创建数据树
@@ -291,25 +909,55 @@ class YamlDataTreeHandler(DataHandler):
         Raises:
             YamlError: 如果树创建过程中出现错误
         """
-        # 重置状态
-        # self._path_mapping.clear()
-        self._clear_mapping()
-        data_tree_list = []
+        return list(self.iter_data_trees(pattern))
 
-        if len(self.file_tree.children) == 0:
-            return []
+    def iter_data_trees(self, pattern: str) -> Iterator[DataNode]:
+        """从文件模式逐个创建数据树
 
-        try:
-            # 处理每个匹配的文件
-            for child in self.file_tree.find_nodes_by_path(pattern):
-                if isinstance(child, FileNode):
-                    try:
-                        data_node = self._data_node_create(child, 0)
-                        data_tree_list.append(data_node)
-                    except YamlError as e:
-                        raise  # 重新抛出所有YAML错误
-        except YamlError as e:
-            data_tree_list = []  # 出错时清空列表
-            raise
+        每棵树构建完成后立即产出。后续的树可以复用之前的树中已构建的节点,
+        find_by_file_path 引用的尚未构建的文件按需延迟加载。
+
+        Args:
+            pattern: 文件路径模式，如 "root.yaml" 或 "**/root/*.yaml"
 
-        return data_tree_list
+        Yields:
+            DataNode: 构建完成的数据树
+
+        Raises:
+            YamlError: 如果树创建过程中出现错误
+        """
+        # 重置状态
+        # self._path_mapping.clear()
+        with self._lock:
+            self._clear_mapping()
+
+            if len(self.file_tree.children) == 0:
+                return
+
+            roots = [
+                child
+                for child in self.file_tree.find_nodes_by_path(pattern)
+                if isinstance(child, FileNode)
+            ]
+            # 先提交根文件, 再按文件树顺序提交其余文件, 与构建顺序大致一致
+            self._start_prefetch(
+                roots
+                + [
+                    node
+                    for node in self.file_tree._get_all_nodes()
+                    if isinstance(node, FileNode)
+                ]
+            )
+        try:
+            # 处理每个匹配的文件, 多文档文件的每个文档各是一棵树;
+            # 只在构建期间持有锁, 产出的树被渲染时其他线程可以继续查找
+            for child in roots:
+                with self._lock:
+                    documents = self._document_nodes(child)
+                for document in documents:
+                    with self._lock:
+                        tree = self._data_node_create(document, 0)
+                    yield tree
+        finally:
+            with self._lock:
+                self._stop_prefetch()